@@ -1,8 +1,22 @@
 """
 Configuration for ClaudeScale MCP Server
 """
+from pydantic import BaseModel
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Any, Dict, List, Optional
+
+
+class ClusterConfig(BaseModel):
+    """
+    One cluster managed by the server (an entry of Settings.CLUSTERS)
+    """
+
+    name: str
+    context: Optional[str] = None  # kubeconfig context (None = current context)
+    prometheus_url: str = "http://localhost:9090"
+    in_cluster: bool = False
+    namespace: Optional[str] = None  # Defaults to KUBERNETES_NAMESPACE
+    timeout_seconds: Optional[float] = None  # Defaults to CLUSTER_TIMEOUT_SECONDS
 
 
 class Settings(BaseSettings):
@@ -14,20 +28,101 @@ class Settings(BaseSettings):
     KUBERNETES_IN_CLUSTER: bool = False  # Set to True when running inside K8s
     KUBECONFIG_PATH: Optional[str] = None  # Path to kubeconfig (for local dev)
     KUBERNETES_NAMESPACE: str = "claudescale"
+    STATE_CACHE_TTL_SECONDS: float = 5.0  # Reuse deployment listings this long
 
     # Prometheus Configuration
     PROMETHEUS_URL: str = "http://prometheus:9090"  # Internal cluster URL
     PROMETHEUS_LOCAL_URL: str = "http://localhost:9090"  # For local development
+    METRICS_WARMUP_SECONDS: float = 60.0  # Pods ready for less than this are warming up (0 = off)
+    METRICS_WARMUP_MODE: str = "exclude"  # "exclude" warming pods from averages, or "weight" by age
+    IMBALANCE_CV_THRESHOLD: float = 0.5  # Per-pod CPU skew that turns scale_up into rebalance (0 = off)
+    IMBALANCE_MIN_PODS: int = 3  # Fewest counted pods for an imbalance verdict
+    IMBALANCE_TOP_K: int = 3  # Hottest pods listed by get_metrics
+    METRICS_STORE_MAX_SERIES: int = 1400  # In-process history series kept (~14 KB each, 8 per deployment)
+    METRICS_STALE_MAX_SECONDS: float = 900.0  # Oldest stored data served when Prometheus is down
+    METRICS_SAMPLER_INTERVAL_SECONDS: float = 15.0  # Re-sample queried deployments (0 = only record queries)
+    METRICS_SAMPLER_IDLE_SECONDS: float = 300.0  # Stop sampling a deployment nobody queried this long
+
+    # Multi-cluster Configuration
+    # JSON list of ClusterConfig, e.g.
+    # CLUSTERS='[{"name": "eu", "context": "eu-prod", "prometheus_url": "http://localhost:9091"}]'
+    # Empty = single cluster built from the settings above.
+    CLUSTERS: List[ClusterConfig] = []
+    CLUSTER_TIMEOUT_SECONDS: float = 10.0  # Per-cluster budget for fan-out calls
 
-    # Scaling Configuration
+    # Scaling Configuration (defaults; per-deployment overrides below)
     MIN_REPLICAS: int = 2
     MAX_REPLICAS: int = 5
+    SCALEUP_MAX_STEP: int = 0  # Most replicas added per action (0 = no limit)
+    SCALEDOWN_MAX_STEP: int = 1  # Most replicas removed per action
+    # "namespace/name" or "name" -> {min_replicas, max_replicas, max_step_up, max_step_down}, e.g.
+    # DEPLOYMENT_LIMITS='{"shop/checkout": {"min_replicas": 10, "max_replicas": 60, "max_step_up": 10}}'
+    # Deployment annotations claudescale.io/min-replicas etc. apply below these.
+    DEPLOYMENT_LIMITS: Dict[str, Dict[str, int]] = {}
+    DEPLOYMENT_LIMITS_FILE: Optional[str] = None  # Same JSON in a file, re-read when it changes
     DEFAULT_DEPLOYMENT: str = "demo-app"
+    HPA_AWARE: bool = True  # Scale HPA-managed deployments by raising/lowering the HPA floor
+    # New pods that would not fit on the nodes: "cap" the scale-up, only "report" (e.g. with
+    # a cluster autoscaler, which needs Pending pods to add nodes), or "off"
+    SCHEDULING_CHECK_MODE: str = "cap"
+    # Cooldowns adapt per deployment: x2 per reversal (up to x4) once it flaps up/down,
+    # x0.5 for the next scale-up along a ramp of scale-ups
+    ADAPTIVE_COOLDOWN: bool = True
+    FLAP_WINDOW_SECONDS: float = 1800.0  # Scale history considered
+    FLAP_MIN_REVERSALS: int = 2  # Direction changes in the window that count as flapping
+    FLAP_MAX_MULTIPLIER: float = 4.0
+    RAMP_MIN_ACTIONS: int = 3  # Scale-ups in a row that count as a ramp
+    RAMP_COOLDOWN_FACTOR: float = 0.5
+    # Scheduled floors: "namespace/name" or "name" -> cron windows, e.g.
+    # PRESCALE_PROFILES='{"shop/checkout": [{"schedule": "30 7 * * 1-5", "duration_minutes": 600, "min_replicas": 8}]}'
+    # A floor is applied PRESCALE_LEAD_MINUTES before its window opens, and scale-down
+    # cannot go below it while the window is open.
+    PRESCALE_PROFILES: Dict[str, List[Dict[str, Any]]] = {}
+    PRESCALE_PROFILES_FILE: Optional[str] = None  # Same JSON in a file, re-read when it changes
+    PRESCALE_TIMEZONE: str = "UTC"  # IANA zone the schedules are written in
+    PRESCALE_LEAD_MINUTES: int = 10
+    PRESCALE_CHECK_SECONDS: float = 60.0  # Scheduler period (0 = floors only bind scale-down)
 
     # MCP Server Configuration
     SERVER_NAME: str = "claudescale-mcp"
     SERVER_VERSION: str = "1.0.0"
 
+    # Admission control (token buckets; shed calls fail with a retry-after)
+    RATE_LIMIT_ENABLED: bool = True
+    TOOL_QPS: float = 10.0  # Calls per second, per tool
+    TOOL_BURST: int = 20
+    TOOL_QPS_OVERRIDES: Dict[str, float] = {}  # e.g. {"claudescale_get_metrics": 2}
+    KUBERNETES_QPS: float = 20.0  # API requests per second, per cluster
+    KUBERNETES_BURST: int = 40
+    PROMETHEUS_QPS: float = 50.0  # Queries per second, per cluster
+    PROMETHEUS_BURST: int = 100
+    RATE_LIMIT_MAX_QUEUE: int = 50  # Queued reads per limit before shedding
+    RATE_LIMIT_MAX_WAIT_SECONDS: float = 2.0
+
+    # Scale impact analysis (before/after windows around every executed action)
+    IMPACT_ANALYSIS_ENABLED: bool = True
+    IMPACT_WINDOW_SECONDS: float = 300.0  # Length of the before and after windows
+    IMPACT_SETTLE_SECONDS: float = 60.0  # Skipped right after the action
+
+    # Alertmanager webhook (push-based triggers; 0 disables)
+    ALERT_WEBHOOK_PORT: int = 9095
+    ALERT_WEBHOOK_HOST: str = "127.0.0.1"  # Any other address requires ALERT_WEBHOOK_TOKEN
+    ALERT_WEBHOOK_TOKEN: Optional[str] = None  # Required "Authorization: Bearer" value
+    ALERT_ACTION: str = "notify"  # "notify" (claudescale_pending_alerts only) or "evaluate" (scale up via guardrails)
+    ALERT_GROUP_WAIT_SECONDS: float = 10.0  # Coalesce alerts for one deployment before evaluating
+    ALERT_STALE_SECONDS: float = 3600.0  # Drop firing alerts not re-sent for this long
+
+    # Self-instrumentation (/metrics for Prometheus; 0 disables)
+    METRICS_PORT: int = 9464
+    METRICS_HOST: str = "127.0.0.1"  # Unauthenticated: 0.0.0.0 only where the network is trusted (in-cluster)
+
+    # Tracing (OTLP/JSON spans around every tool and client call)
+    TRACING_ENABLED: bool = False
+    TRACE_SAMPLE_RATE: float = 1.0  # Fraction of tool calls traced
+    TRACE_EXPORTER: str = "file"  # "none" (memory only), "file" or "otlp"
+    TRACE_FILE_PATH: str = "/tmp/claudescale-traces.jsonl"
+    TRACE_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
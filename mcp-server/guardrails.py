@@ -2,76 +2,372 @@
 ClaudeScale Guardrails — Safety mechanisms for LLM-driven scaling
 
 Protections:
-1. Cooldown — minimum time between scaling actions
+1. Cooldown — minimum time between scaling actions, widened while a
+   deployment flaps (up/down/up) and shortened along a steady scale-up ramp
 2. State snapshot — saves cluster state before any action for rollback
 3. Audit log — persistent log of every action with full context
 4. Scale-down guard — extra conservative checks before reducing replicas
-5. No destructive ops — only scale up/down within hard limits, never delete
+5. No destructive ops — only scale up/down within replica limits, never delete
+   (per-deployment bounds and step sizes from config or annotations)
+5b. Pre-scaling floors — scheduled per-deployment minimums (cron windows)
+   that the scale-down guard will not go below while active
+6. Admission control — per-tool rate limits; scaling writes go before reads
 """
 
+import functools
 import json
 import logging
+import os
+import threading
+import time
+from collections import deque
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Callable, Optional, Dict, Any, List
+from zoneinfo import ZoneInfo
+
+from utils.cron import CronExpression
+
+from utils.rate_limit import (
+    PRIORITY_READ,
+    PRIORITY_WRITE,
+    RateLimitExceeded,
+    request_priority,
+    tool_bucket,
+)
+from utils.self_metrics import AUDIT_EVENTS, AUDIT_WRITE_DURATION, GUARDRAIL_BLOCKS
+from utils.tracing import span
 
 # ─── Configuration ────────────────────────────────────────────────────────────
 
 COOLDOWN_SECONDS = 90          # Minimum seconds between scaling operations
 SCALEDOWN_COOLDOWN_SECONDS = 180  # Scale-down is more conservative (3 min)
+SCALEDOWN_MAX_CPU_PCT = 40     # Scale-down only allowed below this CPU %
+MIN_REPLICAS = 2               # Default replica bounds...
+MAX_REPLICAS = 5
+SCALEUP_MAX_STEP = 0           # ...and most replicas added per action (0 = no limit)
+SCALEDOWN_MAX_STEP = 1         # Most replicas removed per action
+DEPLOYMENT_LIMITS: Dict[str, Dict[str, int]] = {}  # "namespace/name" or "name" -> overrides
+DEPLOYMENT_LIMITS_FILE: Optional[Path] = None      # Same shape as JSON; reloaded on change
+LIMITS_FILE_CHECK_SECONDS = 5.0
 AUDIT_LOG_PATH = Path("/tmp/claudescale-audit.log")
 SNAPSHOT_PATH = Path("/tmp/claudescale-snapshot.json")
+WRITE_TOOLS = {"claudescale_scale_deployment", "claudescale_tune_hpa"}  # Admitted ahead of reads
+
+# Adaptive cooldown (per-deployment scale history)
+ADAPTIVE_COOLDOWN = True        # Widen cooldowns on flapping, shorten scale-ups along ramps
+FLAP_WINDOW_SECONDS = 1800      # History considered per deployment
+FLAP_MIN_REVERSALS = 2          # Direction changes in the window that count as flapping
+FLAP_MAX_MULTIPLIER = 4.0       # Flapping doubles cooldowns per extra reversal, up to this
+FLAP_SCALEDOWN_CPU_FACTOR = 0.75  # While flapping, scale-down needs CPU below this share of SCALEDOWN_MAX_CPU_PCT
+RAMP_MIN_ACTIONS = 3            # Scale-ups in a row that count as a ramp
+RAMP_COOLDOWN_FACTOR = 0.5      # Cooldown factor for the next scale-up along a ramp
+HISTORY_AUDIT_LINES = 500       # Audit entries read to rebuild the history after a restart
+
+# Pre-scaling floors: "namespace/name" or "name" -> [{"schedule", "duration_minutes", "min_replicas"}]
+PRESCALE_PROFILES: Dict[str, List[Dict[str, Any]]] = {}
+PRESCALE_PROFILES_FILE: Optional[Path] = None  # Same shape as JSON; reloaded on change
+PRESCALE_TIMEZONE = "UTC"       # Schedules are read in this zone
+PRESCALE_LEAD_MINUTES = 10      # A floor applies this long before its window opens
 
 # ─── In-memory state ──────────────────────────────────────────────────────────
 
 _last_scale_time: Optional[datetime] = None
 _last_scale_action: Optional[str] = None  # "up" or "down"
+_state_lock = threading.Lock()  # Cooldown check + record as one step
+_scale_history: Dict[str, deque] = {}  # "namespace/deployment" -> (time, "up"/"down"), oldest first
+_history_loaded = False  # Seeded from the audit log on first use
+_flapping: set = set()  # Deployments currently flapping (audited once per episode)
+_limits_file_cache: Dict[str, Any] = {"path": None, "mtime": None, "checked": 0.0, "limits": {}}
+_profiles_file_cache: Dict[str, Any] = {"path": None, "mtime": None, "checked": 0.0, "limits": {}}
+_parsed_profiles: Dict[tuple, List[Dict[str, Any]]] = {}  # (source, key) -> windows with parsed cron
+
+# Time source; replaced by the offline simulator's fake clock
+_clock: Callable[[], datetime] = datetime.now
 
 logger = logging.getLogger("claudescale.guardrails")
 
 
+# ─── Clock ────────────────────────────────────────────────────────────────────
+
+def set_clock(clock: Optional[Callable[[], datetime]] = None):
+    """
+    Replace the time source used by cooldowns and log timestamps.
+    Pass None to restore wall-clock time.
+    """
+    global _clock
+    _clock = clock or datetime.now
+
+
+def reset_state():
+    """Forget the last scaling action and the scale history (fresh cooldown state)."""
+    global _last_scale_time, _last_scale_action, _history_loaded
+    _last_scale_time = None
+    _last_scale_action = None
+    _scale_history.clear()
+    _flapping.clear()
+    _history_loaded = True  # Fresh means fresh: do not re-read the audit log
+
+
+# ─── Flap detection ───────────────────────────────────────────────────────────
+
+# Audit "action" values of executed changes, by direction
+_ACTION_DIRECTIONS = {
+    "scaled_up": "up",
+    "hpa_floor_raised": "up",
+    "scaled_down": "down",
+    "hpa_floor_lowered": "down",
+}
+
+
+def configure_adaptive_cooldown(
+    enabled: bool = True,
+    window_seconds: float = 1800,
+    min_reversals: int = 2,
+    max_multiplier: float = 4.0,
+    ramp_actions: int = 3,
+    ramp_factor: float = 0.5
+):
+    """
+    Set how cooldowns adapt to each deployment's recent scale history
+
+    Args:
+        enabled: False = fixed cooldowns
+        window_seconds: History considered per deployment
+        min_reversals: Up/down direction changes in the window that count
+            as flapping; cooldowns then double per reversal from there (up
+            to max_multiplier) and scale-down needs a lower CPU
+        max_multiplier: Largest cooldown factor while flapping
+        ramp_actions: Scale-ups in a row that count as a ramp
+        ramp_factor: Cooldown factor for the next scale-up along a ramp
+    """
+    global ADAPTIVE_COOLDOWN, FLAP_WINDOW_SECONDS, FLAP_MIN_REVERSALS
+    global FLAP_MAX_MULTIPLIER, RAMP_MIN_ACTIONS, RAMP_COOLDOWN_FACTOR
+    ADAPTIVE_COOLDOWN = enabled
+    FLAP_WINDOW_SECONDS = window_seconds
+    FLAP_MIN_REVERSALS = min_reversals
+    FLAP_MAX_MULTIPLIER = max_multiplier
+    RAMP_MIN_ACTIONS = ramp_actions
+    RAMP_COOLDOWN_FACTOR = ramp_factor
+
+
+def history_key(deployment: Optional[str], namespace: Optional[str]) -> str:
+    return f"{namespace or 'default'}/{deployment}"
+
+
+def _load_history():
+    """Seed the per-deployment history from the audit log, once, so it survives restarts."""
+    global _history_loaded
+    if _history_loaded:
+        return
+    _history_loaded = True
+    cutoff = _clock() - timedelta(seconds=FLAP_WINDOW_SECONDS)
+    for entry in get_recent_audit(HISTORY_AUDIT_LINES, events={"scale_executed", "hpa_tuned"}):
+        direction = _ACTION_DIRECTIONS.get(entry.get("action"))
+        try:
+            when = datetime.fromisoformat(entry["timestamp"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if direction is not None and when >= cutoff:
+            key = history_key(entry.get("deployment"), entry.get("namespace"))
+            _scale_history.setdefault(key, deque(maxlen=64)).append((when, direction))
+
+
+def flap_state(key: str, action: str) -> Dict[str, Any]:
+    """
+    Cooldown factor for the next `action` ("up"/"down") on a deployment
+
+    Flapping: at least FLAP_MIN_REVERSALS direction changes within
+    FLAP_WINDOW_SECONDS. Ramp: `action` is "up" and the last
+    RAMP_MIN_ACTIONS or more actions were all scale-ups (and it is not
+    flapping). Scale-downs never get a shorter cooldown: a run of them is
+    exactly when capacity should come off slowly.
+
+    Returns:
+        {"mode": "normal" | "flapping" | "ramp", "factor", "reversals",
+        "reason"}
+    """
+    _load_history()
+    history = _scale_history.get(key)
+    if history:
+        cutoff = _clock() - timedelta(seconds=FLAP_WINDOW_SECONDS)
+        while history and history[0][0] < cutoff:
+            history.popleft()
+    directions = [d for _, d in history or ()]
+    reversals = sum(1 for a, b in zip(directions, directions[1:]) if a != b)
+
+    if ADAPTIVE_COOLDOWN and reversals >= FLAP_MIN_REVERSALS:
+        factor = min(FLAP_MAX_MULTIPLIER, 2.0 ** (reversals - FLAP_MIN_REVERSALS + 1))
+        return {
+            "mode": "flapping",
+            "factor": factor,
+            "reversals": reversals,
+            "reason": (
+                f"{reversals} direction changes in the last {FLAP_WINDOW_SECONDS / 60:g} min "
+                f"({'/'.join(directions[-8:])}): cooldown x{factor:g}"
+            )
+        }
+
+    run = 0
+    for d in reversed(directions):
+        if d != action:
+            break
+        run += 1
+    if ADAPTIVE_COOLDOWN and action == "up" and run >= RAMP_MIN_ACTIONS:
+        return {
+            "mode": "ramp",
+            "factor": RAMP_COOLDOWN_FACTOR,
+            "reversals": reversals,
+            "reason": f"{run} scale-ups in a row: scale-up cooldown x{RAMP_COOLDOWN_FACTOR:g}"
+        }
+    return {"mode": "normal", "factor": 1.0, "reversals": reversals, "reason": None}
+
+
+def effective_cooldowns(key: str) -> Dict[str, Any]:
+    """Cooldowns that apply to a deployment's next scale-up and scale-down, and why."""
+    up, down = flap_state(key, "up"), flap_state(key, "down")
+    state = up if up["mode"] != "normal" else down
+    result = {
+        "scale_up_seconds": COOLDOWN_SECONDS * up["factor"],
+        "scale_down_seconds": SCALEDOWN_COOLDOWN_SECONDS * down["factor"],
+        "mode": state["mode"],
+        "reason": state["reason"]
+    }
+    if state["mode"] == "flapping":
+        result["scaledown_max_cpu_pct"] = SCALEDOWN_MAX_CPU_PCT * FLAP_SCALEDOWN_CPU_FACTOR
+    return result
+
+
 # ─── Cooldown ─────────────────────────────────────────────────────────────────
 
-def check_cooldown(action: str) -> Dict[str, Any]:
+def check_cooldown(action: str, key: Optional[str] = None, shared: bool = True) -> Dict[str, Any]:
     """
     Verify enough time has passed since last scaling operation.
 
     Scale-down has a longer cooldown than scale-up to prevent
-    the LLM from aggressively reducing replicas.
+    the LLM from aggressively reducing replicas. With a deployment key,
+    the cooldown is scaled by its flap state (see flap_state) and also
+    runs from that deployment's own last action.
+
+    Args:
+        action: "up" or "down"
+        key: history_key of the deployment
+        shared: Count the last action on any deployment (the shared
+            cooldown); False only looks at this deployment's own history
 
     Returns:
-        {"allowed": True} or {"allowed": False, "reason": ..., "retry_in_seconds": ...}
+        {"allowed": True} or {"allowed": False, "reason": ..., "retry_in_seconds": ...};
+        with a key, also "flap" (flap_state for this action)
     """
-    global _last_scale_time, _last_scale_action
-
-    if _last_scale_time is None:
-        return {"allowed": True}
-
-    elapsed = (datetime.now() - _last_scale_time).total_seconds()
-    required = SCALEDOWN_COOLDOWN_SECONDS if action == "down" else COOLDOWN_SECONDS
+    flap = flap_state(key, action) if key else {"mode": "normal", "factor": 1.0, "reason": None}
+    last = (_last_scale_time, _last_scale_action) if shared else (None, None)
+    history = _scale_history.get(key) if key else None
+    if history and (last[0] is None or history[-1][0] > last[0]):
+        last = history[-1]  # A scheduled pre-scale that skipped the shared cooldown
+    last_time, last_action = last
+    if last_time is None:
+        return {"allowed": True, "flap": flap}
+
+    elapsed = (_clock() - last_time).total_seconds()
+    base = SCALEDOWN_COOLDOWN_SECONDS if action == "down" else COOLDOWN_SECONDS
+    required = base * flap["factor"]
 
     if elapsed < required:
         remaining = int(required - elapsed)
+        GUARDRAIL_BLOCKS.inc("cooldown")
         return {
             "allowed": False,
             "reason": (
                 f"Cooldown active. Last scaling was {int(elapsed)}s ago. "
-                f"Minimum wait for scale-{action}: {required}s. "
-                f"Retry in {remaining}s."
+                f"Minimum wait for scale-{action}: {required:g}s"
+                + (f" ({flap['reason']})" if flap["reason"] else "")
+                + f". Retry in {remaining}s."
             ),
             "retry_in_seconds": remaining,
-            "last_action": _last_scale_action,
-            "last_action_time": _last_scale_time.isoformat()
+            "last_action": last_action,
+            "last_action_time": last_time.isoformat(),
+            "flap": flap
         }
 
-    return {"allowed": True}
+    return {"allowed": True, "flap": flap}
 
 
-def record_scale_action(action: str):
-    """Record that a scaling action just occurred."""
+def record_scale_action(action: str, key: Optional[str] = None, shared: bool = True) -> datetime:
+    """
+    Record that a scaling action just occurred: for the shared cooldown
+    (unless shared=False) and, with a key, in the deployment's history
+    """
     global _last_scale_time, _last_scale_action
-    _last_scale_time = datetime.now()
-    _last_scale_action = action
+    now = _clock()
+    if shared:
+        _last_scale_time, _last_scale_action = now, action
+    if key:
+        _scale_history.setdefault(key, deque(maxlen=64)).append((now, action))
+    return now
+
+
+def reserve_scale_action(action: str, key: Optional[str] = None, shared: bool = True) -> Dict[str, Any]:
+    """
+    Check the cooldown and, if allowed, record the action in the same step.
+
+    Recording before the Kubernetes call (instead of after it) closes the
+    window in which two concurrent requests both pass the cooldown. If the
+    action then does not happen, hand the result to release_scale_action.
+
+    Args:
+        action: "up" or "down"
+        key: history_key of the deployment, for flap-adaptive cooldowns
+        shared: False keeps the action out of the shared cooldown, so it
+            only waits for (and holds) its own deployment's cooldown; used
+            by scheduled pre-scaling, which needs a key
+
+    Returns:
+        check_cooldown's result plus "cooldown" (effective_cooldowns for
+        the deployment's next actions, for tool responses) and, while
+        flapping, the stricter "scaledown_max_cpu_pct" for this action;
+        when allowed it also carries the state needed to undo the
+        reservation
+    """
+    with _state_lock:
+        result = check_cooldown(action, key, shared)
+        flap = result.pop("flap")
+        if flap["mode"] == "flapping":
+            result["scaledown_max_cpu_pct"] = SCALEDOWN_MAX_CPU_PCT * FLAP_SCALEDOWN_CPU_FACTOR
+        if result["allowed"]:
+            result["previous"] = (_last_scale_time, _last_scale_action)
+            result["recorded_at"] = record_scale_action(action, key, shared)
+            result["shared"] = shared
+            result["key"] = key
+        if key:
+            result["cooldown"] = effective_cooldowns(key)
+            _note_flapping(key, result["cooldown"])
+        return result
+
+
+def _note_flapping(key: str, cooldown: Dict[str, Any]):
+    """Audit the start of each flapping episode (not every action in it)."""
+    if cooldown["mode"] != "flapping":
+        _flapping.discard(key)
+    elif key not in _flapping:
+        _flapping.add(key)
+        namespace, _, deployment = key.partition("/")
+        audit_log("flapping_detected", {"deployment": deployment, "namespace": namespace, **cooldown})
+
+
+def release_scale_action(reservation: Dict[str, Any]):
+    """Undo a reservation whose scaling was not carried out."""
+    global _last_scale_time, _last_scale_action
+    with _state_lock:
+        # Leave it alone if a later action has been recorded since
+        if (reservation.get("allowed") and reservation.get("shared", True)
+                and _last_scale_time == reservation["recorded_at"]):
+            _last_scale_time, _last_scale_action = reservation["previous"]
+        history = _scale_history.get(reservation.get("key"))
+        if reservation.get("allowed") and history:
+            for entry in history:
+                if entry[0] == reservation["recorded_at"]:
+                    history.remove(entry)
+                    break
 
 
 # ─── State snapshot (rollback support) ───────────────────────────────────────
@@ -82,7 +378,7 @@ def save_snapshot(state: Dict[str, Any]):
     Allows quick rollback if something goes wrong.
     """
     snapshot = {
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": _clock().isoformat(),
         "state": state,
         "rollback_instructions": (
             "To restore: use claudescale_scale_deployment with the "
@@ -90,7 +386,8 @@ def save_snapshot(state: Dict[str, Any]):
         )
     }
     try:
-        SNAPSHOT_PATH.write_text(json.dumps(snapshot, indent=2))
+        with span("guardrails.save_snapshot"):
+            SNAPSHOT_PATH.write_text(json.dumps(snapshot, indent=2))
         logger.info(f"Snapshot saved to {SNAPSHOT_PATH}")
     except Exception as e:
         logger.warning(f"Could not save snapshot: {e}")
@@ -114,26 +411,81 @@ def audit_log(event: str, details: Dict[str, Any]):
     Every scaling decision is recorded with full context.
     """
     entry = {
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": _clock().isoformat(),
         "event": event,
         **details
     }
+    AUDIT_EVENTS.inc(event)
+    start = time.perf_counter()
     try:
-        with AUDIT_LOG_PATH.open("a") as f:
+        with span("guardrails.audit_log", event=event), AUDIT_LOG_PATH.open("a") as f:
             f.write(json.dumps(entry) + "\n")
     except Exception as e:
         logger.warning(f"Could not write audit log: {e}")
-
-
-def get_recent_audit(lines: int = 20) -> list:
-    """Return the last N audit log entries."""
+    finally:
+        AUDIT_WRITE_DURATION.observe(time.perf_counter() - start)
+
+
+def _lines_newest_first(f, block_size: int = 65536):
+    """Yield the lines of a binary file from the last to the first."""
+    f.seek(0, os.SEEK_END)
+    position = f.tell()
+    partial = b""
+    while position > 0:
+        size = min(block_size, position)
+        position -= size
+        f.seek(position)
+        lines = (f.read(size) + partial).split(b"\n")
+        partial = lines.pop(0)
+        yield from reversed(lines)
+    yield partial
+
+
+def get_recent_audit(
+    lines: int = 20,
+    events: Optional[set] = None,
+    since: Optional[datetime] = None,
+    deployment: Optional[str] = None,
+    namespace: Optional[str] = None
+) -> list:
+    """
+    Return the last N audit log entries, oldest first
+
+    The log is read backwards and only as far as needed, so the filters
+    keep lookups cheap however long it grows.
+
+    Args:
+        lines: Entries to return at most
+        events: Only these event types
+        since: Only entries at or after this time
+        deployment: Only entries for this deployment
+        namespace: With deployment, only that namespace (entries without
+            one match any)
+    """
+    found = []
     try:
         if not AUDIT_LOG_PATH.exists():
             return []
-        entries = AUDIT_LOG_PATH.read_text().strip().splitlines()
-        return [json.loads(e) for e in entries[-lines:]]
+        with AUDIT_LOG_PATH.open("rb") as f:
+            for line in _lines_newest_first(f):
+                if len(found) >= lines:
+                    break
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if since is not None and datetime.fromisoformat(entry["timestamp"]) < since:
+                    break
+                if events is not None and entry.get("event") not in events:
+                    continue
+                if deployment is not None and (
+                    entry.get("deployment") != deployment
+                    or (namespace is not None and entry.get("namespace", namespace) != namespace)
+                ):
+                    continue
+                found.append(entry)
     except Exception:
         return []
+    return found[::-1]
 
 
 # ─── Scale-down guard ─────────────────────────────────────────────────────────
@@ -142,15 +494,21 @@ def validate_scaledown(
     current_replicas: int,
     desired_replicas: int,
     cpu_utilization_pct: Optional[float] = None,
-    reason: Optional[str] = None
+    reason: Optional[str] = None,
+    max_step: Optional[int] = None,
+    max_cpu_pct: Optional[float] = None,
+    floor: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
     """
     Extra safety checks before allowing scale-down.
 
     Rules:
     - Reason is mandatory for scale-down (LLM must justify)
-    - CPU must be below 40% to scale down (conservative threshold)
-    - Cannot reduce by more than 1 replica at a time
+    - CPU must be below max_cpu_pct (default SCALEDOWN_MAX_CPU_PCT, 40%;
+      lower while the deployment flaps) to scale down
+    - Cannot reduce by more than max_step replicas at a time
+      (default SCALEDOWN_MAX_STEP, i.e. 1)
+    - Cannot go below an active pre-scaling floor (see active_floor)
     """
     if desired_replicas >= current_replicas:
         return {"allowed": True}
@@ -165,25 +523,387 @@ def validate_scaledown(
         )
 
     # Rule 2: CPU must be low
-    if cpu_utilization_pct is not None and cpu_utilization_pct > 40:
+    max_cpu_pct = SCALEDOWN_MAX_CPU_PCT if max_cpu_pct is None else max_cpu_pct
+    if cpu_utilization_pct is not None and cpu_utilization_pct > max_cpu_pct:
         errors.append(
             f"Scale-down blocked: CPU is at {cpu_utilization_pct:.1f}%. "
-            f"Must be below 40% before scaling down."
+            f"Must be below {max_cpu_pct:g}% before scaling down"
+            + (" (stricter while the deployment is flapping)." if max_cpu_pct < SCALEDOWN_MAX_CPU_PCT else ".")
         )
 
-    # Rule 3: Max 1 replica reduction per action
+    # Rule 3: Max step per action
+    max_step = SCALEDOWN_MAX_STEP if max_step is None else max_step
     reduction = current_replicas - desired_replicas
-    if reduction > 1:
+    if reduction > max_step:
         errors.append(
             f"Scale-down blocked: Cannot reduce by {reduction} replicas at once. "
-            f"Maximum reduction per action is 1 replica. "
-            f"Target {current_replicas - 1} instead of {desired_replicas}."
+            f"Maximum reduction per action is {max_step} "
+            f"replica{'s' if max_step != 1 else ''}. "
+            f"Target {current_replicas - max_step} instead of {desired_replicas}."
+        )
+
+    # Rule 4: Scheduled floor
+    if floor and desired_replicas < floor["min_replicas"]:
+        errors.append(
+            f"Scale-down blocked: pre-scaling profile '{floor['profile']}' keeps at least "
+            f"{floor['min_replicas']} replicas until {floor['until']}."
         )
 
     if errors:
+        GUARDRAIL_BLOCKS.inc("scaledown_guard")
         return {
             "allowed": False,
             "reason": " | ".join(errors)
         }
 
     return {"allowed": True}
+
+
+# ─── Replica limits ───────────────────────────────────────────────────────────
+
+# Deployment annotations that override the configured defaults
+LIMIT_ANNOTATIONS = {
+    "claudescale.io/min-replicas": "min_replicas",
+    "claudescale.io/max-replicas": "max_replicas",
+    "claudescale.io/max-step-up": "max_step_up",
+    "claudescale.io/max-step-down": "max_step_down",
+}
+_LIMIT_FIELDS = set(LIMIT_ANNOTATIONS.values())
+
+
+def configure_replica_limits(
+    min_replicas: int = 2,
+    max_replicas: int = 5,
+    scaleup_max_step: int = 0,
+    scaledown_max_step: int = 1,
+    deployment_limits: Optional[Dict[str, Dict[str, int]]] = None,
+    limits_file: Optional[str] = None
+):
+    """
+    Set the replica limits every scaling path enforces
+
+    Args:
+        min_replicas: Default minimum replicas
+        max_replicas: Default maximum replicas
+        scaleup_max_step: Default most replicas added per action (0 = no limit)
+        scaledown_max_step: Default most replicas removed per action
+        deployment_limits: "namespace/name" or "name" -> {min_replicas,
+            max_replicas, max_step_up, max_step_down} (any subset)
+        limits_file: JSON file with the same shape, re-read when it changes
+            (e.g. a mounted ConfigMap)
+    """
+    global MIN_REPLICAS, MAX_REPLICAS, SCALEUP_MAX_STEP, SCALEDOWN_MAX_STEP
+    global DEPLOYMENT_LIMITS, DEPLOYMENT_LIMITS_FILE
+    MIN_REPLICAS = min_replicas
+    MAX_REPLICAS = max_replicas
+    SCALEUP_MAX_STEP = scaleup_max_step
+    SCALEDOWN_MAX_STEP = scaledown_max_step
+    DEPLOYMENT_LIMITS = dict(deployment_limits or {})
+    DEPLOYMENT_LIMITS_FILE = Path(limits_file) if limits_file else None
+    _limits_file_cache.update(path=None, mtime=None, checked=0.0, limits={})
+
+
+def _file_limits() -> Dict[str, Dict[str, int]]:
+    """Overrides from DEPLOYMENT_LIMITS_FILE; re-read only when its mtime changes."""
+    return _read_json_file(DEPLOYMENT_LIMITS_FILE, _limits_file_cache, "replica limits")
+
+
+def _read_json_file(path: Optional[Path], cache: Dict[str, Any], what: str) -> Dict[str, Any]:
+    """A JSON object from a config file, re-read only when its mtime changes; last good copy on errors."""
+    if path is None:
+        return {}
+    now = time.monotonic()
+    if cache["path"] == path and now - cache["checked"] < LIMITS_FILE_CHECK_SECONDS:
+        return cache["limits"]
+    cache["checked"] = now
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError as e:
+        if cache["path"] != path or cache["mtime"] is not None:
+            logger.warning(f"{what.capitalize()} file unavailable, keeping last known {what}: {e}")
+        cache.update(path=path, mtime=None)
+        return cache["limits"]
+    if cache["path"] != path or cache["mtime"] != mtime:
+        try:
+            limits = json.loads(Path(path).read_text())
+            if not isinstance(limits, dict):
+                raise ValueError("expected a JSON object")
+            cache["limits"] = limits
+            logger.info(f"Loaded {what} for {len(limits)} deployment(s) from {path}")
+        except Exception as e:
+            logger.warning(f"Invalid {what} file {path}, keeping last known {what}: {e}")
+        cache.update(path=path, mtime=mtime)
+    return cache["limits"]
+
+
+def _valid_overrides(values: Any, source: str) -> Dict[str, int]:
+    """Keep the known fields that are non-negative integers; log the rest."""
+    valid: Dict[str, int] = {}
+    for field, value in (values or {}).items():
+        try:
+            number = int(value)
+        except (TypeError, ValueError):
+            number = -1
+        if field not in _LIMIT_FIELDS or number < 0:
+            logger.warning(f"Ignoring replica limit {field}={value!r} from {source}")
+            continue
+        valid[field] = number
+    return valid
+
+
+def _tightened(overrides: Dict[str, int], source: str) -> Dict[str, int]:
+    """Clamp annotation limits so they can only narrow the global ones."""
+    bounded = dict(overrides)
+    for field in ("min_replicas", "max_replicas"):
+        if field in bounded:
+            bounded[field] = max(MIN_REPLICAS, min(MAX_REPLICAS, bounded[field]))
+    # 0 means unlimited for the step up, so it only tightens when non-zero
+    if "max_step_up" in bounded and SCALEUP_MAX_STEP and not 0 < bounded["max_step_up"] <= SCALEUP_MAX_STEP:
+        bounded["max_step_up"] = SCALEUP_MAX_STEP
+    if "max_step_down" in bounded:
+        bounded["max_step_down"] = min(bounded["max_step_down"], SCALEDOWN_MAX_STEP)
+    for field, value in bounded.items():
+        if value != overrides[field]:
+            logger.warning(
+                f"Replica limit {field}={overrides[field]} from {source} is outside the global "
+                f"limits; using {value}"
+            )
+    return bounded
+
+
+def resolve_replica_limits(
+    deployment: str,
+    namespace: str,
+    annotations: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    """
+    Effective replica bounds and step sizes for one deployment
+
+    Later sources override earlier ones, field by field:
+    defaults < deployment annotations < DEPLOYMENT_LIMITS < DEPLOYMENT_LIMITS_FILE
+    ("name" entries apply in every namespace, "namespace/name" ones win).
+    Operator config comes last so app owners cannot annotate their way
+    past it, and annotations are clamped to the global limits
+    (MIN_REPLICAS-MAX_REPLICAS, the step sizes) so they can only tighten.
+
+    Returns:
+        {"min_replicas", "max_replicas", "max_step_up", "max_step_down",
+        "sources"}; max_step_up 0 means no limit
+    """
+    limits: Dict[str, Any] = {
+        "min_replicas": MIN_REPLICAS,
+        "max_replicas": MAX_REPLICAS,
+        "max_step_up": SCALEUP_MAX_STEP,
+        "max_step_down": SCALEDOWN_MAX_STEP,
+    }
+    sources = ["defaults"]
+
+    layers = [(
+        "annotations",
+        {LIMIT_ANNOTATIONS[k]: v for k, v in (annotations or {}).items() if k in LIMIT_ANNOTATIONS}
+    )]
+    for source, table in (("config", DEPLOYMENT_LIMITS), ("file", _file_limits())):
+        for key in (deployment, f"{namespace}/{deployment}"):
+            layers.append((source, table.get(key)))
+
+    for source, values in layers:
+        overrides = _valid_overrides(values, f"{source} for {namespace}/{deployment}")
+        if source == "annotations":
+            overrides = _tightened(overrides, f"{source} for {namespace}/{deployment}")
+        if overrides:
+            limits.update(overrides)
+            if source not in sources:
+                sources.append(source)
+
+    if limits["min_replicas"] > limits["max_replicas"]:
+        logger.warning(
+            f"Replica limits for {namespace}/{deployment} have min > max "
+            f"({limits['min_replicas']} > {limits['max_replicas']}); using the defaults"
+        )
+        limits["min_replicas"], limits["max_replicas"] = MIN_REPLICAS, MAX_REPLICAS
+    limits["max_step_down"] = max(1, limits["max_step_down"])
+
+    limits["sources"] = sources
+    return limits
+
+
+def check_replica_limits(limits: Dict[str, Any], current_replicas: int, desired_replicas: int) -> Dict[str, Any]:
+    """
+    Validate a target replica count against resolved limits.
+
+    Covers the bounds and the scale-up step; the scale-down step is part
+    of validate_scaledown.
+    """
+    if desired_replicas < limits["min_replicas"]:
+        reason = (
+            f"Cannot scale below minimum of {limits['min_replicas']} replicas. "
+            f"ClaudeScale enforces minimum availability."
+        )
+    elif desired_replicas > limits["max_replicas"]:
+        reason = (
+            f"Cannot scale above maximum of {limits['max_replicas']} replicas. "
+            f"Limits come from MIN_REPLICAS/MAX_REPLICAS, DEPLOYMENT_LIMITS or "
+            f"claudescale.io/* deployment annotations."
+        )
+    elif limits["max_step_up"] and desired_replicas - current_replicas > limits["max_step_up"]:
+        reason = (
+            f"Cannot add {desired_replicas - current_replicas} replicas at once. "
+            f"Maximum increase per action is {limits['max_step_up']}. "
+            f"Target {current_replicas + limits['max_step_up']} instead of {desired_replicas}."
+        )
+    else:
+        return {"allowed": True}
+
+    GUARDRAIL_BLOCKS.inc("replica_limits")
+    return {"allowed": False, "reason": reason}
+
+
+# ─── Pre-scaling floors ───────────────────────────────────────────────────────
+
+def configure_prescale_profiles(
+    profiles: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+    profiles_file: Optional[str] = None,
+    timezone: str = "UTC",
+    lead_minutes: int = 10
+):
+    """
+    Set the scheduled replica floors
+
+    Args:
+        profiles: "namespace/name" or "name" -> list of windows
+            {"schedule": "<cron>", "duration_minutes", "min_replicas",
+            "name" (optional)}; a window opens whenever the cron
+            expression fires and stays open for duration_minutes
+        profiles_file: JSON file with the same shape, re-read when it
+            changes (entries override PRESCALE_PROFILES per deployment)
+        timezone: IANA zone the schedules are written in
+        lead_minutes: Apply each floor this many minutes before its
+            window opens, so pods are ready when traffic ramps
+
+    Raises:
+        ValueError: On an unknown timezone or an invalid window
+    """
+    global PRESCALE_PROFILES, PRESCALE_PROFILES_FILE, PRESCALE_TIMEZONE, PRESCALE_LEAD_MINUTES
+    try:
+        ZoneInfo(timezone)
+    except Exception:
+        raise ValueError(f"Unknown timezone '{timezone}'") from None
+    for key, windows in (profiles or {}).items():
+        if not isinstance(windows, list):
+            raise ValueError(f"Pre-scaling profile '{key}' must be a list of windows")
+        for window in windows:
+            _parse_window(window)
+    PRESCALE_PROFILES = dict(profiles or {})
+    PRESCALE_PROFILES_FILE = Path(profiles_file) if profiles_file else None
+    PRESCALE_TIMEZONE = timezone
+    PRESCALE_LEAD_MINUTES = lead_minutes
+    _profiles_file_cache.update(path=None, mtime=None, checked=0.0, limits={})
+
+
+def _parse_window(window: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        parsed = {
+            "name": window.get("name") or window["schedule"],
+            "cron": CronExpression(window["schedule"]),
+            "duration_minutes": int(window["duration_minutes"]),
+            "min_replicas": int(window["min_replicas"])
+        }
+    except KeyError as e:
+        raise ValueError(f"Pre-scaling window {window!r} is missing {e}") from None
+    except (AttributeError, TypeError) as e:
+        raise ValueError(f"Invalid pre-scaling window {window!r}: {e}") from None
+    if parsed["duration_minutes"] < 1 or parsed["min_replicas"] < 0:
+        raise ValueError(f"Pre-scaling window {window!r} needs duration_minutes >= 1 and min_replicas >= 0")
+    return parsed
+
+
+def _parsed_windows(source: str, key: str, windows: Any) -> List[Dict[str, Any]]:
+    """Parse (once per distinct definition) the valid windows of a profile; log the rest."""
+    cache_key = (source, key, json.dumps(windows, sort_keys=True, default=str))
+    if cache_key not in _parsed_profiles:
+        parsed = []
+        for window in windows if isinstance(windows, list) else [windows]:
+            try:
+                parsed.append(_parse_window(window))
+            except ValueError as e:
+                logger.warning(f"Ignoring pre-scaling window from {source} for {key}: {e}")
+        _parsed_profiles[cache_key] = parsed
+    return _parsed_profiles[cache_key]
+
+
+def prescale_profiles() -> Dict[str, tuple]:
+    """Profile key -> (source, windows), from PRESCALE_PROFILES then PRESCALE_PROFILES_FILE."""
+    profiles = {key: ("config", windows) for key, windows in PRESCALE_PROFILES.items()}
+    file_profiles = _read_json_file(PRESCALE_PROFILES_FILE, _profiles_file_cache, "pre-scaling profiles")
+    profiles.update((key, ("file", windows)) for key, windows in file_profiles.items())
+    return profiles
+
+
+def active_floor(deployment: str, namespace: str, now: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+    """
+    Highest scheduled floor in force for a deployment
+
+    A window counts from PRESCALE_LEAD_MINUTES before it opens until it
+    closes. A "namespace/name" profile replaces a "name" one.
+
+    Returns:
+        {"min_replicas", "profile", "opens", "until", "timezone"} or None
+    """
+    profiles = prescale_profiles()
+    key = f"{namespace}/{deployment}" if f"{namespace}/{deployment}" in profiles else deployment
+    if key not in profiles:
+        return None
+    source, windows = profiles[key]
+    tz = ZoneInfo(PRESCALE_TIMEZONE)
+    ahead = (now or _clock()).astimezone(tz) + timedelta(minutes=PRESCALE_LEAD_MINUTES)
+
+    best = None
+    for window in _parsed_windows(source, key, windows):
+        opens = window["cron"].last_fire(ahead, window["duration_minutes"] + PRESCALE_LEAD_MINUTES - 1)
+        if opens is None or (best is not None and window["min_replicas"] <= best["min_replicas"]):
+            continue
+        best = {
+            "min_replicas": window["min_replicas"],
+            "profile": window["name"],
+            "opens": opens.isoformat(),
+            "until": (opens + timedelta(minutes=window["duration_minutes"])).isoformat(),
+            "timezone": PRESCALE_TIMEZONE
+        }
+    return best
+
+
+# ─── Admission control ────────────────────────────────────────────────────────
+
+def admission_control(func: Callable) -> Callable:
+    """
+    Decorator for async MCP tools: take a token from the tool's rate
+    limit bucket before running it.
+
+    Tools in WRITE_TOOLS run at write priority: they queue ahead of reads,
+    are never shed for queue length, and the Kubernetes/Prometheus calls
+    they make inherit that priority. A call shed here or by a downstream
+    limit fails fast with a tool error carrying the retry-after; shed
+    writes are audited.
+    """
+    name = func.__name__
+    priority = PRIORITY_WRITE if name in WRITE_TOOLS else PRIORITY_READ
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        try:
+            await tool_bucket(name).acquire_async(priority)
+            with request_priority(priority):
+                return await func(*args, **kwargs)
+        except RateLimitExceeded as e:
+            logger.warning(str(e))
+            if priority == PRIORITY_WRITE:
+                audit_log("scale_blocked_rate_limit", {
+                    "tool": name,
+                    "limit": e.limit,
+                    "arguments": kwargs,
+                    "retry_after_seconds": round(e.retry_after_seconds, 2)
+                })
+            # A ToolError reaches the client as-is, without a logged traceback
+            from fastmcp.exceptions import ToolError
+            raise ToolError(str(e)) from e
+    return wrapper
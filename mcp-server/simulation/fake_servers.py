@@ -0,0 +1,599 @@
+#!/usr/bin/env python3
+"""
+Fake Kubernetes API and Prometheus HTTP servers for benchmarking
+
+Serve just enough of both APIs for every ClaudeScale tool to run against
+them unchanged through the real clients: deployments (list, list across
+namespaces, watch from a resourceVersion, read, patch scale), autoscaling/v2 HPAs (list, read, replace),
+pods by label selector (pods added by a scale-up start "now", so they are
+in warm-up) and across namespaces, nodes sized to the initial pods plus
+headroom (every pod requests 100m CPU / 128Mi), and Prometheus
+instant/range queries for the CPU, memory and network expressions the
+Prometheus client sends. Object counts and per-request latency are
+configurable so client and tool overhead can be measured at scale.
+
+Run standalone it prints the two base URLs as one JSON line and serves
+until killed (this is how scripts/benchmark-tools.py uses it):
+
+    python3 mcp-server/simulation/fake_servers.py --deployments 1000 --pods 10000 --k8s-latency-ms 5
+"""
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+CREATED = "2026-01-05T00:00:00Z"
+POD_RESOURCES = {"requests": {"cpu": "100m", "memory": "128Mi"}, "limits": {"cpu": "200m", "memory": "256Mi"}}
+
+
+class FakeCluster:
+    """
+    Deployments and their pods spread over one or more namespaces
+
+    The first namespace always contains "demo-app" (the tools' default
+    deployment); the others are named app-0001, app-0002, ... The first
+    `hpas` deployments get an autoscaling/v2 HPA like demo-app-hpa.yaml.
+    Nodes are sized so the initial pods use 1 / (1 + node_headroom) of
+    their allocatable CPU, memory and pod slots.
+    """
+
+    def __init__(
+        self,
+        deployments: int = 20,
+        pods: int = 60,
+        namespaces: int = 1,
+        base_namespace: str = "claudescale",
+        nodes: int = 3,
+        hpas: int = 0,
+        node_headroom: float = 0.5
+    ):
+        self.nodes = [f"node-{i}" for i in range(max(1, nodes))]
+        self.namespaces = [base_namespace] + [f"{base_namespace}-{i}" for i in range(1, namespaces)]
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)  # Wakes deployment watches
+        self._version = 1
+        # (namespace, name) -> {"replicas", "resource_version"}
+        self._deployments: Dict[Tuple[str, str], Dict] = {}
+        # (namespace, pod name) -> start time, for pods added by a scale-up
+        self._started: Dict[Tuple[str, str], str] = {}
+        # namespace -> encoded list body, rebuilt after a scale
+        self._list_cache: Dict[Optional[str], Tuple[int, bytes]] = {}
+
+        per_deployment, extra = divmod(max(pods, deployments), max(1, deployments))
+        for i in range(deployments):
+            ns = self.namespaces[i % len(self.namespaces)]
+            name = "demo-app" if i == 0 else f"app-{i:04d}"
+            self._deployments[(ns, name)] = {
+                "replicas": per_deployment + (1 if i < extra else 0),
+                "resource_version": 1
+            }
+
+        # Pods each node has room for (all pods request the same)
+        per_node = math.ceil(sum(d["replicas"] for d in self._deployments.values()) / len(self.nodes))
+        self.node_pod_capacity = max(1, math.ceil(per_node * (1 + node_headroom)))
+
+        # (namespace, hpa name) -> {"target", "min", "max", "cpu", "resource_version"}
+        self._hpas: Dict[Tuple[str, str], Dict] = {}
+        for ns, name in list(self._deployments)[:hpas]:
+            self._hpas[(ns, f"{name}-hpa")] = {
+                "target": name, "min": 2, "max": 5, "cpu": 50, "resource_version": 1
+            }
+
+    # ─── Object builders ──────────────────────────────────────────────────
+
+    def _deployment(self, ns: str, name: str, d: Dict) -> Dict:
+        labels = {"app": name}
+        return {
+            "apiVersion": "apps/v1",
+            "kind": "Deployment",
+            "metadata": {
+                "name": name,
+                "namespace": ns,
+                "labels": labels,
+                "resourceVersion": str(d["resource_version"]),
+                "creationTimestamp": CREATED
+            },
+            "spec": {
+                "replicas": d["replicas"],
+                "selector": {"matchLabels": labels},
+                "template": {
+                    "metadata": {"labels": labels},
+                    "spec": {"containers": [{"name": "app", "image": "nginx:alpine", "resources": POD_RESOURCES}]}
+                }
+            },
+            "status": {
+                "replicas": d["replicas"],
+                "readyReplicas": d["replicas"],
+                "availableReplicas": d["replicas"],
+                "updatedReplicas": d["replicas"]
+            }
+        }
+
+    def pod_names(self, ns: str, name: str) -> List[str]:
+        d = self._deployments.get((ns, name))
+        if d is None:
+            return []
+        suffix = f"{zlib.crc32(name.encode()) & 0xffffff:06x}"
+        return [f"{name}-{suffix}-{i:04d}" for i in range(d["replicas"])]
+
+    def _pod(self, ns: str, deployment: str, pod_name: str, i: int) -> Dict:
+        started = self._started.get((ns, pod_name), CREATED)
+        return {
+            "apiVersion": "v1",
+            "kind": "Pod",
+            "metadata": {
+                "name": pod_name,
+                "namespace": ns,
+                "labels": {"app": deployment},
+                "creationTimestamp": CREATED
+            },
+            "spec": {
+                "nodeName": self.nodes[i % len(self.nodes)],
+                "containers": [{"name": "app", "image": "nginx:alpine", "resources": POD_RESOURCES}]
+            },
+            "status": {
+                "phase": "Running",
+                "podIP": f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}",
+                "startTime": started,
+                "conditions": [{"type": "Ready", "status": "True", "lastTransitionTime": started}],
+                "containerStatuses": [{
+                    "name": "app",
+                    "image": "nginx:alpine",
+                    "imageID": "docker-pullable://nginx@sha256:0",
+                    "ready": True,
+                    "restartCount": 0
+                }]
+            }
+        }
+
+    # ─── API operations ───────────────────────────────────────────────────
+
+    def list_deployments(self, ns: Optional[str]) -> bytes:
+        """Encoded DeploymentList for one namespace (None = all)."""
+        with self._lock:
+            cached = self._list_cache.get(ns)
+            if cached and cached[0] == self._version:
+                return cached[1]
+            items = [
+                self._deployment(d_ns, name, d)
+                for (d_ns, name), d in self._deployments.items()
+                if ns is None or d_ns == ns
+            ]
+            body = json.dumps({
+                "apiVersion": "apps/v1",
+                "kind": "DeploymentList",
+                "metadata": {"resourceVersion": str(self._version)},
+                "items": items
+            }).encode()
+            self._list_cache[ns] = (self._version, body)
+            return body
+
+    def watch_deployments(self, ns: Optional[str], resource_version: str, timeout_seconds: float) -> bytes:
+        """
+        Watch body: one MODIFIED event per deployment changed after
+        resource_version, sent once there is at least one (or empty on timeout)
+        """
+        since = int(resource_version or 0)
+        deadline = time.monotonic() + timeout_seconds
+        with self._changed:
+            while True:
+                changed = [
+                    (d_ns, name, d) for (d_ns, name), d in self._deployments.items()
+                    if (ns is None or d_ns == ns) and d["resource_version"] > since
+                ]
+                remaining = deadline - time.monotonic()
+                if changed or remaining <= 0:
+                    break
+                self._changed.wait(remaining)
+            return b"".join(
+                json.dumps({"type": "MODIFIED", "object": self._deployment(d_ns, name, d)}).encode() + b"\n"
+                for d_ns, name, d in changed
+            )
+
+    def get_deployment(self, ns: str, name: str) -> Optional[Dict]:
+        with self._lock:
+            d = self._deployments.get((ns, name))
+            return self._deployment(ns, name, d) if d else None
+
+    def scale(self, ns: str, name: str, replicas: int, resource_version: Optional[str] = None) -> Optional[Dict]:
+        """Apply a scale; returns None if missing, a 409 Status if resource_version is stale."""
+        with self._lock:
+            d = self._deployments.get((ns, name))
+            if d is None:
+                return None
+            if resource_version is not None and resource_version != str(d["resource_version"]):
+                return {
+                    "kind": "Status", "apiVersion": "v1", "status": "Failure", "reason": "Conflict", "code": 409,
+                    "message": f'Operation cannot be fulfilled on deployments.apps "{name}": '
+                               f'the object has been modified; please apply your changes to the latest version'
+                }
+            self._version += 1
+            previous = set(self.pod_names(ns, name))
+            d["replicas"] = replicas
+            d["resource_version"] = self._version
+            now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+            for pod_name in set(self.pod_names(ns, name)) - previous:
+                self._started[(ns, pod_name)] = now
+            self._changed.notify_all()
+            return {
+                "apiVersion": "autoscaling/v1",
+                "kind": "Scale",
+                "metadata": {"name": name, "namespace": ns, "resourceVersion": str(self._version)},
+                "spec": {"replicas": replicas},
+                "status": {"replicas": replicas, "selector": f"app={name}"}
+            }
+
+    def _hpa(self, ns: str, name: str, h: Dict) -> Dict:
+        replicas = self._deployments[(ns, h["target"])]["replicas"]
+        return {
+            "apiVersion": "autoscaling/v2",
+            "kind": "HorizontalPodAutoscaler",
+            "metadata": {
+                "name": name,
+                "namespace": ns,
+                "resourceVersion": str(h["resource_version"]),
+                "creationTimestamp": CREATED
+            },
+            "spec": {
+                "scaleTargetRef": {"apiVersion": "apps/v1", "kind": "Deployment", "name": h["target"]},
+                "minReplicas": h["min"],
+                "maxReplicas": h["max"],
+                "metrics": [{
+                    "type": "Resource",
+                    "resource": {"name": "cpu", "target": {"type": "Utilization", "averageUtilization": h["cpu"]}}
+                }]
+            },
+            "status": {
+                "currentReplicas": replicas,
+                "desiredReplicas": min(max(replicas, h["min"]), h["max"]),
+                "currentMetrics": [{
+                    "type": "Resource",
+                    "resource": {"name": "cpu", "current": {"averageUtilization": 35, "averageValue": "70m"}}
+                }],
+                "conditions": [{
+                    "type": "AbleToScale", "status": "True", "reason": "ReadyForNewScale",
+                    "lastTransitionTime": CREATED
+                }]
+            }
+        }
+
+    def list_hpas(self, ns: Optional[str]) -> Dict:
+        with self._lock:
+            items = [self._hpa(h_ns, name, h) for (h_ns, name), h in self._hpas.items() if ns is None or h_ns == ns]
+        return {
+            "apiVersion": "autoscaling/v2",
+            "kind": "HorizontalPodAutoscalerList",
+            "metadata": {"resourceVersion": str(self._version)},
+            "items": items
+        }
+
+    def get_hpa(self, ns: str, name: str) -> Optional[Dict]:
+        with self._lock:
+            h = self._hpas.get((ns, name))
+            return self._hpa(ns, name, h) if h else None
+
+    def replace_hpa(self, ns: str, name: str, body: Dict) -> Optional[Dict]:
+        """Store a replaced HPA spec; 409 Status if its resourceVersion is stale."""
+        with self._lock:
+            h = self._hpas.get((ns, name))
+            if h is None:
+                return None
+            if body.get("metadata", {}).get("resourceVersion") not in (None, str(h["resource_version"])):
+                return {
+                    "kind": "Status", "apiVersion": "v1", "status": "Failure", "reason": "Conflict", "code": 409,
+                    "message": f'Operation cannot be fulfilled on horizontalpodautoscalers.autoscaling "{name}"'
+                }
+            spec = body["spec"]
+            h["min"], h["max"] = spec.get("minReplicas", 1), spec["maxReplicas"]
+            for m in spec.get("metrics", []):
+                if m.get("type") == "Resource" and m["resource"]["name"] == "cpu":
+                    h["cpu"] = m["resource"]["target"].get("averageUtilization", h["cpu"])
+            self._version += 1
+            h["resource_version"] = self._version
+            return self._hpa(ns, name, h)
+
+    def list_pods(self, ns: str, label_selector: str) -> Dict:
+        labels = dict(part.split("=", 1) for part in label_selector.split(",") if "=" in part)
+        deployment = labels.get("app")
+        with self._lock:
+            names = self.pod_names(ns, deployment) if deployment else []
+        return {
+            "apiVersion": "v1",
+            "kind": "PodList",
+            "metadata": {"resourceVersion": str(self._version)},
+            "items": [self._pod(ns, deployment, p, i) for i, p in enumerate(names)]
+        }
+
+    def list_all_pods(self) -> Dict:
+        with self._lock:
+            items = [
+                self._pod(ns, name, p, i)
+                for (ns, name) in self._deployments
+                for i, p in enumerate(self.pod_names(ns, name))
+            ]
+        return {"apiVersion": "v1", "kind": "PodList", "metadata": {"resourceVersion": str(self._version)}, "items": items}
+
+    def list_nodes(self) -> Dict:
+        n = self.node_pod_capacity
+        allocatable = {"cpu": f"{n * 100}m", "memory": f"{n * 128}Mi", "pods": str(n)}
+        return {
+            "apiVersion": "v1",
+            "kind": "NodeList",
+            "metadata": {"resourceVersion": str(self._version)},
+            "items": [{
+                "apiVersion": "v1",
+                "kind": "Node",
+                "metadata": {"name": node, "labels": {"kubernetes.io/hostname": node}, "creationTimestamp": CREATED},
+                "spec": {},
+                "status": {
+                    "allocatable": allocatable,
+                    "capacity": allocatable,
+                    "conditions": [{"type": "Ready", "status": "True"}]
+                }
+            } for node in self.nodes]
+        }
+
+    def matching_pods(self, ns: str, pod_regex: str) -> List[str]:
+        """Pods whose name matches a PromQL pod=~ regex ("demo-app.*" fast path)."""
+        with self._lock:
+            if pod_regex.endswith(".*") and (ns, pod_regex[:-2]) in self._deployments:
+                return self.pod_names(ns, pod_regex[:-2])
+            pattern = re.compile(pod_regex)
+            return [
+                p for (d_ns, name) in self._deployments if d_ns == ns
+                for p in self.pod_names(d_ns, name) if pattern.fullmatch(p)
+            ]
+
+
+# ─── Prometheus value model ───────────────────────────────────────────────────
+
+_NAMESPACE_RE = re.compile(r'namespace="([^"]*)"')
+_POD_RE = re.compile(r'pod=~"([^"]*)"')
+
+
+def _sample(metric: str, pod: str, t: float) -> float:
+    """Deterministic per-pod value that drifts slowly over time."""
+    rng = random.Random(f"{pod}:{metric}:{int(t // 60)}")
+    if metric == "cpu":
+        return rng.uniform(0.02, 0.18)
+    if metric == "memory":
+        return rng.uniform(8, 64) * 1024 * 1024
+    return rng.uniform(1e3, 5e4)
+
+
+def _metric_kind(query: str) -> str:
+    if "cpu" in query:
+        return "cpu"
+    if "memory" in query:
+        return "memory"
+    return "network"
+
+
+def prometheus_result(cluster: FakeCluster, query: str, times: List[float]) -> List[Dict]:
+    """Series for a query: one per matching pod, or one total for sum(...)."""
+    ns_match, pod_match = _NAMESPACE_RE.search(query), _POD_RE.search(query)
+    if not ns_match or not pod_match:
+        return []
+    pods = cluster.matching_pods(ns_match.group(1), pod_match.group(1))
+    kind = _metric_kind(query)
+
+    if query.lstrip().startswith("sum("):
+        series = [({}, [sum(_sample(kind, p, t) for p in pods) for t in times])] if pods else []
+    else:
+        series = [({"namespace": ns_match.group(1), "pod": p}, [_sample(kind, p, t) for t in times]) for p in pods]
+    return [{"metric": labels, "values": [[t, str(v)] for t, v in zip(times, values)]}
+            for labels, values in series]
+
+
+# ─── HTTP servers ─────────────────────────────────────────────────────────────
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, as the real API servers do
+    disable_nagle_algorithm = True  # Headers and body go out as separate writes
+    cluster: FakeCluster = None
+    latency_s = 0.0
+    jitter_s = 0.0
+
+    def _delay(self):
+        if self.latency_s or self.jitter_s:
+            time.sleep(self.latency_s + random.uniform(0, self.jitter_s))
+
+    def _send(self, status: int, body):
+        data = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _not_found(self, what: str):
+        self._send(404, {
+            "kind": "Status", "apiVersion": "v1", "status": "Failure",
+            "message": f"{what} not found", "reason": "NotFound", "code": 404
+        })
+
+    def log_message(self, *args):
+        pass
+
+
+class _KubernetesHandler(_Handler):
+    def do_GET(self):
+        self._delay()
+        url = urlparse(self.path)
+        parts = url.path.strip("/").split("/")
+        query = parse_qs(url.query)
+
+        watch = query.get("watch", [""])[0] in ("true", "1")
+        if watch and parts[-1] == "deployments":
+            return self._send(200, self.cluster.watch_deployments(
+                parts[4] if len(parts) == 6 else None,
+                query.get("resourceVersion", ["0"])[0],
+                float(query.get("timeoutSeconds", ["30"])[0])
+            ))
+        if parts == ["apis", "apps", "v1", "deployments"]:
+            return self._send(200, self.cluster.list_deployments(None))
+        if parts[:4] == ["apis", "apps", "v1", "namespaces"] and len(parts) >= 6 and parts[5] == "deployments":
+            if len(parts) == 6:
+                return self._send(200, self.cluster.list_deployments(parts[4]))
+            dep = self.cluster.get_deployment(parts[4], parts[6])
+            return self._send(200, dep) if dep else self._not_found(f'deployments.apps "{parts[6]}"')
+        if parts == ["apis", "autoscaling", "v2", "horizontalpodautoscalers"]:
+            return self._send(200, self.cluster.list_hpas(None))
+        if parts[:4] == ["apis", "autoscaling", "v2", "namespaces"] and len(parts) >= 6:
+            if len(parts) == 6:
+                return self._send(200, self.cluster.list_hpas(parts[4]))
+            hpa = self.cluster.get_hpa(parts[4], parts[6])
+            return self._send(200, hpa) if hpa else self._not_found(f'horizontalpodautoscalers "{parts[6]}"')
+        if parts == ["api", "v1", "nodes"]:
+            return self._send(200, self.cluster.list_nodes())
+        if parts == ["api", "v1", "pods"]:
+            return self._send(200, self.cluster.list_all_pods())
+        if parts[:3] == ["api", "v1", "namespaces"] and len(parts) == 5 and parts[4] == "pods":
+            return self._send(200, self.cluster.list_pods(parts[3], query.get("labelSelector", [""])[0]))
+        self._not_found(url.path)
+
+    def do_PUT(self):
+        self._delay()
+        parts = urlparse(self.path).path.strip("/").split("/")
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if parts[:4] == ["apis", "autoscaling", "v2", "namespaces"] and len(parts) == 7:
+            hpa = self.cluster.replace_hpa(parts[4], parts[6], body)
+            if hpa is None:
+                return self._not_found(f'horizontalpodautoscalers "{parts[6]}"')
+            return self._send(hpa.get("code", 200), hpa)
+        self._not_found(self.path)
+
+    def do_PATCH(self):
+        self._delay()
+        parts = urlparse(self.path).path.strip("/").split("/")
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if parts[:4] == ["apis", "apps", "v1", "namespaces"] and len(parts) == 8 and parts[7] == "scale":
+            scale = self.cluster.scale(
+                parts[4], parts[6], int(body["spec"]["replicas"]),
+                body.get("metadata", {}).get("resourceVersion")
+            )
+            if scale is None:
+                return self._not_found(f'deployments.apps "{parts[6]}"')
+            return self._send(scale.get("code", 200), scale)
+        self._not_found(self.path)
+
+
+class _PrometheusHandler(_Handler):
+    def do_GET(self):
+        self._delay()
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+        if url.path == "/api/v1/query":
+            now = time.time()
+            result = [
+                {"metric": s["metric"], "value": s["values"][0]}
+                for s in prometheus_result(self.cluster, query.get("query", ""), [now])
+            ]
+            return self._send(200, {"status": "success", "data": {"resultType": "vector", "result": result}})
+        if url.path == "/api/v1/query_range":
+            start, end = float(query["start"]), float(query["end"])
+            step = query.get("step", "15")
+            step_s = float(step[:-1]) * {"s": 1, "m": 60, "h": 3600}[step[-1]] if step[-1] in "smh" else float(step)
+            times = [start + i * step_s for i in range(int((end - start) / step_s) + 1)]
+            result = prometheus_result(self.cluster, query.get("query", ""), times)
+            return self._send(200, {"status": "success", "data": {"resultType": "matrix", "result": result}})
+        self._send(404, {"status": "error", "errorType": "not_found", "error": url.path})
+
+
+def _serve(handler: type, cluster: FakeCluster, host: str, port: int,
+           latency_ms: float, jitter_ms: float) -> ThreadingHTTPServer:
+    handler_cls = type(handler.__name__, (handler,), {
+        "cluster": cluster,
+        "latency_s": latency_ms / 1000,
+        "jitter_s": jitter_ms / 1000
+    })
+    httpd = ThreadingHTTPServer((host, port), handler_cls)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+def start_fake_servers(
+    cluster: FakeCluster,
+    host: str = "127.0.0.1",
+    k8s_port: int = 0,
+    prom_port: int = 0,
+    k8s_latency_ms: float = 0.0,
+    prom_latency_ms: float = 0.0,
+    jitter_ms: float = 0.0
+) -> Dict[str, str]:
+    """
+    Start both fake servers on daemon threads
+
+    Args:
+        cluster: Objects to serve
+        host: Bind address
+        k8s_port: Kubernetes API port (0 = any free port)
+        prom_port: Prometheus port (0 = any free port)
+        k8s_latency_ms: Added delay per Kubernetes request
+        prom_latency_ms: Added delay per Prometheus request
+        jitter_ms: Extra uniformly random delay per request
+
+    Returns:
+        {"kubernetes": base URL, "prometheus": base URL}
+    """
+    k8s = _serve(_KubernetesHandler, cluster, host, k8s_port, k8s_latency_ms, jitter_ms)
+    prom = _serve(_PrometheusHandler, cluster, host, prom_port, prom_latency_ms, jitter_ms)
+    return {
+        "kubernetes": f"http://{host}:{k8s.server_address[1]}",
+        "prometheus": f"http://{host}:{prom.server_address[1]}"
+    }
+
+
+def write_kubeconfig(path: str, server_url: str):
+    """Write a kubeconfig whose current context points at server_url."""
+    config = {
+        "apiVersion": "v1",
+        "kind": "Config",
+        "clusters": [{"name": "fake", "cluster": {"server": server_url}}],
+        "users": [{"name": "fake", "user": {"token": "fake-token"}}],
+        "contexts": [{"name": "fake", "context": {"cluster": "fake", "user": "fake"}}],
+        "current-context": "fake"
+    }
+    with open(path, "w") as f:
+        json.dump(config, f)  # JSON is valid kubeconfig YAML
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--deployments", type=int, default=20)
+    parser.add_argument("--pods", type=int, default=60, help="Total pods across all deployments")
+    parser.add_argument("--namespaces", type=int, default=1)
+    parser.add_argument("--nodes", type=int, default=3)
+    parser.add_argument("--hpas", type=int, default=0, help="Deployments (first N) with an HPA")
+    parser.add_argument("--node-headroom", type=float, default=0.5,
+                        help="Free node capacity, as a fraction of the initial pods' requests")
+    parser.add_argument("--k8s-latency-ms", type=float, default=0.0)
+    parser.add_argument("--prom-latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--k8s-port", type=int, default=0)
+    parser.add_argument("--prom-port", type=int, default=0)
+    args = parser.parse_args()
+
+    urls = start_fake_servers(
+        FakeCluster(args.deployments, args.pods, args.namespaces, nodes=args.nodes, hpas=args.hpas,
+                    node_headroom=args.node_headroom),
+        host=args.host,
+        k8s_port=args.k8s_port,
+        prom_port=args.prom_port,
+        k8s_latency_ms=args.k8s_latency_ms,
+        prom_latency_ms=args.prom_latency_ms,
+        jitter_ms=args.jitter_ms
+    )
+    print(json.dumps(urls), flush=True)
+    threading.Event().wait()
@@ -0,0 +1,76 @@
+"""
+In-memory stand-ins for the offline policy simulator
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from utils.kubernetes_client import ScaleConflictError
+
+
+class FakeClock:
+    """
+    Manually advanced clock, installed with guardrails.set_clock()
+    """
+
+    def __init__(self, start: datetime):
+        self.now = start
+
+    def __call__(self) -> datetime:
+        return self.now
+
+    def set(self, when: datetime):
+        """Jump to an absolute time."""
+        self.now = when
+
+    def advance(self, seconds: float):
+        """Move forward by a number of seconds."""
+        self.now += timedelta(seconds=seconds)
+
+
+class FakeKubernetesClient:
+    """
+    Replica bookkeeping with the KubernetesClient methods that
+    scale_deployment uses; every pod is instantly ready
+    """
+
+    def __init__(self, replicas: Dict[str, int], namespace: str = "claudescale"):
+        """
+        Args:
+            replicas: Initial replica count per deployment name
+            namespace: Namespace reported for every deployment
+        """
+        self.namespace = namespace
+        self.replicas = dict(replicas)
+        self.versions = {name: 1 for name in replicas}
+
+    def get_deployment(self, name: str, namespace: Optional[str] = None) -> Optional[Dict]:
+        if name not in self.replicas:
+            return None
+        r = self.replicas[name]
+        return {
+            "name": name,
+            "namespace": namespace or self.namespace,
+            "replicas": r,
+            "ready_replicas": r,
+            "available_replicas": r,
+            "updated_replicas": r,
+            "resource_version": str(self.versions[name]),
+            "annotations": {}
+        }
+
+    def get_hpa_for_deployment(self, name: str, namespace: Optional[str] = None) -> Optional[Dict]:
+        # Replays model the policy patching replicas directly
+        return None
+
+    def scale_deployment(
+        self,
+        name: str,
+        replicas: int,
+        namespace: Optional[str] = None,
+        resource_version: Optional[str] = None
+    ) -> Dict:
+        if resource_version is not None and resource_version != str(self.versions[name]):
+            raise ScaleConflictError(f"Deployment '{name}' changed since resourceVersion {resource_version}")
+        self.replicas[name] = replicas
+        self.versions[name] += 1
+        return self.get_deployment(name, namespace)
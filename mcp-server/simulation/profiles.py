@@ -0,0 +1,119 @@
+"""
+Learn pre-scaling floor profiles from recorded CPU demand
+
+Each sample's demand is turned into the replicas needed to stay at the
+target utilization. Samples are grouped by (weekday, hour) in the
+profile's timezone, and a high quantile of each group becomes that hour's
+floor. Hours that need more than the baseline become windows. Runs of
+hours with the same floor are merged, as are identical hour runs across
+weekdays, so a typical week comes out as a handful of cron windows in the
+shape PRESCALE_PROFILES expects.
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from tools import scaling_tools
+from simulation.replay import DemandSeries
+
+# cron day-of-week numbers for Python's Monday=0 weekdays
+_CRON_WEEKDAY = (1, 2, 3, 4, 5, 6, 0)
+
+
+def hourly_floors(
+    series: DemandSeries,
+    tz: str = "UTC",
+    target_pct: float = 60.0,
+    quantile: float = 0.9
+) -> np.ndarray:
+    """
+    Replicas needed per (weekday, hour)
+
+    Returns:
+        7x24 int array (Monday first); 0 where the series has no samples
+    """
+    per_pod = scaling_tools.CPU_LIMIT_CORES * target_pct / 100
+    needed = np.ceil(series.cores / per_pod)
+
+    # Map every sample to its hour, converting one timestamp per hour
+    # (not per sample) so DST changes are still exact
+    start_ts = series.start.timestamp()
+    hour_index = (np.arange(len(series.cores)) * series.step_seconds // 3600).astype(np.int64)
+    zone = ZoneInfo(tz)
+    slot_of_hour = np.empty(int(hour_index[-1]) + 1 if len(hour_index) else 0, dtype=np.int64)
+    for h in range(len(slot_of_hour)):
+        local = datetime.fromtimestamp(start_ts + h * 3600, timezone.utc).astimezone(zone)
+        slot_of_hour[h] = local.weekday() * 24 + local.hour
+    slots = slot_of_hour[hour_index]
+
+    floors = np.zeros(7 * 24, dtype=np.int64)
+    order = np.argsort(slots, kind="stable")
+    bounds = np.searchsorted(slots[order], np.arange(7 * 24 + 1))
+    for slot in range(7 * 24):
+        group = needed[order[bounds[slot]:bounds[slot + 1]]]
+        if len(group):
+            floors[slot] = int(np.quantile(group, quantile))
+    return floors.reshape(7, 24)
+
+
+def learn_profile(
+    series: DemandSeries,
+    tz: str = "UTC",
+    target_pct: float = 60.0,
+    quantile: float = 0.9,
+    baseline_replicas: int = 2,
+    max_replicas: int = 0
+) -> List[Dict[str, Any]]:
+    """
+    Pre-scaling windows for one deployment
+
+    Args:
+        series: Total CPU demand (e.g. load_from_prometheus)
+        tz: Timezone the windows are written in (PRESCALE_TIMEZONE)
+        target_pct: Per-pod CPU utilization the floor is sized for
+        quantile: Demand quantile per (weekday, hour) to cover
+        baseline_replicas: Hours needing no more than this get no window
+        max_replicas: Cap on any floor (0 = no cap)
+
+    Returns:
+        List of {"name", "schedule", "duration_minutes", "min_replicas"}
+    """
+    floors = hourly_floors(series, tz, target_pct, quantile)
+    if max_replicas:
+        floors = np.minimum(floors, max_replicas)
+
+    # Runs of equal floors per weekday: (start hour, hours, floor) -> weekdays
+    runs: Dict[tuple, List[int]] = {}
+    for weekday in range(7):
+        hour = 0
+        while hour < 24:
+            floor = int(floors[weekday, hour])
+            length = 1
+            while hour + length < 24 and floors[weekday, hour + length] == floor:
+                length += 1
+            if floor > baseline_replicas:
+                runs.setdefault((hour, length, floor), []).append(weekday)
+            hour += length
+
+    windows = []
+    for (hour, length, floor), weekdays in sorted(runs.items(), key=lambda r: (r[1][0], r[0])):
+        days = ",".join(str(_CRON_WEEKDAY[d]) for d in weekdays)
+        windows.append({
+            "name": f"learned {hour:02d}:00-{(hour + length) % 24:02d}:00 x{floor}",
+            "schedule": f"0 {hour} * * {days}",
+            "duration_minutes": length * 60,
+            "min_replicas": floor
+        })
+    return windows
+
+
+def summarize(windows: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Window hours per week and the pod-hours per week the floors hold."""
+    hours = pod_hours = 0.0
+    for w in windows:
+        days = len(w["schedule"].split()[4].split(","))
+        hours += w["duration_minutes"] / 60 * days
+        pod_hours += w["min_replicas"] * w["duration_minutes"] / 60 * days
+    return {"window_hours_per_week": round(hours, 1), "floor_pod_hours_per_week": round(pod_hours, 1)}
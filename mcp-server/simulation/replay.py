@@ -0,0 +1,351 @@
+"""
+Offline replay of the scaling policy over recorded or synthetic CPU demand
+
+A demand series (total CPU cores the deployment needs at each step) is
+fed through the same analysis thresholds as get_metrics and through the
+real scale_deployment tool, so cooldowns, the scale-down guard and replica
+limits run unchanged against a fake clock and a fake Kubernetes client.
+
+Between scaling actions the replica count is constant, so per-pod
+utilization for the rest of the series is one numpy division and the next
+step where the policy fires is found with one vectorized search. The loop
+runs once per scaling attempt, not once per sample, which is what lets
+weeks of 15s data replay in well under a second.
+"""
+import asyncio
+import csv
+import math
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+import guardrails
+from tools import scaling_tools
+from utils.prometheus_client import cpu_usage_query
+from simulation.fakes import FakeClock, FakeKubernetesClient
+
+
+@dataclass
+class DemandSeries:
+    """
+    Evenly spaced CPU demand samples for one deployment
+    """
+
+    start: datetime
+    step_seconds: float
+    cores: np.ndarray  # Total cores needed across all pods, per step
+
+    @property
+    def duration_days(self) -> float:
+        return len(self.cores) * self.step_seconds / 86400
+
+
+@dataclass
+class ThresholdPolicy:
+    """
+    What an operator (or the LLM) does with get_metrics' analysis:
+    step up above scale_up_pct, step down below scale_down_pct
+    """
+
+    scale_up_pct: float = scaling_tools.CPU_HIGH_PCT
+    scale_down_pct: float = scaling_tools.CPU_LOW_PCT
+    up_step: int = 1
+    down_step: int = 1
+    min_replicas: int = 2
+    max_replicas: int = 5
+
+    def desired(self, replicas: int, utilization_pct: float) -> int:
+        if utilization_pct > self.scale_up_pct:
+            return min(self.max_replicas, replicas + self.up_step)
+        if utilization_pct < self.scale_down_pct:
+            return max(self.min_replicas, replicas - self.down_step)
+        return replicas
+
+
+# ─── Demand sources ───────────────────────────────────────────────────────────
+
+def _resample(timestamps: np.ndarray, values: np.ndarray, step_seconds: float) -> np.ndarray:
+    """Forward-fill irregular samples onto an even grid."""
+    grid = np.arange(timestamps[0], timestamps[-1] + step_seconds / 2, step_seconds)
+    idx = np.searchsorted(timestamps, grid, side="right") - 1
+    return values[np.clip(idx, 0, len(values) - 1)]
+
+
+def load_csv(path: str, step_seconds: float = 15) -> DemandSeries:
+    """
+    Load demand from a CSV file
+
+    Columns: timestamp (ISO 8601 or unix seconds) and either cpu_cores
+    (total demand) or avg_cpu_cores + replicas (as recorded by get_metrics
+    and get_current_state; multiplied back into total demand).
+    """
+    timestamps, values = [], []
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            raw = row["timestamp"]
+            try:
+                ts = float(raw)
+            except ValueError:
+                ts = datetime.fromisoformat(raw).timestamp()
+            if row.get("cpu_cores") not in (None, ""):
+                cores = float(row["cpu_cores"])
+            else:
+                cores = float(row["avg_cpu_cores"]) * float(row["replicas"])
+            timestamps.append(ts)
+            values.append(cores)
+
+    order = np.argsort(timestamps)
+    ts_arr = np.asarray(timestamps, dtype=np.float64)[order]
+    return DemandSeries(
+        start=datetime.fromtimestamp(ts_arr[0]),
+        step_seconds=step_seconds,
+        cores=_resample(ts_arr, np.asarray(values, dtype=np.float64)[order], step_seconds)
+    )
+
+
+def load_from_prometheus(
+    prom_client,
+    namespace: str,
+    deployment: str,
+    start: datetime,
+    end: datetime,
+    step_seconds: float = 15
+) -> DemandSeries:
+    """
+    Pull total CPU demand for a deployment with one range query
+
+    Long ranges are limited by Prometheus' 11k points-per-series cap;
+    use a larger step for multi-week replays.
+    """
+    query = f'sum({cpu_usage_query(namespace, f"{deployment}.*")})'
+    result = prom_client.query_range(query, start, end, step=step_seconds)
+    if not result:
+        raise ValueError(f"No CPU samples for {namespace}/{deployment} in range")
+    series = result[0]
+    ts = np.frombuffer(series["timestamps"], dtype=np.float64)
+    return DemandSeries(
+        start=datetime.fromtimestamp(ts[0]),
+        step_seconds=step_seconds,
+        cores=_resample(ts, np.frombuffer(series["values"], dtype=np.float64), step_seconds)
+    )
+
+
+def synthetic_series(
+    days: float = 7,
+    step_seconds: float = 15,
+    base_cores: float = 0.25,
+    peak_cores: float = 0.9,
+    noise: float = 0.05,
+    spikes_per_day: float = 2,
+    weekend_factor: float = 0.6,
+    start: Optional[datetime] = None,
+    seed: int = 0
+) -> DemandSeries:
+    """
+    Generate a diurnal demand curve (peak at 14:00, quieter weekends)
+    with gaussian noise and short random bursts
+    """
+    rng = np.random.default_rng(seed)
+    start = start or datetime(2026, 1, 5)  # A Monday
+    n = int(days * 86400 / step_seconds)
+    t = np.arange(n) * step_seconds
+
+    start_offset = start.hour * 3600 + start.minute * 60 + start.second
+    hour = ((t + start_offset) / 3600) % 24
+    weekday = (start.weekday() + (t + start_offset) // 86400) % 7
+
+    daily = 0.5 - 0.5 * np.cos((hour - 2) / 24 * 2 * np.pi)  # 0 at 02:00, 1 at 14:00
+    cores = base_cores + (peak_cores - base_cores) * daily
+    cores = np.where(weekday >= 5, cores * weekend_factor, cores)
+    cores = cores * (1 + noise * rng.standard_normal(n))
+
+    burst_len = int(900 / step_seconds)  # 15 minute bursts
+    for s in rng.integers(0, max(1, n - burst_len), int(spikes_per_day * days)):
+        cores[s:s + burst_len] += peak_cores * rng.uniform(0.3, 0.8)
+
+    return DemandSeries(start=start, step_seconds=step_seconds, cores=np.clip(cores, 0, None))
+
+
+# ─── Simulation ───────────────────────────────────────────────────────────────
+
+@contextmanager
+def _simulated_guardrails(clock: FakeClock, overrides: Dict[str, Any]):
+    """
+    Point guardrails at the fake clock and a scratch audit/snapshot
+    directory, apply constant overrides, and restore everything after
+    """
+    names = ["COOLDOWN_SECONDS", "SCALEDOWN_COOLDOWN_SECONDS", "SCALEDOWN_MAX_CPU_PCT",
+             "MIN_REPLICAS", "MAX_REPLICAS", "SCALEUP_MAX_STEP", "SCALEDOWN_MAX_STEP",
+             "DEPLOYMENT_LIMITS", "DEPLOYMENT_LIMITS_FILE", "AUDIT_LOG_PATH", "SNAPSHOT_PATH",
+             "ADAPTIVE_COOLDOWN", "FLAP_WINDOW_SECONDS", "FLAP_MIN_REVERSALS", "FLAP_MAX_MULTIPLIER",
+             "FLAP_SCALEDOWN_CPU_FACTOR", "RAMP_MIN_ACTIONS", "RAMP_COOLDOWN_FACTOR"]
+    unknown = set(overrides) - set(names)
+    if unknown:
+        raise ValueError(f"Unknown guardrail override(s): {', '.join(sorted(unknown))}")
+    saved = {name: getattr(guardrails, name) for name in names}
+    saved_state = (
+        guardrails._last_scale_time, guardrails._last_scale_action, guardrails._history_loaded,
+        dict(guardrails._scale_history), set(guardrails._flapping)
+    )
+
+    with tempfile.TemporaryDirectory(prefix="claudescale-sim-") as scratch:
+        guardrails.AUDIT_LOG_PATH = Path(scratch) / "audit.log"
+        guardrails.SNAPSHOT_PATH = Path(scratch) / "snapshot.json"
+        for name, value in overrides.items():
+            setattr(guardrails, name, value)
+        guardrails.set_clock(clock)
+        guardrails.reset_state()
+        try:
+            yield Path(scratch)
+        finally:
+            guardrails.set_clock(None)
+            for name, value in saved.items():
+                setattr(guardrails, name, value)
+            guardrails.reset_state()
+            (guardrails._last_scale_time, guardrails._last_scale_action, guardrails._history_loaded,
+             history, flapping) = saved_state
+            guardrails._scale_history.update(history)
+            guardrails._flapping.update(flapping)
+
+
+def simulate(
+    series: DemandSeries,
+    policy: Optional[ThresholdPolicy] = None,
+    initial_replicas: int = 2,
+    deployment: str = "demo-app",
+    cpu_limit_cores: float = scaling_tools.CPU_LIMIT_CORES,
+    slo_pct: float = scaling_tools.CPU_VERY_HIGH_PCT,
+    guardrail_overrides: Optional[Dict[str, Any]] = None,
+    trajectory_limit: int = 200
+) -> Dict[str, Any]:
+    """
+    Replay a demand series through the policy and the guardrails
+
+    Args:
+        series: CPU demand to replay
+        policy: Decision thresholds/steps (default: get_metrics thresholds)
+        initial_replicas: Replica count at the start of the series
+        deployment: Deployment name used in tool calls
+        cpu_limit_cores: Per-pod CPU limit that utilization is relative to
+        slo_pct: Per-pod utilization above which a step counts as an SLO
+            violation (default: the "very high" threshold)
+        guardrail_overrides: guardrails constants to change for this run,
+            e.g. {"COOLDOWN_SECONDS": 60, "MAX_REPLICAS": 40}; replica
+            limits are enforced by the tool exactly as in the server
+        trajectory_limit: Maximum replica changes listed in the result
+
+    Returns:
+        Dict with replica trajectory, SLO violations, pod-minutes and
+        action/block counts
+    """
+    policy = policy or ThresholdPolicy()
+    started = time.perf_counter()
+
+    n = len(series.cores)
+    step = series.step_seconds
+    util_one = series.cores / cpu_limit_cores * 100  # Utilization if one pod served it all
+
+    clock = FakeClock(series.start)
+    k8s = FakeKubernetesClient({deployment: initial_replicas})
+    loop = asyncio.new_event_loop()
+
+    replicas = initial_replicas
+    changes: List[tuple] = [(0, replicas)]  # (first step with this count, replicas)
+    trajectory: List[Dict[str, Any]] = []
+    counts = {"scale_up": 0, "scale_down": 0, "blocked_cooldown": 0, "blocked_guard": 0, "blocked_other": 0}
+
+    try:
+        with _simulated_guardrails(clock, guardrail_overrides or {}):
+            i = 0
+            while i < n:
+                window = util_one[i:] / replicas
+                fires = np.zeros(len(window), dtype=bool)
+                if replicas < policy.max_replicas:
+                    fires |= window > policy.scale_up_pct
+                if replicas > policy.min_replicas:
+                    fires |= window < policy.scale_down_pct
+                hits = np.flatnonzero(fires)
+                if hits.size == 0:
+                    break
+
+                j = int(hits[0])
+                idx = i + j
+                util = float(window[j])
+                desired = policy.desired(replicas, util)
+
+                clock.set(series.start + timedelta(seconds=idx * step))
+                result = loop.run_until_complete(scaling_tools.scale_deployment(
+                    k8s,
+                    deployment=deployment,
+                    replicas=desired,
+                    reason=f"Simulated policy: CPU at {util:.1f}%",
+                    cpu_utilization_pct=util
+                ))
+
+                if result["success"] and result.get("action") != "no_change":
+                    counts[result["action"].replace("scaled_", "scale_")] += 1
+                    replicas = desired
+                    changes.append((idx + 1, replicas))  # New count serves the next step
+                    if len(trajectory) < trajectory_limit:
+                        trajectory.append({
+                            "time": clock().isoformat(),
+                            "replicas": replicas,
+                            "utilization_pct": round(util, 1)
+                        })
+                    i = idx + 1
+                elif result.get("retry_in_seconds") is not None:
+                    counts["blocked_cooldown"] += 1
+                    i = idx + max(1, math.ceil(result["retry_in_seconds"] / step))
+                else:
+                    # Scale-down guard or replica limits: skip ahead until the
+                    # condition that fired clears instead of retrying every sample
+                    counts["blocked_guard" if desired < replicas else "blocked_other"] += 1
+                    rest = window[j + 1:]
+                    still_firing = rest < policy.scale_down_pct if desired < replicas else rest > policy.scale_up_pct
+                    cleared = np.flatnonzero(~still_firing)
+                    i = idx + 1 + (int(cleared[0]) if cleared.size else len(rest))
+    finally:
+        loop.close()
+
+    # ── Per-step replica counts and outcome metrics ──────────────────────────
+    starts = np.array([min(c[0], n) for c in changes] + [n])
+    replicas_at = np.repeat(np.array([c[1] for c in changes]), np.diff(starts))
+    utilization = util_one / replicas_at
+    violating = utilization > slo_pct
+    episodes = int(np.count_nonzero(violating[1:] & ~violating[:-1]) + (1 if n and violating[0] else 0))
+
+    # Fewest replicas that keep every step under the scale-up threshold
+    needed = np.clip(np.ceil(util_one / policy.scale_up_pct), policy.min_replicas, policy.max_replicas)
+
+    return {
+        "samples": n,
+        "step_seconds": step,
+        "duration_days": round(series.duration_days, 2),
+        "policy": vars(policy),
+        "guardrail_overrides": guardrail_overrides or {},
+        "actions": counts,
+        "replicas": {
+            "initial": initial_replicas,
+            "final": replicas,
+            "average": round(float(replicas_at.mean()), 3) if n else initial_replicas,
+            "max": int(replicas_at.max()) if n else initial_replicas
+        },
+        "pod_minutes": round(float(replicas_at.sum()) * step / 60, 1),
+        "oracle_pod_minutes": round(float(needed.sum()) * step / 60, 1),
+        "slo": {
+            "threshold_pct": slo_pct,
+            "violation_minutes": round(float(violating.sum()) * step / 60, 1),
+            "violation_pct_of_time": round(float(violating.mean()) * 100, 3) if n else 0.0,
+            "episodes": episodes,
+            "peak_utilization_pct": round(float(utilization.max()), 1) if n else 0.0
+        },
+        "trajectory": trajectory,
+        "trajectory_truncated": sum(counts[k] for k in ("scale_up", "scale_down")) > len(trajectory),
+        "elapsed_seconds": round(time.perf_counter() - started, 3)
+    }
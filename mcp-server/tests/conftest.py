@@ -0,0 +1,54 @@
+"""
+Shared fixtures for the ClaudeScale MCP server tests
+
+Run from the repository root or mcp-server/:
+    python -m pytest -q mcp-server/tests
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime
+
+import pytest
+
+import guardrails
+from simulation.fakes import FakeClock
+
+
+@pytest.fixture
+def clock(tmp_path):
+    """
+    Guardrails on a fake clock with a scratch audit log and snapshot and
+    fresh cooldown state; module constants are restored afterwards
+    """
+    names = [name for name in dir(guardrails) if name.isupper()]
+    saved = {name: getattr(guardrails, name) for name in names}
+    fake = FakeClock(datetime(2026, 3, 2, 9, 0))  # A Monday
+    guardrails.AUDIT_LOG_PATH = tmp_path / "audit.log"
+    guardrails.SNAPSHOT_PATH = tmp_path / "snapshot.json"
+    guardrails.set_clock(fake)
+    guardrails.reset_state()
+    yield fake
+    guardrails.set_clock(None)
+    for name, value in saved.items():
+        setattr(guardrails, name, value)
+    guardrails.reset_state()
+
+
+@pytest.fixture
+def fake_cluster(tmp_path):
+    """
+    A FakeCluster served over HTTP, with a KubernetesClient (listing
+    cache off, so changes made on the cluster show up at once) and a
+    PrometheusClient pointed at it: (cluster, k8s, prom)
+    """
+    from simulation.fake_servers import FakeCluster, start_fake_servers, write_kubeconfig
+    from utils.kubernetes_client import KubernetesClient
+    from utils.prometheus_client import PrometheusClient
+
+    cluster = FakeCluster(deployments=4, pods=8, namespaces=2)
+    urls = start_fake_servers(cluster)
+    write_kubeconfig(str(tmp_path / "kubeconfig"), urls["kubernetes"])
+    return cluster, KubernetesClient(config_file=str(tmp_path / "kubeconfig"), cache_ttl_seconds=0), PrometheusClient(url=urls["prometheus"])
@@ -0,0 +1,254 @@
+"""Tests for guardrails: cooldown reservations, replica limits and flap detection"""
+import json
+import os
+import threading
+from collections import deque
+from datetime import timedelta
+
+import guardrails
+from guardrails import (
+    check_replica_limits,
+    configure_replica_limits,
+    flap_state,
+    get_recent_audit,
+    release_scale_action,
+    reserve_scale_action,
+    resolve_replica_limits
+)
+
+
+def test_reservation_starts_the_cooldown(clock):
+    assert reserve_scale_action("up")["allowed"]
+    clock.advance(30)
+    blocked = reserve_scale_action("up")
+    assert not blocked["allowed"]
+    assert blocked["retry_in_seconds"] == 60
+    clock.advance(60)
+    assert reserve_scale_action("up")["allowed"]
+
+
+def test_scale_down_waits_longer(clock):
+    reserve_scale_action("up")
+    clock.advance(guardrails.COOLDOWN_SECONDS)
+    assert not reserve_scale_action("down")["allowed"]
+    clock.advance(guardrails.SCALEDOWN_COOLDOWN_SECONDS - guardrails.COOLDOWN_SECONDS)
+    assert reserve_scale_action("down")["allowed"]
+
+
+def test_concurrent_reservations_admit_one(clock):
+    results = []
+    barrier = threading.Barrier(8)
+
+    def reserve():
+        barrier.wait()
+        results.append(reserve_scale_action("up")["allowed"])
+
+    threads = [threading.Thread(target=reserve) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results.count(True) == 1
+
+
+def test_release_restores_previous_state(clock):
+    first = reserve_scale_action("up", "shop/web")
+    clock.advance(100)
+    second = reserve_scale_action("up", "shop/web")
+    release_scale_action(second)
+    assert guardrails._last_scale_time == first["recorded_at"]
+    assert [d for _, d in guardrails._scale_history["shop/web"]] == ["up"]
+    # The released action no longer holds the cooldown
+    assert reserve_scale_action("up", "shop/web")["allowed"]
+
+
+def test_release_keeps_a_later_reservation(clock):
+    first = reserve_scale_action("up")
+    clock.advance(100)
+    second = reserve_scale_action("up")
+    release_scale_action(first)
+    assert guardrails._last_scale_time == second["recorded_at"]
+
+
+def test_releasing_a_blocked_reservation_is_a_no_op(clock):
+    granted = reserve_scale_action("up")
+    blocked = reserve_scale_action("up")
+    release_scale_action(blocked)
+    assert guardrails._last_scale_time == granted["recorded_at"]
+
+
+# ─── Replica limits ───────────────────────────────────────────────────────────
+
+ANNOTATIONS = {"claudescale.io/min-replicas": "3", "claudescale.io/max-replicas": "4"}
+
+
+def test_defaults_apply_without_overrides(clock):
+    limits = resolve_replica_limits("web", "shop")
+    assert limits == {"min_replicas": 2, "max_replicas": 5, "max_step_up": 0, "max_step_down": 1,
+                      "sources": ["defaults"]}
+
+
+def test_annotations_override_defaults(clock):
+    limits = resolve_replica_limits("web", "shop", ANNOTATIONS)
+    assert (limits["min_replicas"], limits["max_replicas"]) == (3, 4)
+    assert limits["sources"] == ["defaults", "annotations"]
+
+
+def test_annotations_cannot_widen_global_limits(clock):
+    guardrails.SCALEUP_MAX_STEP = 2
+    limits = resolve_replica_limits("web", "shop", {
+        "claudescale.io/min-replicas": "0",
+        "claudescale.io/max-replicas": "500",
+        "claudescale.io/max-step-up": "0",
+        "claudescale.io/max-step-down": "10",
+    })
+    assert (limits["min_replicas"], limits["max_replicas"]) == (2, 5)
+    assert (limits["max_step_up"], limits["max_step_down"]) == (2, 1)
+
+
+def test_operator_config_overrides_annotations_field_by_field(clock):
+    configure_replica_limits(deployment_limits={"web": {"max_replicas": 6}, "shop/web": {"max_step_up": 2}})
+    limits = resolve_replica_limits("web", "shop", ANNOTATIONS)
+    assert (limits["min_replicas"], limits["max_replicas"], limits["max_step_up"]) == (3, 6, 2)
+    assert limits["sources"] == ["defaults", "annotations", "config"]
+
+
+def test_namespaced_entry_wins_over_bare_name(clock):
+    configure_replica_limits(deployment_limits={"web": {"max_replicas": 6}, "shop/web": {"max_replicas": 7}})
+    assert resolve_replica_limits("web", "shop")["max_replicas"] == 7
+    assert resolve_replica_limits("web", "blog")["max_replicas"] == 6
+
+
+def test_limits_file_wins_and_is_reread(clock, tmp_path):
+    path = tmp_path / "limits.json"
+    path.write_text(json.dumps({"shop/web": {"max_replicas": 9}}))
+    configure_replica_limits(deployment_limits={"shop/web": {"max_replicas": 6}}, limits_file=str(path))
+    guardrails.LIMITS_FILE_CHECK_SECONDS = 0
+    assert resolve_replica_limits("web", "shop")["max_replicas"] == 9
+
+    path.write_text(json.dumps({"shop/web": {"max_replicas": 4}}))
+    os.utime(path, (1, 1))
+    assert resolve_replica_limits("web", "shop")["max_replicas"] == 4
+
+    # A broken file keeps the last good limits
+    path.write_text("{not json")
+    os.utime(path, (2, 2))
+    assert resolve_replica_limits("web", "shop")["max_replicas"] == 4
+
+
+def test_invalid_values_are_ignored(clock):
+    limits = resolve_replica_limits("web", "shop", {"claudescale.io/max-replicas": "lots"})
+    assert limits["max_replicas"] == 5
+    assert limits["sources"] == ["defaults"]
+
+
+def test_min_above_max_falls_back_to_defaults(clock):
+    limits = resolve_replica_limits("web", "shop", {"claudescale.io/min-replicas": "4", "claudescale.io/max-replicas": "3"})
+    assert (limits["min_replicas"], limits["max_replicas"]) == (2, 5)
+
+
+def test_check_replica_limits(clock):
+    limits = resolve_replica_limits("web", "shop", {"claudescale.io/max-step-up": "2"})
+    assert check_replica_limits(limits, 2, 4)["allowed"]
+    assert "below minimum" in check_replica_limits(limits, 2, 1)["reason"]
+    assert "above maximum" in check_replica_limits(limits, 4, 6)["reason"]
+    assert "Target 4 instead of 5" in check_replica_limits(limits, 2, 5)["reason"]
+
+
+# ─── Flap detection ───────────────────────────────────────────────────────────
+
+def _scale(clock, key, *directions, gap=600):
+    for direction in directions:
+        assert reserve_scale_action(direction, key)["allowed"]
+        clock.advance(gap)
+
+
+def _history(clock, key, *directions, last_ago=0, gap=600):
+    """Seed a deployment's history; the last action `last_ago` seconds ago."""
+    now = clock()
+    guardrails._scale_history[key] = deque(
+        (now - timedelta(seconds=last_ago + gap * (len(directions) - 1 - i)), d) for i, d in enumerate(directions)
+    )
+
+
+def test_no_history_is_normal(clock):
+    assert flap_state("shop/web", "up") == {"mode": "normal", "factor": 1.0, "reversals": 0, "reason": None}
+
+
+def test_reversals_double_the_cooldown_up_to_the_cap(clock):
+    _scale(clock, "shop/web", "up", "down", "up", gap=400)
+    state = flap_state("shop/web", "down")
+    assert (state["mode"], state["factor"], state["reversals"]) == ("flapping", 2.0, 2)
+
+    _scale(clock, "shop/web", "down", gap=1)
+    assert flap_state("shop/web", "up")["factor"] == 4.0
+    guardrails.configure_adaptive_cooldown(max_multiplier=3)
+    assert flap_state("shop/web", "up")["factor"] == 3.0
+
+
+def test_flapping_lengthens_cooldown_and_tightens_scale_down(clock):
+    # The plain cooldown has passed since the last action
+    _history(clock, "shop/web", "up", "down", "up", last_ago=guardrails.SCALEDOWN_COOLDOWN_SECONDS)
+    result = reserve_scale_action("down", "shop/web")
+    assert not result["allowed"]
+    assert result["cooldown"]["scale_down_seconds"] == 2 * guardrails.SCALEDOWN_COOLDOWN_SECONDS
+    assert result["scaledown_max_cpu_pct"] == guardrails.SCALEDOWN_MAX_CPU_PCT * guardrails.FLAP_SCALEDOWN_CPU_FACTOR
+
+
+def test_flapping_is_per_deployment(clock):
+    _scale(clock, "shop/web", "up", "down", "up")
+    assert flap_state("shop/api", "up")["mode"] == "normal"
+
+
+def test_old_reversals_age_out(clock):
+    _scale(clock, "shop/web", "up", "down", "up")
+    clock.advance(guardrails.FLAP_WINDOW_SECONDS)
+    assert flap_state("shop/web", "up")["mode"] == "normal"
+
+
+def test_ramp_shortens_the_scale_up_cooldown(clock):
+    _history(clock, "shop/web", "up", "up", "up", last_ago=guardrails.COOLDOWN_SECONDS * guardrails.RAMP_COOLDOWN_FACTOR)
+    assert flap_state("shop/web", "up")["mode"] == "ramp"
+    assert flap_state("shop/web", "down")["mode"] == "normal"
+    assert reserve_scale_action("up", "shop/web")["allowed"]
+
+
+def test_scale_downs_never_ramp(clock):
+    _history(clock, "shop/web", "down", "down", "down", last_ago=guardrails.SCALEDOWN_COOLDOWN_SECONDS / 2)
+    assert flap_state("shop/web", "down") == {"mode": "normal", "factor": 1.0, "reversals": 0, "reason": None}
+    assert not reserve_scale_action("down", "shop/web")["allowed"]
+
+
+def test_adaptive_cooldown_can_be_disabled(clock):
+    guardrails.configure_adaptive_cooldown(enabled=False)
+    _scale(clock, "shop/web", "up", "down", "up")
+    assert flap_state("shop/web", "down")["mode"] == "normal"
+
+
+def test_flapping_is_audited_once_per_episode(clock):
+    _scale(clock, "shop/web", "up", "down", "up", "down")
+    entries = get_recent_audit(50, events={"flapping_detected"})
+    assert len(entries) == 1
+    assert (entries[0]["deployment"], entries[0]["namespace"]) == ("web", "shop")
+
+
+def test_history_is_rebuilt_from_the_audit_log(clock):
+    for action in ("scaled_up", "scaled_down", "scaled_up"):
+        guardrails.audit_log("scale_executed", {"deployment": "web", "namespace": "shop", "action": action})
+        clock.advance(60)
+    guardrails._history_loaded = False  # As after a restart
+    assert flap_state("shop/web", "up")["mode"] == "flapping"
+
+
+def test_recent_audit_filters_newest_first_reads(clock):
+    for i in range(300):
+        guardrails.audit_log("scale_executed", {"deployment": "web" if i % 3 else "api", "namespace": "shop", "i": i})
+        clock.advance(10)
+    assert [e["i"] for e in get_recent_audit(3)] == [297, 298, 299]
+    since = clock() - timedelta(seconds=60)
+    assert [e["i"] for e in get_recent_audit(50, since=since)] == list(range(294, 300))
+    assert [e["i"] for e in get_recent_audit(50, since=since, deployment="api", namespace="shop")] == [294, 297]
+    assert get_recent_audit(50, deployment="web", namespace="blog") == []
+    with guardrails.AUDIT_LOG_PATH.open("rb") as f:
+        lines = list(guardrails._lines_newest_first(f, block_size=7))
+    assert lines[1:] == guardrails.AUDIT_LOG_PATH.read_bytes().split(b"\n")[-2::-1]
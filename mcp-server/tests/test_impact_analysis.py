@@ -0,0 +1,95 @@
+"""Tests for tools.impact_analysis"""
+from array import array
+from datetime import timedelta
+
+import guardrails
+from tools.impact_analysis import analyze_scale_event, measure_window, summarize_impacts
+from utils.prometheus_client import CPU_RATE_WINDOW, CPU_RATE_WINDOW_SECONDS
+
+
+class FakeProm:
+    """Range queries answer per-pod cores: `before` up to the action, `after` from then on."""
+
+    def __init__(self, action_time, before, after):
+        self.action_time = action_time
+        self.before, self.after = before, after
+        self.queries = []
+
+    def query_range(self, query, start, end, step=15):
+        self.queries.append((query, start, end))
+        pods = self.before if end <= self.action_time else self.after
+        timestamps = [start.timestamp() + i * step for i in range(int((end - start).total_seconds() // step))]
+        return [{"metric": {"pod": f"web-{i}"}, "timestamps": array("d", timestamps),
+                 "values": array("d", [cores] * len(timestamps))} for i, cores in enumerate(pods)]
+
+
+class FakeK8s:
+    def get_pods(self, deployment, namespace):
+        return []
+
+
+def _action(clock, previous, new):
+    return {
+        "success": True, "namespace": "shop", "deployment": "web",
+        "action": "scaled_up" if new > previous else "scaled_down",
+        "timestamp": clock().isoformat(), "previous_replicas": previous, "new_replicas": new
+    }
+
+
+def test_measure_window_uses_the_shared_rate_window(clock):
+    prom = FakeProm(clock() + timedelta(hours=1), before=[0.1, 0.2], after=[])
+    result = measure_window(prom, "shop", "web", clock() - timedelta(minutes=5), clock())
+    assert f"[{CPU_RATE_WINDOW}]" in prom.queries[0][0]
+    assert result["avg_pods"] == 2
+    assert result["utilization_pct"] == 75.0  # 0.15 of 0.2 cores
+    assert measure_window(FakeProm(clock(), [], []), "shop", "web", clock(), clock()) is None
+
+
+def test_after_window_starts_past_the_rate_window(clock):
+    prom = FakeProm(clock(), before=[0.18, 0.18], after=[0.09] * 4)
+    analyze_scale_event(FakeK8s(), prom, _action(clock, 2, 4), settle_seconds=60)
+    (_, _, before_end), (_, after_start, _) = prom.queries
+    assert (after_start - before_end).total_seconds() == CPU_RATE_WINDOW_SECONDS
+
+
+def test_scale_up_that_halves_load_helped(clock):
+    prom = FakeProm(clock(), before=[0.18, 0.18], after=[0.09] * 4)
+    result = analyze_scale_event(FakeK8s(), prom, _action(clock, 2, 4))
+    assert result["verdict"] == "helped"
+    assert (result["expected_utilization_pct"], result["effectiveness"]) == (45.0, 1.0)
+    assert result["follow_up"] is None
+
+
+def test_follow_up_on_the_same_deployment_only(clock):
+    action = _action(clock, 2, 4)
+    guardrails.audit_log("scale_executed", {"deployment": "web", "namespace": "shop", "action": "scaled_up",
+                                            "new_replicas": 4})
+    clock.advance(120)
+    guardrails.audit_log("scale_executed", {"deployment": "api", "namespace": "shop", "action": "scaled_up"})
+    clock.advance(60)
+    guardrails.audit_log("scale_executed", {"deployment": "web", "namespace": "shop", "action": "scaled_up",
+                                            "new_replicas": 5})
+    result = analyze_scale_event(FakeK8s(), FakeProm(clock(), [0.18] * 2, [0.18] * 4), action)
+    assert result["follow_up"]["after_seconds"] == 180
+    assert result["verdict"] == "insufficient"
+
+
+def test_missing_samples_give_no_data(clock):
+    result = analyze_scale_event(FakeK8s(), FakeProm(clock(), [], [0.1]), _action(clock, 3, 2))
+    assert result["verdict"] == "no_data"
+
+
+def test_summarize_impacts():
+    entries = [
+        {"verdict": "helped", "new_replicas": 4, "previous_replicas": 2, "utilization_change_pct": -30.0,
+         "effectiveness": 1.0, "follow_up": None, "time_to_ready": {"max_seconds": 20.0}},
+        {"verdict": "insufficient", "new_replicas": 3, "previous_replicas": 2, "utilization_change_pct": -10.0,
+         "effectiveness": 0.5, "follow_up": {"action": "scaled_up"}, "time_to_ready": {"max_seconds": 40.0}},
+        {"verdict": "no_data", "new_replicas": 2, "previous_replicas": 3},
+    ]
+    summary = summarize_impacts(entries)
+    assert summary["verdicts"] == {"helped": 1, "insufficient": 1, "no_data": 1}
+    assert summary["follow_up_rate"] == 0.33
+    assert summary["scale_up"] == {"count": 2, "median_utilization_change_pct": -20.0, "median_effectiveness": 0.75}
+    assert summary["scale_down"]["count"] == 0
+    assert summary["time_to_ready_seconds"] == {"median": 30.0, "max": 40.0}
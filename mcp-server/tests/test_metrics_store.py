@@ -0,0 +1,95 @@
+"""Tests for utils.metrics_store and the stale fallback of get_metrics"""
+import asyncio
+import time
+
+import pytest
+
+from tools import scaling_tools
+from tools.scaling_tools import get_metrics
+from utils.metrics_store import MetricsSampler, metrics_sampler, metrics_store
+from utils.prometheus_client import PrometheusQueryError
+
+
+def _sampler(**kwargs):
+    calls = []
+
+    async def collect(*args):
+        calls.append(args)
+
+    sampler = MetricsSampler(**kwargs)
+    sampler.collect = collect
+    sampler._thread = object()  # Rounds are driven by the test
+    return sampler, calls
+
+
+# ─── Sampler targets ──────────────────────────────────────────────────────────
+
+def test_idle_targets_are_evicted(monkeypatch):
+    sampler, calls = _sampler(idle_seconds=300)
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+    sampler.track("a", "a")
+    monkeypatch.setattr(time, "monotonic", lambda: now + 200)
+    sampler.track("b", "b")
+    monkeypatch.setattr(time, "monotonic", lambda: now + 301)
+    sampler._round()
+    assert calls == [("b",)]
+    assert sampler.status()["targets"] == 1
+
+
+def test_only_the_most_recent_targets_are_kept():
+    sampler, calls = _sampler(max_targets=2)
+    for key in ("a", "b", "a", "c"):
+        sampler.track(key, key)
+    sampler._round()
+    assert sorted(calls) == [("a",), ("c",)]
+
+
+def test_round_skips_targets_without_budget():
+    sampler, calls = _sampler()
+    sampler.has_budget = lambda key: key != "busy"
+    sampler.track("busy", "busy")
+    sampler.track("idle", "idle")
+    sampler._round()
+    assert calls == [("idle",)]
+    assert (sampler.status()["samples"], sampler.status()["skipped"]) == (1, 1)
+
+
+def test_sampler_leaves_prometheus_budget_to_tool_calls(fake_cluster):
+    _, _, prom = fake_cluster
+    bucket = prom.rate_limiter
+    bucket._tokens, bucket._updated = float(bucket.burst), time.monotonic()
+    assert scaling_tools._sampler_has_budget(prom)
+    bucket._tokens = bucket.burst * scaling_tools.SAMPLER_MIN_FREE_TOKENS / 2
+    bucket._updated = time.monotonic() + 60  # No refill during the check
+    assert not scaling_tools._sampler_has_budget(prom)
+
+
+# ─── Stale fallback ───────────────────────────────────────────────────────────
+
+def _prometheus_down(*args, **kwargs):
+    raise PrometheusQueryError("connection refused")
+
+
+def test_stale_values_only_when_allowed_and_fresh_enough(clock, fake_cluster, monkeypatch):
+    _, k8s, prom = fake_cluster
+    monkeypatch.setattr(metrics_sampler, "interval_seconds", 0)
+    monkeypatch.setattr(metrics_store, "stale_max_seconds", 900)
+
+    async def run():
+        fresh = await get_metrics(prom, "claudescale", "app-0002", k8s_client=k8s)
+        assert "stale" not in fresh
+        monkeypatch.setattr(prom, "_get", _prometheus_down)
+
+        stale = await get_metrics(prom, "claudescale", "app-0002", k8s_client=k8s)
+        assert stale["stale"] and stale["data_age_seconds"] < 5
+        assert stale["cpu"]["utilization_percent"] == fresh["cpu"]["utilization_percent"]
+        with pytest.raises(PrometheusQueryError):
+            await get_metrics(prom, "claudescale", "app-0002", k8s_client=k8s, allow_stale=False)
+
+        # Nothing stored is younger than the limit: the error propagates
+        monkeypatch.setattr(metrics_store, "stale_max_seconds", 0)
+        with pytest.raises(PrometheusQueryError):
+            await get_metrics(prom, "claudescale", "app-0002", k8s_client=k8s)
+
+    asyncio.run(run())
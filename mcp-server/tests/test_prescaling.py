@@ -0,0 +1,202 @@
+"""Tests for pre-scaling: cron expressions, active floors and the scheduler"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import guardrails
+from guardrails import active_floor, configure_prescale_profiles, validate_scaledown
+from tools.impact_analysis import impact_analyzer
+from tools.prescaling import PrescaleScheduler
+from tools.scaling_tools import scale_deployment
+from utils.cluster_pool import Cluster, ClusterPool
+from utils.cron import CronExpression
+
+UTC = timezone.utc
+
+
+# ─── CronExpression ───────────────────────────────────────────────────────────
+
+def test_cron_fields():
+    cron = CronExpression("30 7-9/2 * jan-mar mon-fri")
+    assert cron.matches(datetime(2026, 3, 2, 7, 30))      # Monday
+    assert cron.matches(datetime(2026, 3, 2, 9, 30))
+    assert not cron.matches(datetime(2026, 3, 2, 8, 30))  # Not on the step
+    assert not cron.matches(datetime(2026, 3, 7, 7, 30))  # Saturday
+    assert not cron.matches(datetime(2026, 4, 6, 7, 30))  # April
+
+
+def test_cron_sunday_is_0_or_7():
+    sunday = datetime(2026, 3, 1, 0, 0)
+    assert CronExpression("0 0 * * 0").matches(sunday)
+    assert CronExpression("0 0 * * 7").matches(sunday)
+
+
+def test_cron_restricted_day_fields_match_either():
+    cron = CronExpression("0 0 1 * mon")
+    assert cron.matches(datetime(2026, 4, 1, 0, 0))  # 1st, a Wednesday
+    assert cron.matches(datetime(2026, 3, 2, 0, 0))  # A Monday
+    assert not cron.matches(datetime(2026, 3, 3, 0, 0))
+
+
+def test_cron_last_fire():
+    cron = CronExpression("0 8 * * *")
+    assert cron.last_fire(datetime(2026, 3, 2, 8, 45, 30), 60) == datetime(2026, 3, 2, 8, 0)
+    assert cron.last_fire(datetime(2026, 3, 2, 9, 1), 60) is None
+
+
+@pytest.mark.parametrize("expression", ["0 8 * * 1-5", "*/15 7-9 * * *", "30 23 1,15 * mon", "0 0 29 2 *"])
+def test_cron_last_fire_matches_a_minute_by_minute_walk(expression):
+    cron = CronExpression(expression)
+    for t in (datetime(2026, 3, 2, 8, 0), datetime(2026, 3, 2, 9, 44, 59), datetime(2026, 3, 16, 0, 10),
+              datetime(2028, 3, 1, 0, 0)):
+        for within in (0, 59, 1440, 3 * 1440):
+            walked = next((t.replace(second=0) - timedelta(minutes=i) for i in range(within + 1)
+                           if cron.matches(t.replace(second=0) - timedelta(minutes=i))), None)
+            assert cron.last_fire(t, within) == walked, (t, within)
+
+
+@pytest.mark.parametrize("expression", ["* * * *", "60 * * * *", "* * * * mon-", "*/0 * * * *", "5-1 * * * *"])
+def test_cron_rejects_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        CronExpression(expression)
+
+
+# ─── Active floors ────────────────────────────────────────────────────────────
+
+MORNING = {"name": "morning", "schedule": "0 8 * * 1-5", "duration_minutes": 120, "min_replicas": 4}
+PEAK = {"name": "peak", "schedule": "0 9 * * 1-5", "duration_minutes": 30, "min_replicas": 5}
+
+
+def test_floor_applies_from_the_lead_until_the_window_closes(clock):
+    configure_prescale_profiles({"shop/web": [MORNING]}, lead_minutes=10)
+    assert active_floor("web", "shop", datetime(2026, 3, 2, 7, 49, tzinfo=UTC)) is None
+    floor = active_floor("web", "shop", datetime(2026, 3, 2, 7, 50, tzinfo=UTC))
+    assert floor["min_replicas"] == 4 and floor["profile"] == "morning"
+    assert floor["until"] == "2026-03-02T10:00:00+00:00"
+    assert active_floor("web", "shop", datetime(2026, 3, 2, 9, 59, tzinfo=UTC)) is not None
+    assert active_floor("web", "shop", datetime(2026, 3, 2, 10, 0, tzinfo=UTC)) is None
+    assert active_floor("web", "shop", datetime(2026, 3, 7, 8, 30, tzinfo=UTC)) is None  # Saturday
+
+
+def test_highest_overlapping_floor_wins(clock):
+    configure_prescale_profiles({"shop/web": [MORNING, PEAK]}, lead_minutes=0)
+    assert active_floor("web", "shop", datetime(2026, 3, 2, 9, 10, tzinfo=UTC))["profile"] == "peak"
+    assert active_floor("web", "shop", datetime(2026, 3, 2, 9, 40, tzinfo=UTC))["profile"] == "morning"
+
+
+def test_schedules_follow_the_profile_timezone(clock):
+    configure_prescale_profiles({"web": [MORNING]}, timezone="Europe/Madrid", lead_minutes=0)
+    assert active_floor("web", "shop", datetime(2026, 3, 2, 7, 30, tzinfo=UTC)) is not None  # 08:30 CET
+    assert active_floor("web", "shop", datetime(2026, 3, 2, 9, 30, tzinfo=UTC)) is None
+
+
+def test_namespaced_profile_replaces_bare_name(clock):
+    configure_prescale_profiles({"web": [PEAK], "shop/web": [MORNING]}, lead_minutes=0)
+    at = datetime(2026, 3, 2, 9, 10, tzinfo=UTC)
+    assert active_floor("web", "shop", at)["profile"] == "morning"
+    assert active_floor("web", "blog", at)["profile"] == "peak"
+
+
+def test_invalid_profiles_are_rejected(clock):
+    with pytest.raises(ValueError):
+        configure_prescale_profiles({"web": [{"schedule": "0 8 * * *", "min_replicas": 3}]})
+    with pytest.raises(ValueError):
+        configure_prescale_profiles({"web": [MORNING]}, timezone="Mars/Olympus")
+
+
+def test_scale_down_guard_respects_the_floor(clock):
+    floor = {"min_replicas": 4, "profile": "morning", "until": "2026-03-02T10:00:00+00:00"}
+    blocked = validate_scaledown(5, 3, cpu_utilization_pct=10, reason="quiet", floor=floor)
+    assert not blocked["allowed"] and "morning" in blocked["reason"]
+    assert validate_scaledown(5, 4, cpu_utilization_pct=10, reason="quiet", floor=floor)["allowed"]
+
+
+# ─── Scheduler ────────────────────────────────────────────────────────────────
+
+ALWAYS = {"name": "always", "schedule": "* * * * *", "duration_minutes": 60, "min_replicas": 4}
+
+
+def test_scheduler_raises_floors_without_holding_the_shared_cooldown(clock, fake_cluster, monkeypatch):
+    cluster, k8s, prom = fake_cluster
+    monkeypatch.setattr(impact_analyzer, "enabled", False)
+    configure_prescale_profiles({"claudescale/demo-app": [ALWAYS], "app-0002": [ALWAYS]})
+    scheduler = PrescaleScheduler()
+    scheduler.clusters = ClusterPool([Cluster("default", k8s, prom, 5.0)])
+
+    def replicas(namespace, name):
+        return cluster.get_deployment(namespace, name)["spec"]["replicas"]
+
+    async def run():
+        outcomes = await scheduler.check()
+        assert sorted((o["deployment"], o["applied"]) for o in outcomes) == [("app-0002", True), ("demo-app", True)]
+        assert replicas("claudescale", "demo-app") == replicas("claudescale", "app-0002") == 4
+        assert guardrails._last_scale_time is None
+
+        # Another deployment can be scaled at once...
+        other = await scale_deployment(k8s, "app-0001", 3, namespace="claudescale-1", reason="load")
+        assert other["success"], other
+        # ...while the raised one keeps its own cooldown
+        again = await scale_deployment(k8s, "demo-app", 5, namespace="claudescale", reason="load")
+        assert not again["success"] and "Cooldown" in again["error"]
+
+        assert await scheduler.check() == []  # Already at the floor
+
+    asyncio.run(run())
+
+
+def test_bare_name_profiles_list_deployments_only_while_a_floor_is_active(clock, fake_cluster, monkeypatch):
+    _, k8s, prom = fake_cluster
+    listings = []
+    list_all = k8s.list_all_deployments
+    monkeypatch.setattr(k8s, "list_all_deployments", lambda: listings.append(1) or list_all())
+    cluster = Cluster("default", k8s, prom, 5.0)
+    scheduler = PrescaleScheduler()
+
+    evening = {**MORNING, "name": "evening", "schedule": "0 18 * * 1-5"}
+    configure_prescale_profiles({"app-0002": [evening], "claudescale/demo-app": [evening]}, lead_minutes=0)
+    assert scheduler._targets(cluster) == [("claudescale", "demo-app")]  # 09:00, before the window
+    assert listings == []
+
+    clock.advance(9 * 3600 + 60)  # 18:01, inside it
+    assert ("claudescale", "app-0002") in scheduler._targets(cluster)
+    assert ("claudescale", "app-0002") in scheduler._targets(cluster)
+    assert listings == [1]  # The second check reused the listing
+
+
+def test_scheduler_restores_a_raised_hpa_floor_once_the_window_closes(clock, tmp_path, monkeypatch):
+    from simulation.fake_servers import FakeCluster, start_fake_servers, write_kubeconfig
+    from utils.kubernetes_client import KubernetesClient
+
+    cluster = FakeCluster(deployments=2, pods=4, hpas=1)
+    write_kubeconfig(str(tmp_path / "kubeconfig"), start_fake_servers(cluster)["kubernetes"])
+    k8s = KubernetesClient(config_file=str(tmp_path / "kubeconfig"), cache_ttl_seconds=0)
+    monkeypatch.setattr(impact_analyzer, "enabled", False)
+    configure_prescale_profiles({"claudescale/demo-app": [ALWAYS]})
+    scheduler = PrescaleScheduler()
+    scheduler.clusters = ClusterPool([Cluster("default", k8s, None, 5.0)])
+
+    def hpa_floor():
+        return cluster.get_hpa("claudescale", "demo-app-hpa")["spec"]["minReplicas"]
+
+    async def run():
+        (raised,) = await scheduler.check()
+        assert raised["applied"] and hpa_floor() == 4
+
+        # Window closed: the pre-window floor comes back through the scale-down guard and cooldown
+        configure_prescale_profiles({})
+        clock.advance(guardrails.SCALEDOWN_COOLDOWN_SECONDS + 1)
+        restarted = PrescaleScheduler()
+        restarted.clusters = scheduler.clusters
+        restarted.load_raised_hpa_floors()  # Recovered from the audit log
+        (step,) = await restarted.check()
+        assert step["applied"] and not step["restored"] and hpa_floor() == 4 - guardrails.SCALEDOWN_MAX_STEP
+        (held,) = await restarted.check()
+        assert not held["applied"] and "Cooldown" in held["detail"]  # Retried after the cooldown
+        while hpa_floor() > 2:
+            clock.advance(guardrails.SCALEDOWN_COOLDOWN_SECONDS + 1)
+            (last,) = await restarted.check()
+        assert last["restored"] and restarted.restored == 1
+        assert restarted.raised_hpa_floors == {} and await restarted.check() == []
+
+    asyncio.run(run())
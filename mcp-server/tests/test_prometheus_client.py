@@ -0,0 +1,55 @@
+"""Tests for utils.prometheus_client"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from utils.prometheus_client import PrometheusClient, PrometheusQueryError
+
+
+@pytest.fixture
+def respond():
+    """Serve a fixed body for every request; returns a setter and the client."""
+    state = {"body": b"", "status": 200}
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            self.send_response(state["status"])
+            self.end_headers()
+            self.wfile.write(state["body"])
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = PrometheusClient(url=f"http://127.0.0.1:{server.server_address[1]}")
+
+    def set_body(body: bytes, status: int = 200):
+        state["body"], state["status"] = body, status
+        return client
+
+    yield set_body
+    server.shutdown()
+
+
+def test_query_returns_the_result(respond):
+    client = respond(b'{"status": "success", "data": {"resultType": "vector", "result": [{"metric": {}, "value": [1, "2"]}]}}')
+    assert client.query("up") == [{"metric": {}, "value": [1, "2"]}]
+
+
+@pytest.mark.parametrize("body", [
+    b"<html>502 Bad Gateway</html>",
+    b'{"status": "succ',
+    b"[1, 2]",
+    b'{"status": "success"}',
+    b'{"status": "success", "data": {"result": [{"metric": {}, "values": [[1, "x"]]}]}}',
+])
+def test_malformed_bodies_raise_query_errors(respond, body):
+    with pytest.raises(PrometheusQueryError, match="Invalid response"):
+        respond(body).query("up")
+
+
+def test_http_errors_raise_query_errors(respond):
+    with pytest.raises(PrometheusQueryError, match="HTTP 503"):
+        respond(b'{"status": "error", "error": "overloaded"}', status=503).query("up")
@@ -0,0 +1,82 @@
+"""Tests for utils.rate_limit.TokenBucket"""
+import asyncio
+
+import pytest
+
+from utils.rate_limit import PRIORITY_READ, PRIORITY_WRITE, RateLimitExceeded, TokenBucket
+
+
+def test_burst_is_admitted_without_waiting():
+    bucket = TokenBucket("test", rate=1, burst=3)
+    assert all(bucket.acquire() < 0.01 for _ in range(3))
+    assert bucket.status()["admitted"] == 3
+
+
+def test_disabled_bucket_never_limits():
+    bucket = TokenBucket("test", rate=0, burst=1)
+    for _ in range(100):
+        assert bucket.acquire() == 0.0
+
+
+def test_sheds_when_wait_would_exceed_limit():
+    bucket = TokenBucket("test", rate=1, burst=1, max_wait_seconds=0.5)
+    bucket.acquire()
+    with pytest.raises(RateLimitExceeded) as e:
+        bucket.acquire()
+    assert e.value.limit == "test"
+    assert e.value.retry_after_seconds == pytest.approx(1.0, abs=0.05)
+    assert bucket.status()["shed"] == 1
+
+
+def test_full_queue_sheds_reads_but_not_writes():
+    async def run():
+        bucket = TokenBucket("test", rate=50, burst=1, max_queue=1)
+        bucket.acquire()
+        queued = asyncio.ensure_future(bucket.acquire_async(PRIORITY_READ))
+        await asyncio.sleep(0)
+        with pytest.raises(RateLimitExceeded, match="already queued"):
+            await bucket.acquire_async(PRIORITY_READ)
+        await bucket.acquire_async(PRIORITY_WRITE)
+        await queued
+
+    asyncio.run(run())
+
+
+def test_writes_are_granted_ahead_of_queued_reads():
+    async def run():
+        bucket = TokenBucket("test", rate=50, burst=1)
+        bucket.acquire()
+        order = []
+
+        async def take(priority, label):
+            await bucket.acquire_async(priority)
+            order.append(label)
+
+        reads = [asyncio.ensure_future(take(PRIORITY_READ, f"read{i}")) for i in range(2)]
+        await asyncio.sleep(0)
+        write = asyncio.ensure_future(take(PRIORITY_WRITE, "write"))
+        await asyncio.gather(*reads, write)
+        return order
+
+    assert asyncio.run(run()) == ["write", "read0", "read1"]
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def run():
+        bucket = TokenBucket("test", rate=10, burst=1, max_wait_seconds=2)
+        bucket.acquire()
+        waiting = asyncio.ensure_future(bucket.acquire_async())
+        await asyncio.sleep(0.01)
+        assert bucket.status()["queued"] == 1
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert bucket.status()["queued"] == 0
+
+        # The next caller gets the refilled token instead of waiting behind
+        # the cancelled one until its deadline
+        waited = await bucket.acquire_async()
+        assert waited < 0.5
+        assert bucket.status()["shed"] == 0
+
+    asyncio.run(run())
@@ -0,0 +1,41 @@
+"""Tests for simulation.replay (offline tooling, needs numpy)"""
+from collections import deque
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("numpy")
+
+import guardrails  # noqa: E402
+from simulation.replay import ThresholdPolicy, simulate, synthetic_series  # noqa: E402
+
+
+def test_replay_restores_guardrail_state(clock):
+    before = datetime(2026, 3, 2, 8, 59)
+    guardrails._scale_history["shop/web"] = deque([(before, "up")])
+    guardrails._flapping.add("shop/web")
+    guardrails._last_scale_time, guardrails._last_scale_action = before, "up"
+    guardrails._history_loaded = False
+    adaptive = guardrails.ADAPTIVE_COOLDOWN
+
+    simulate(synthetic_series(days=0.5, step_seconds=60), guardrail_overrides={"ADAPTIVE_COOLDOWN": not adaptive})
+
+    assert guardrails.ADAPTIVE_COOLDOWN == adaptive
+    assert dict(guardrails._scale_history) == {"shop/web": deque([(before, "up")])}
+    assert guardrails._flapping == {"shop/web"}
+    assert (guardrails._last_scale_time, guardrails._last_scale_action) == (before, "up")
+    assert guardrails._history_loaded is False
+
+
+def test_adaptive_cooldown_can_be_swept(clock):
+    series = synthetic_series(days=1, step_seconds=60)
+    policy = ThresholdPolicy(scale_up_pct=60, scale_down_pct=50)
+    overrides = {"COOLDOWN_SECONDS": 30, "SCALEDOWN_COOLDOWN_SECONDS": 30, "SCALEDOWN_MAX_CPU_PCT": 60}
+    adaptive = simulate(series, policy, guardrail_overrides={**overrides, "ADAPTIVE_COOLDOWN": True})
+    fixed = simulate(series, policy, guardrail_overrides={**overrides, "ADAPTIVE_COOLDOWN": False})
+    assert adaptive["actions"]["scale_down"] < fixed["actions"]["scale_down"]
+
+
+def test_unknown_override_is_rejected(clock):
+    with pytest.raises(ValueError, match="Unknown guardrail override"):
+        simulate(synthetic_series(days=0.1), guardrail_overrides={"COOLDOWN": 1})
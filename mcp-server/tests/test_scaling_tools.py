@@ -0,0 +1,226 @@
+"""Tests for tools.scaling_tools"""
+import asyncio
+
+import guardrails
+from tools.scaling_tools import analyze_pod_imbalance, estimate_schedulable, get_current_state, scale_deployment
+
+GIB = 2 ** 30
+
+
+def node(name, cpu=4.0, memory=8 * GIB, pods=110, used_cpu=0.0, used_memory=0.0, used_pods=0,
+         schedulable=True, labels=None, taints=None):
+    return {
+        "name": name,
+        "schedulable": schedulable,
+        "labels": labels or {},
+        "taints": taints or [],
+        "allocatable": {"cpu_cores": cpu, "memory_bytes": memory, "pods": pods},
+        "requested": {"cpu_cores": used_cpu, "memory_bytes": used_memory, "pods": used_pods},
+    }
+
+
+TEMPLATE = {"requests": {"cpu_cores": 0.5, "memory_bytes": GIB}}
+
+
+# ─── estimate_schedulable ─────────────────────────────────────────────────────
+
+def test_all_pods_fit():
+    result = estimate_schedulable([node("a")], TEMPLATE, 3)
+    assert result["pods_fit"] == 3
+    assert result["placement"] == {"a": 3}
+    assert "limited_by" not in result
+
+
+def test_cpu_is_the_bottleneck():
+    result = estimate_schedulable([node("a", used_cpu=3.2)], TEMPLATE, 3)
+    assert result["pods_fit"] == 1
+    assert result["free_slots"] == 1
+    assert result["limited_by"] == "cpu"
+
+
+def test_memory_and_pod_slots_limit_too():
+    assert estimate_schedulable([node("a", memory=2.5 * GIB)], TEMPLATE, 5)["limited_by"] == "memory"
+    assert estimate_schedulable([node("a", pods=10, used_pods=8)], TEMPLATE, 5)["limited_by"] == "pods"
+
+
+def test_pods_go_to_the_roomiest_node_first():
+    nodes = [node("small", used_cpu=3.0), node("big", cpu=8.0)]
+    result = estimate_schedulable(nodes, TEMPLATE, 10)
+    assert result["placement"] == {"big": 8, "small": 2}
+    assert result["pods_fit"] == 10
+
+
+def test_ineligible_nodes_are_skipped():
+    nodes = [
+        node("cordoned", schedulable=False),
+        node("gpu", labels={"pool": "gpu"}),
+        node("tainted", labels={"pool": "web"}, taints=[{"key": "dedicated", "value": "db", "effect": "NoSchedule"}]),
+        node("ok", labels={"pool": "web"}, cpu=1.0),
+    ]
+    result = estimate_schedulable(nodes, {**TEMPLATE, "node_selector": {"pool": "web"}}, 4)
+    assert result["eligible_nodes"] == 1
+    assert result["placement"] == {"ok": 2}
+
+
+def test_tolerations_admit_tainted_nodes():
+    taint = {"key": "dedicated", "value": "web", "effect": "NoSchedule"}
+    nodes = [node("tainted", taints=[taint])]
+    assert estimate_schedulable(nodes, TEMPLATE, 1)["limited_by"] == "no eligible nodes"
+    exact = {**TEMPLATE, "tolerations": [{"key": "dedicated", "value": "web", "effect": "NoSchedule"}]}
+    exists = {**TEMPLATE, "tolerations": [{"key": "dedicated", "operator": "Exists"}]}
+    wrong_effect = {**TEMPLATE, "tolerations": [{"key": "dedicated", "operator": "Exists", "effect": "NoExecute"}]}
+    assert estimate_schedulable(nodes, exact, 1)["pods_fit"] == 1
+    assert estimate_schedulable(nodes, exists, 1)["pods_fit"] == 1
+    assert estimate_schedulable(nodes, wrong_effect, 1)["pods_fit"] == 0
+
+
+def test_template_without_requests_only_counts_pod_slots():
+    result = estimate_schedulable([node("a", pods=3)], {}, 5)
+    assert result["pods_fit"] == 3
+    assert "note" in result
+
+
+# ─── analyze_pod_imbalance ────────────────────────────────────────────────────
+
+def _imbalance(*cores):
+    return analyze_pod_imbalance([{"pod": f"web-{i}", "value": v} for i, v in enumerate(cores)], {})
+
+
+def test_few_hot_pods_on_a_cool_fleet_are_a_hot_spot():
+    one_of_four = _imbalance(0.19, 0.02, 0.02, 0.02)
+    assert one_of_four["hot_spot"] and one_of_four["hot_pods"] == 1
+    assert one_of_four["median_utilization_percent"] == 10.0
+    assert _imbalance(0.19, 0.19, 0.02, 0.02, 0.02, 0.02)["hot_spot"]
+
+
+def test_half_the_fleet_saturated_is_load_not_skew():
+    half = _imbalance(0.19, 0.19, 0.02, 0.02)
+    assert half["cv"] >= 0.5 and half["hot_pods"] == 2
+    assert not half["hot_spot"]
+    assert not _imbalance(0.19, 0.19, 0.19, 0.02, 0.02)["hot_spot"]
+
+
+def test_even_load_or_too_few_pods_is_no_hot_spot():
+    assert not _imbalance(0.19, 0.18, 0.19, 0.18)["hot_spot"]
+    assert not _imbalance(0.19, 0.01)["hot_spot"]
+
+
+# ─── get_current_state cursors ────────────────────────────────────────────────
+
+def test_state_cursor_returns_only_changes(clock, fake_cluster):
+    cluster, k8s, _ = fake_cluster
+
+    async def run():
+        full = await get_current_state(k8s, "claudescale")
+        assert full["total_deployments"] == 2
+        assert "cursor_reset" not in full
+
+        quiet = await get_current_state(k8s, "claudescale", cursor=full["cursor"])
+        assert (quiet["changes"], quiet["unchanged"], quiet["since"]) == (0, 2, full["cursor"])
+        assert "deployments" not in quiet
+
+        cluster.scale("claudescale", "app-0002", 5)
+        cluster.scale("claudescale-1", "app-0001", 5)  # Other namespace: not in scope
+        delta = await get_current_state(k8s, "claudescale", cursor=quiet["cursor"])
+        assert delta["changes"] == 1
+        assert [(d["name"], d["replicas"]) for d in delta["changed"]] == [("app-0002", 5)]
+        assert delta["added"] == [] and delta["removed"] == []
+
+        # The older cursor still works and sees the same change
+        again = await get_current_state(k8s, "claudescale", cursor=full["cursor"])
+        assert [d["name"] for d in again["changed"]] == ["app-0002"]
+
+    asyncio.run(run())
+
+
+def test_state_long_poll_wakes_on_change(clock, fake_cluster):
+    cluster, k8s, _ = fake_cluster
+
+    async def run():
+        cursor = (await get_current_state(k8s, "claudescale"))["cursor"]
+
+        async def scale_later():
+            await asyncio.sleep(0.3)
+            cluster.scale("claudescale", "demo-app", 4)
+
+        delta, _ = await asyncio.gather(
+            get_current_state(k8s, "claudescale", cursor=cursor, wait_seconds=5), scale_later()
+        )
+        assert [d["name"] for d in delta["changed"]] == ["demo-app"]
+        assert 0 < delta["waited_seconds"] < 4  # Woken by the change, not the timeout
+
+        timed_out = await get_current_state(k8s, "claudescale", cursor=delta["cursor"], wait_seconds=0.5)
+        assert timed_out["changes"] == 0
+        assert timed_out["waited_seconds"] >= 0.5
+
+    asyncio.run(run())
+
+
+def test_unknown_or_foreign_cursor_gets_full_state(clock, fake_cluster):
+    _, k8s, _ = fake_cluster
+
+    async def run():
+        reset = await get_current_state(k8s, "claudescale", cursor="bogus")
+        assert "cursor_reset" in reset and "deployments" in reset
+        other = await get_current_state(k8s, "claudescale-1", cursor=reset["cursor"])
+        assert "cursor_reset" in other
+
+    asyncio.run(run())
+
+
+# ─── scale_deployment on HPA targets ──────────────────────────────────────────
+
+def test_hpa_scale_down_lowers_the_floor_or_refuses(clock, tmp_path):
+    from simulation.fake_servers import FakeCluster, start_fake_servers, write_kubeconfig
+    from utils.kubernetes_client import KubernetesClient
+
+    cluster = FakeCluster(deployments=2, pods=4, hpas=1)
+    write_kubeconfig(str(tmp_path / "kubeconfig"), start_fake_servers(cluster)["kubernetes"])
+    k8s = KubernetesClient(config_file=str(tmp_path / "kubeconfig"), cache_ttl_seconds=0)
+    cluster.scale("claudescale", "demo-app", 5)
+
+    async def run():
+        # HPA above its floor (min 2) on load: no floor to lower, nothing changes
+        held = await scale_deployment(k8s, "demo-app", 4, reason="Load dropped", cpu_utilization_pct=20)
+        assert not held["success"]
+        assert "no floor to lower" in held["error"]
+        assert cluster.get_hpa("claudescale", "demo-app-hpa")["spec"]["minReplicas"] == 2
+        assert "claudescale/demo-app" not in guardrails._scale_history
+
+        # Floor at 5: lowering it is a scale-down, with its guard and cooldown
+        hpa = cluster.get_hpa("claudescale", "demo-app-hpa")
+        hpa["spec"]["minReplicas"] = 5
+        cluster.replace_hpa("claudescale", "demo-app-hpa", hpa)
+        unguarded = await scale_deployment(k8s, "demo-app", 4)
+        assert not unguarded["success"]
+        lowered = await scale_deployment(k8s, "demo-app", 4, reason="Load dropped", cpu_utilization_pct=20)
+        assert lowered["action"] == "hpa_floor_lowered"
+        assert lowered["hpa_after"]["min_replicas"] == 4
+        assert guardrails._scale_history["claudescale/demo-app"][-1][1] == "down"
+
+    asyncio.run(run())
+
+
+def test_long_polls_beyond_the_cap_return_at_once(clock, fake_cluster, monkeypatch):
+    from tools import scaling_tools
+    monkeypatch.setattr(scaling_tools, "STATE_MAX_WATCHES", 1)
+    cluster, k8s, _ = fake_cluster
+
+    async def run():
+        cursor = (await get_current_state(k8s, "claudescale"))["cursor"]
+
+        async def second_then_scale():
+            await asyncio.sleep(0.2)
+            skipped = await get_current_state(k8s, "claudescale", cursor=cursor, wait_seconds=5)
+            cluster.scale("claudescale", "demo-app", 4)
+            return skipped
+
+        waited, skipped = await asyncio.gather(
+            get_current_state(k8s, "claudescale", cursor=cursor, wait_seconds=5), second_then_scale()
+        )
+        assert [d["name"] for d in waited["changed"]] == ["demo-app"]
+        assert skipped["changes"] == 0 and "already waiting" in skipped["wait_error"]
+        assert skipped["waited_seconds"] < 1
+        assert scaling_tools._watches["active"] == 0
+
+    asyncio.run(run())
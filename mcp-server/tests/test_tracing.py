@@ -0,0 +1,81 @@
+"""Tests for utils.tracing"""
+import pytest
+
+from utils import tracing
+
+
+@pytest.fixture
+def tracer():
+    tracing.configure_tracing(True, sample_rate=1.0)
+    tracing._tracer.recent.clear()
+    yield tracing
+    tracing.configure_tracing(False)
+    tracing._tracer.recent.clear()
+
+
+def _call():
+    with tracing.span("tool"):
+        with tracing.span("kubernetes"):
+            with tracing.span("audit"):
+                pass
+
+
+def test_children_nest_under_root(tracer):
+    _call()
+    (trace,) = tracer.recent_traces(10)
+    assert trace["name"] == "tool"
+    assert [(s["name"], s["depth"]) for s in trace["spans"]] == [("tool", 0), ("kubernetes", 1), ("audit", 2)]
+
+
+def test_unsampled_root_records_no_children(tracer):
+    tracer.configure_tracing(True, sample_rate=0.0)
+    _call()
+    assert tracer.recent_traces(10) == []
+
+
+def test_partial_sampling_keeps_whole_calls(tracer):
+    tracer.configure_tracing(True, sample_rate=0.5)
+    for _ in range(100):
+        _call()
+    traces = tracer.recent_traces(100)
+    assert 0 < len(traces) < 100
+    assert all(t["name"] == "tool" and len(t["spans"]) == 3 for t in traces)
+
+
+def test_error_marks_span_and_propagates(tracer):
+    with pytest.raises(RuntimeError):
+        with tracing.span("tool"):
+            raise RuntimeError("boom")
+    (trace,) = tracer.recent_traces(1)
+    assert trace["status"] == "error"
+    assert trace["spans"][0]["error"] == "RuntimeError: boom"
+
+
+def test_file_export_runs_off_the_calling_thread(tracer, tmp_path, monkeypatch):
+    import json
+    import threading
+    writers = []
+    write = tracing._write_file
+    monkeypatch.setattr(tracing, "_write_file", lambda p: (writers.append(threading.current_thread()), write(p)))
+    tracer.configure_tracing(True, exporter="file", file_path=str(tmp_path / "traces.jsonl"))
+    _call()
+    tracer.flush_exports()
+    (line,) = (tmp_path / "traces.jsonl").read_text().splitlines()
+    assert len(json.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"]) == 3
+    assert writers and threading.current_thread() not in writers
+
+
+def test_full_export_queue_drops_traces(tracer, tmp_path, monkeypatch):
+    import threading
+    release = threading.Event()
+    monkeypatch.setattr(tracing, "_write_file", lambda p: release.wait(5))
+    tracer.configure_tracing(True, exporter="file", file_path=str(tmp_path / "traces.jsonl"), queue_size=1)
+    before = tracer.tracing_status()["dropped_traces"]
+    for _ in range(5):
+        _call()
+    dropped = tracer.tracing_status()["dropped_traces"] - before
+    release.set()
+    tracer.flush_exports()
+    # One trace in the worker, one queued; the rest dropped
+    assert dropped >= 3
+    assert len(tracer.recent_traces(10)) == 5
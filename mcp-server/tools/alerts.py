@@ -0,0 +1,523 @@
+"""
+Push-based scaling triggers for ClaudeScale
+
+An embedded webhook endpoint accepts Alertmanager webhook payloads (or
+anything that POSTs the same JSON), so a load alert reaches the server
+when it fires instead of when the LLM next polls get_metrics.
+
+Alerts are deduplicated by fingerprint and grouped per target deployment
+(cluster, namespace, deployment). Repeats of a firing alert only refresh
+it; resolved alerts are dropped. Pending groups are returned by the
+claudescale_pending_alerts tool. With ALERT_ACTION="evaluate" a group that
+gets a new firing alert is also evaluated after a short group wait: fresh
+metrics are pulled and, if CPU is above the scale-up threshold, the
+deployment is scaled up one step through scale_deployment, with every
+guardrail (limits, cooldown, node capacity, HPA-aware mode) applying as
+for a tool call.
+
+The endpoint runs on the MCP server's event loop (asyncio streams, one
+request per connection), so evaluations share the per-deployment scale
+locks with tool calls. State is kept in memory only.
+"""
+import asyncio
+import hmac
+import ipaddress
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from guardrails import audit_log
+from tools.impact_analysis import impact_analyzer
+from tools.scaling_tools import CPU_HIGH_PCT, get_metrics, scale_deployment
+from utils.rate_limit import PRIORITY_WRITE, request_priority
+from utils.self_metrics import ALERTS_RECEIVED
+
+logger = logging.getLogger("claudescale.alerts")
+
+# ─── Configuration ────────────────────────────────────────────────────────────
+
+ALERT_ACTIONS = ("notify", "evaluate")
+ALERT_WEBHOOK_PATH = "/alerts"
+ALERT_MAX_BODY_BYTES = 1 << 20   # Larger payloads are rejected (413)
+ALERT_READ_TIMEOUT_SECONDS = 10.0
+ALERT_MAX_TRACKED = 1000         # Firing alerts kept across all groups
+ALERT_SCALE_STEP = 1             # Replicas added by an alert-triggered evaluation
+ALERT_SUMMARY_MAX_CHARS = 200    # Annotation text kept per alert (it reaches the LLM)
+
+# Labels that name the target deployment, in order of preference
+DEPLOYMENT_LABELS = ("deployment", "app")
+SEVERITY_ORDER = {"critical": 0, "page": 0, "error": 1, "warning": 2, "info": 3}
+
+
+# ─── Alert store ──────────────────────────────────────────────────────────────
+
+class AlertStore:
+    """
+    Firing alerts, deduplicated by fingerprint and grouped per deployment
+    """
+
+    def __init__(self, stale_seconds: float = 3600.0, max_tracked: int = ALERT_MAX_TRACKED):
+        """
+        Args:
+            stale_seconds: Firing alerts not re-sent for this long are
+                dropped (Alertmanager re-sends every repeat_interval)
+            max_tracked: Most firing alerts kept; the oldest are dropped
+        """
+        self.stale_seconds = stale_seconds
+        self.max_tracked = max_tracked
+        self.received = 0
+        self.duplicates = 0
+        self.resolved = 0
+        # (cluster, namespace, deployment) -> group dict
+        self._groups: Dict[tuple, Dict[str, Any]] = {}
+
+    @staticmethod
+    def _fingerprint(alert: Dict[str, Any]) -> str:
+        if alert.get("fingerprint") and isinstance(alert["fingerprint"], str):
+            return alert["fingerprint"]
+        return json.dumps(alert.get("labels") or {}, sort_keys=True)
+
+    @staticmethod
+    def _target(labels: Dict[str, str], clusters: List[str], default_cluster: str) -> tuple:
+        cluster = labels.get("cluster") if labels.get("cluster") in clusters else default_cluster
+        deployment = next((labels[k] for k in DEPLOYMENT_LABELS if labels.get(k)), None)
+        return cluster, labels.get("namespace"), deployment
+
+    def ingest(self, payload: Dict[str, Any], clusters: List[str], default_cluster: str) -> Dict[str, Any]:
+        """
+        Apply one webhook payload
+
+        Args:
+            payload: Alertmanager webhook body ({"alerts": [...], ...})
+            clusters: Configured cluster names (matched against a
+                "cluster" label)
+            default_cluster: Cluster for alerts without a known "cluster"
+
+        Returns:
+            Counts of new, repeated and resolved alerts, of ignored ones
+            (not an object, no alertname, or a label that is not a string,
+            which Prometheus never sends),
+            and the groups that got a new firing alert
+
+        Raises:
+            ValueError: If the payload has no alerts list
+        """
+        alerts = payload.get("alerts")
+        if not isinstance(alerts, list):
+            raise ValueError("payload has no 'alerts' list")
+
+        now = time.time()
+        summary = {"new": 0, "repeated": 0, "resolved": 0, "ignored": 0}
+        triggered = []
+        for alert in alerts:
+            labels = alert.get("labels") if isinstance(alert, dict) else None
+            if (
+                not isinstance(labels, dict)
+                or not labels.get("alertname")
+                or not all(isinstance(k, str) and isinstance(v, str) for k, v in labels.items())
+            ):
+                summary["ignored"] += 1
+                continue
+            key = self._target(labels, clusters, default_cluster)
+            fingerprint = self._fingerprint(alert)
+            group = self._groups.get(key)
+
+            if alert.get("status", payload.get("status")) == "resolved":
+                if group and group["alerts"].pop(fingerprint, None):
+                    summary["resolved"] += 1
+                    self.resolved += 1
+                    if not group["alerts"]:
+                        del self._groups[key]
+                continue
+
+            if group is None:
+                group = self._groups[key] = {
+                    "cluster": key[0], "namespace": key[1], "deployment": key[2],
+                    "alerts": {}, "first_seen": now, "evaluation": None
+                }
+            group["last_seen"] = now
+            existing = group["alerts"].get(fingerprint)
+            if existing is not None:
+                existing["last_seen"] = now
+                existing["received"] += 1
+                summary["repeated"] += 1
+                self.duplicates += 1
+                continue
+
+            annotations = alert.get("annotations")
+            annotations = annotations if isinstance(annotations, dict) else {}
+            summary_text = annotations.get("summary") or annotations.get("description")
+            group["alerts"][fingerprint] = {
+                "alertname": labels["alertname"],
+                "severity": labels.get("severity"),
+                "summary": str(summary_text)[:ALERT_SUMMARY_MAX_CHARS] if summary_text else None,
+                "labels": labels,
+                "starts_at": alert.get("startsAt"),
+                "first_seen": now,
+                "last_seen": now,
+                "received": 1
+            }
+            summary["new"] += 1
+            self.received += 1
+            if key not in triggered:
+                triggered.append(key)
+
+        self._prune(now)
+        summary["triggered"] = [k for k in triggered if k in self._groups]
+        return summary
+
+    def _prune(self, now: float):
+        """Drop stale alerts, then the oldest ones beyond max_tracked."""
+        for key, group in list(self._groups.items()):
+            for fp, alert in list(group["alerts"].items()):
+                if now - alert["last_seen"] > self.stale_seconds:
+                    del group["alerts"][fp]
+            if not group["alerts"]:
+                del self._groups[key]
+
+        tracked = [(a["last_seen"], key, fp) for key, g in self._groups.items() for fp, a in g["alerts"].items()]
+        for _, key, fp in sorted(tracked)[:max(0, len(tracked) - self.max_tracked)]:
+            group = self._groups[key]
+            del group["alerts"][fp]
+            if not group["alerts"]:
+                del self._groups[key]
+
+    def group(self, key: tuple) -> Optional[Dict[str, Any]]:
+        return self._groups.get(key)
+
+    def pending(
+        self,
+        cluster: Optional[str] = None,
+        namespace: Optional[str] = None,
+        acknowledge: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Pending groups, most severe and oldest first
+
+        Args:
+            cluster: Only this cluster
+            namespace: Only this namespace
+            acknowledge: Remove the returned groups (an alert that is
+                still firing reappears when Alertmanager re-sends it)
+
+        Returns:
+            List of group dicts with their alerts and last evaluation; the
+            annotation text is returned as "untrusted_summary", since
+            whoever can reach the webhook writes it
+        """
+        self._prune(time.time())
+        selected = [
+            (key, g) for key, g in self._groups.items()
+            if (cluster is None or g["cluster"] == cluster) and (namespace is None or g["namespace"] == namespace)
+        ]
+
+        def rank(g):
+            return min(SEVERITY_ORDER.get(a["severity"], 4) for a in g["alerts"].values())
+
+        result = []
+        for key, g in sorted(selected, key=lambda item: (rank(item[1]), item[1]["first_seen"])):
+            result.append({
+                "cluster": g["cluster"],
+                "namespace": g["namespace"],
+                "deployment": g["deployment"],
+                "first_seen": datetime.fromtimestamp(g["first_seen"]).isoformat(),
+                "last_seen": datetime.fromtimestamp(g["last_seen"]).isoformat(),
+                "alerts": [
+                    {
+                        "alertname": a["alertname"],
+                        "severity": a["severity"],
+                        "untrusted_summary": a["summary"],
+                        "starts_at": a["starts_at"],
+                        "received": a["received"],
+                        "labels": a["labels"]
+                    }
+                    for a in sorted(g["alerts"].values(), key=lambda a: a["first_seen"])
+                ],
+                "evaluation": g["evaluation"]
+            })
+            if acknowledge:
+                del self._groups[key]
+        return result
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "groups": len(self._groups),
+            "firing": sum(len(g["alerts"]) for g in self._groups.values()),
+            "received": self.received,
+            "duplicates": self.duplicates,
+            "resolved": self.resolved
+        }
+
+
+# ─── Evaluation ───────────────────────────────────────────────────────────────
+
+async def evaluate_alert_group(
+    cluster,
+    namespace: str,
+    deployment: str,
+    alertnames: List[str],
+    hpa_aware: bool = True
+) -> Dict[str, Any]:
+    """
+    Re-check a deployment an alert fired for, and scale it up if needed
+
+    The alert is only a trigger: the decision uses fresh metrics (never
+    the stale fallback) and the same threshold as get_metrics, and the scale goes through
+    scale_deployment, so a stale or noisy alert cannot bypass a guardrail.
+
+    Args:
+        cluster: Pooled clients of the cluster the alert names
+        namespace: Deployment namespace
+        deployment: Deployment name
+        alertnames: Firing alerts, quoted in the scaling reason
+        hpa_aware: Passed on to scale_deployment
+
+    Returns:
+        Dict with the decision ("no_action", "scaled", "blocked" or
+        "error"), CPU utilization, and the scale result if any
+    """
+    # Never act on stored values: an outage raises and the evaluation is an "error"
+    metrics = await get_metrics(cluster.prom, namespace, deployment, k8s_client=cluster.k8s, allow_stale=False)
+    cpu = metrics["cpu"]["utilization_percent"]
+    if metrics["analysis"]["recommendation"] != "scale_up":
+        # "rebalance" (per-pod hot spot) explains itself; otherwise CPU is just not high
+        reason = metrics["analysis"].get("reason") or f"CPU at {cpu}% is below the {CPU_HIGH_PCT}% scale-up threshold"
+        return {"decision": "no_action", "cpu_utilization_pct": cpu, "reason": reason}
+
+    current = await asyncio.to_thread(cluster.k8s.get_deployment, deployment, namespace)
+    if not current:
+        return {"decision": "error", "reason": f"Deployment '{deployment}' not found in namespace '{namespace}'"}
+
+    with request_priority(PRIORITY_WRITE):
+        result = await scale_deployment(
+            cluster.k8s,
+            deployment=deployment,
+            replicas=current["replicas"] + ALERT_SCALE_STEP,
+            namespace=namespace,
+            reason=f"Alertmanager: {', '.join(alertnames)} firing, CPU at {cpu}%",
+            cpu_utilization_pct=cpu,
+            hpa_aware=hpa_aware
+        )
+    impact_analyzer.schedule(cluster.name, cluster.k8s, cluster.prom, result)
+    return {
+        "decision": "scaled" if result.get("success") and result.get("action") != "no_change" else "blocked",
+        "cpu_utilization_pct": cpu,
+        "reason": result.get("error") or result.get("message") or result.get("reason"),
+        "result": result
+    }
+
+
+# ─── Webhook endpoint ─────────────────────────────────────────────────────────
+
+_REASONS = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+            405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class AlertReceiver:
+    """
+    Alertmanager webhook endpoint plus the alert store and evaluations
+    """
+
+    def __init__(self):
+        self.store = AlertStore()
+        self.clusters = None
+        self.action = "notify"
+        self.group_wait_seconds = 10.0
+        self.hpa_aware = True
+        self.token: Optional[str] = None
+        self.evaluations = 0
+        self.address: Optional[str] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._scheduled: Dict[tuple, asyncio.Task] = {}
+
+    def receive(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Store a webhook payload and queue evaluations; returns the ingest summary."""
+        names = self.clusters.names() if self.clusters else []
+        default = self.clusters.default if self.clusters else "default"
+        summary = self.store.ingest(payload, names, default)
+        for status in ("new", "repeated", "resolved", "ignored"):
+            if summary[status]:
+                ALERTS_RECEIVED.inc(status, amount=summary[status])
+
+        triggered = summary.pop("triggered")
+        if self.action == "evaluate":
+            for key in triggered:
+                if key[1] and key[2] and key not in self._scheduled:
+                    self._scheduled[key] = asyncio.get_running_loop().create_task(self._evaluate(key))
+        summary["evaluations_queued"] = len(self._scheduled)
+        return summary
+
+    async def _evaluate(self, key: tuple):
+        """Evaluate one group once its group wait has passed."""
+        try:
+            await asyncio.sleep(self.group_wait_seconds)
+            group = self.store.group(key)
+            if group is None:  # Resolved meanwhile
+                return
+            alertnames = sorted({a["alertname"] for a in group["alerts"].values()})
+            try:
+                evaluation = await evaluate_alert_group(
+                    self.clusters.get(key[0]), key[1], key[2], alertnames, self.hpa_aware
+                )
+            except Exception as e:
+                logger.warning(f"Alert evaluation failed for {key[1]}/{key[2]}: {e}")
+                evaluation = {"decision": "error", "reason": f"{type(e).__name__}: {e}"}
+
+            self.evaluations += 1
+            evaluation["at"] = datetime.now().isoformat()
+            group = self.store.group(key)
+            if group is not None:
+                group["evaluation"] = {k: v for k, v in evaluation.items() if k != "result"}
+            audit_log("alert_evaluated", {
+                "cluster": key[0],
+                "namespace": key[1],
+                "deployment": key[2],
+                "alerts": alertnames,
+                "decision": evaluation["decision"],
+                "cpu_utilization_pct": evaluation.get("cpu_utilization_pct"),
+                "reason": evaluation.get("reason")
+            })
+        finally:
+            self._scheduled.pop(key, None)
+
+    def _route(self, method: str, path: str, headers: Dict[str, str], body: bytes) -> tuple:
+        path = path.split("?", 1)[0]
+        if path == "/healthz":
+            return 200, {"status": "ok"}
+        if path != ALERT_WEBHOOK_PATH:
+            return 404, {"error": f"unknown path {path}"}
+        if method != "POST":
+            return 405, {"error": "use POST"}
+        if self.token and not hmac.compare_digest(
+            headers.get("authorization", ""), f"Bearer {self.token}"
+        ):
+            return 401, {"error": "missing or wrong bearer token"}
+        try:
+            payload = json.loads(body)
+            return 200, self.receive(payload if isinstance(payload, dict) else {})
+        except ValueError as e:
+            return 400, {"error": f"invalid Alertmanager payload: {e}"}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve one HTTP/1.1 request, then close the connection."""
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), ALERT_READ_TIMEOUT_SECONDS)
+            method, path, _ = request_line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while True:
+                line = await asyncio.wait_for(reader.readline(), ALERT_READ_TIMEOUT_SECONDS)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            length = int(headers.get("content-length") or 0)
+            if length > ALERT_MAX_BODY_BYTES:
+                status, response = 413, {"error": f"body over {ALERT_MAX_BODY_BYTES} bytes"}
+            else:
+                body = await asyncio.wait_for(reader.readexactly(length), ALERT_READ_TIMEOUT_SECONDS)
+                status, response = self._route(method, path, headers, body)
+        except (ValueError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            status, response = 400, {"error": "malformed HTTP request"}
+        except Exception as e:
+            # Always answer: Alertmanager retries on 5xx, and an unanswered
+            # connection only shows up as a loop warning
+            logger.exception("Alert webhook request failed")
+            status, response = 500, {"error": f"{type(e).__name__}: {e}"}
+
+        data = json.dumps(response).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS[status]}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode() + data
+        )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def start(self, host: str, port: int) -> bool:
+        """
+        Listen for webhooks on the running event loop
+
+        Args:
+            host: Bind address; anything but loopback needs a token
+            port: TCP port (0 disables the endpoint)
+
+        Returns:
+            True if listening (False if disabled, the port is unavailable,
+            or the address is reachable from other hosts without a token)
+        """
+        if not port:
+            return False
+        if not self.token and not _is_loopback(host):
+            # Alert text reaches the LLM, so an open endpoint is an injection channel
+            logger.warning(
+                f"Alert webhook disabled: {host} is not a loopback address and "
+                f"ALERT_WEBHOOK_TOKEN is not set"
+            )
+            return False
+        try:
+            self._server = await asyncio.start_server(self._handle, host, port)
+        except OSError as e:
+            logger.warning(f"Alert webhook disabled, cannot bind {host}:{port}: {e}")
+            return False
+        bound = self._server.sockets[0].getsockname()
+        self.address = f"http://{bound[0]}:{bound[1]}{ALERT_WEBHOOK_PATH}"
+        return True
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "listening": self.address,
+            "action": self.action,
+            "evaluations_pending": len(self._scheduled),
+            "evaluations_done": self.evaluations,
+            **self.store.status()
+        }
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+alert_receiver = AlertReceiver()
+
+
+def configure_alerts(
+    clusters,
+    action: str = "notify",
+    group_wait_seconds: float = 10.0,
+    stale_seconds: float = 3600.0,
+    hpa_aware: bool = True,
+    token: Optional[str] = None
+):
+    """
+    Configure the process-wide alert receiver
+
+    Args:
+        clusters: ClusterPool alerts are matched against (by "cluster" label)
+        action: "notify" only keeps alerts for claudescale_pending_alerts;
+            "evaluate" also re-checks metrics and scales up when warranted
+        group_wait_seconds: Wait after a new alert before evaluating, so a
+            burst of alerts for one deployment causes one evaluation
+        stale_seconds: Drop firing alerts not re-sent for this long
+        hpa_aware: Passed on to scale_deployment by evaluations
+        token: Bearer token webhook requests must carry (None = no auth)
+    """
+    if action not in ALERT_ACTIONS:
+        raise ValueError(f"Unknown alert action '{action}' (expected one of {', '.join(ALERT_ACTIONS)})")
+    alert_receiver.clusters = clusters
+    alert_receiver.action = action
+    alert_receiver.group_wait_seconds = group_wait_seconds
+    alert_receiver.store.stale_seconds = stale_seconds
+    alert_receiver.hpa_aware = hpa_aware
+    alert_receiver.token = token or None
@@ -0,0 +1,371 @@
+"""
+Scale-event impact analysis for ClaudeScale
+
+Every executed scaling action queues a job. Once the "after" window has
+passed, the job compares per-pod CPU utilization before and after the
+action (range queries), measures how long the new pods took to become
+ready, and checks the audit log for a follow-up action on the same
+deployment. The result is appended to the audit log as a "scale_impact"
+entry that points at the action (deployment + action timestamp);
+generate_report summarizes the recent ones so step sizes and cooldowns
+can be tuned from data.
+
+Jobs run on one daemon thread, since the clients block anyway. Pending
+jobs are kept in memory only: actions taken shortly before a restart
+are not analyzed.
+"""
+import heapq
+import itertools
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from statistics import median
+from typing import Any, Dict, List, Optional
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from guardrails import audit_log, get_recent_audit
+from tools.scaling_tools import CPU_HIGH_PCT, CPU_LIMIT_CORES
+from utils.prometheus_client import CPU_RATE_WINDOW_SECONDS, cpu_usage_query
+
+logger = logging.getLogger("claudescale.impact")
+
+# ─── Configuration ────────────────────────────────────────────────────────────
+
+IMPACT_WINDOW_SECONDS = 300.0  # Length of the before and after windows
+IMPACT_SETTLE_SECONDS = 60.0   # Skipped after the action (pods starting/warming up)
+IMPACT_STEP_SECONDS = 15.0     # Range query resolution
+IMPACT_MAX_PENDING = 200       # Queued jobs beyond this are dropped
+UP_ACTIONS = ("scaled_up", "hpa_floor_raised")
+DOWN_ACTIONS = ("scaled_down", "hpa_floor_lowered")
+EXECUTED_ACTIONS = UP_ACTIONS + DOWN_ACTIONS
+
+
+# ─── Measurements ─────────────────────────────────────────────────────────────
+
+def measure_window(
+    prom_client,
+    namespace: str,
+    deployment: str,
+    start: datetime,
+    end: datetime,
+    step_seconds: float = IMPACT_STEP_SECONDS
+) -> Optional[Dict[str, Any]]:
+    """
+    Per-pod CPU over a time window, from one per-pod range query (the
+    same rate window as get_metrics, see cpu_usage_query)
+
+    Returns:
+        Average per-pod cores and utilization (mean over steps of the
+        mean across pods), the busiest step, the average pod count and
+        total cores; None if Prometheus has no samples in the window
+    """
+    query = cpu_usage_query(namespace, f"{deployment}.*")
+    series = prom_client.query_range(query, start, end, step=step_seconds)
+
+    per_step: Dict[float, List[float]] = {}
+    for s in series:
+        for t, v in zip(s["timestamps"], s["values"]):
+            per_step.setdefault(t, []).append(v)
+    if not per_step:
+        return None
+
+    step_means = [sum(v) / len(v) for v in per_step.values()]
+    avg_cores = sum(step_means) / len(step_means)
+    return {
+        "avg_cores_per_pod": round(avg_cores, 4),
+        "utilization_pct": round(avg_cores / CPU_LIMIT_CORES * 100, 1),
+        "max_utilization_pct": round(max(step_means) / CPU_LIMIT_CORES * 100, 1),
+        "avg_pods": round(sum(len(v) for v in per_step.values()) / len(per_step), 1),
+        "total_cores": round(sum(sum(v) for v in per_step.values()) / len(per_step), 4)
+    }
+
+
+def _time_to_ready(pods: List[Dict], action_time: datetime) -> Dict[str, Any]:
+    """Seconds from the action until each pod started by it was ready."""
+    action_utc = action_time.astimezone()
+    started_after = [
+        p for p in pods
+        if p.get("start_time")
+        and datetime.fromisoformat(p["start_time"]) >= action_utc - timedelta(seconds=5)
+    ]
+    seconds = [
+        max(0.0, (datetime.fromisoformat(p["ready_since"]) - action_utc).total_seconds())
+        for p in started_after if p.get("ready") and p.get("ready_since")
+    ]
+    return {
+        "new_pods": len(started_after),
+        "ready": len(seconds),
+        "not_ready": len(started_after) - len(seconds),
+        "avg_seconds": round(sum(seconds) / len(seconds), 1) if seconds else None,
+        "max_seconds": round(max(seconds), 1) if seconds else None
+    }
+
+
+def _after_window_offset(settle_seconds: float) -> float:
+    """
+    Seconds from the action to the after window: the settle time, but no
+    less than the CPU rate window, so after-samples do not average in
+    pre-action usage
+    """
+    return max(settle_seconds, CPU_RATE_WINDOW_SECONDS)
+
+
+def _follow_up(
+    namespace: str,
+    deployment: str,
+    action: str,
+    new_replicas: int,
+    action_time: datetime,
+    until: datetime
+) -> Optional[Dict]:
+    """First later scaling action on the same deployment, up to `until`."""
+    recent = get_recent_audit(
+        500, events={"scale_executed", "hpa_tuned"},
+        since=action_time - timedelta(seconds=2), deployment=deployment, namespace=namespace
+    )
+    for entry in recent:
+        when = datetime.fromisoformat(entry["timestamp"])
+        if (entry.get("action") == action and entry.get("new_replicas", new_replicas) == new_replicas
+                and abs((when - action_time).total_seconds()) < 2):
+            continue  # The audit entry of the action itself
+        if action_time < when <= until:
+            return {
+                "action": entry.get("action"),
+                "after_seconds": round((when - action_time).total_seconds(), 1),
+                "timestamp": entry["timestamp"]
+            }
+    return None
+
+
+def analyze_scale_event(
+    k8s_client,
+    prom_client,
+    action: Dict[str, Any],
+    window_seconds: float = IMPACT_WINDOW_SECONDS,
+    settle_seconds: float = IMPACT_SETTLE_SECONDS,
+    step_seconds: float = IMPACT_STEP_SECONDS
+) -> Dict[str, Any]:
+    """
+    Measure what one scaling action did
+
+    Args:
+        k8s_client: Kubernetes client instance
+        prom_client: Prometheus client instance
+        action: Successful scale_deployment/tune_hpa result
+        window_seconds: Length of the before and after windows
+        settle_seconds: Gap after the action before the after window (at
+            least the CPU rate window)
+        step_seconds: Range query resolution
+
+    Returns:
+        Dict with before/after utilization, the change expected if demand
+        stayed flat, time-to-ready of new pods, any follow-up action and
+        a verdict
+    """
+    namespace, deployment = action["namespace"], action["deployment"]
+    at = datetime.fromisoformat(action["timestamp"])
+    after_start = at + timedelta(seconds=_after_window_offset(settle_seconds))
+    after_end = after_start + timedelta(seconds=window_seconds)
+    previous, new = action["previous_replicas"], action["new_replicas"]
+
+    before = measure_window(prom_client, namespace, deployment,
+                            at - timedelta(seconds=window_seconds), at, step_seconds)
+    after = measure_window(prom_client, namespace, deployment, after_start, after_end, step_seconds)
+    ready = _time_to_ready(k8s_client.get_pods(deployment, namespace), at) if new > previous else None
+    follow_up = _follow_up(namespace, deployment, action["action"], new, at, after_end)
+
+    result: Dict[str, Any] = {
+        "namespace": namespace,
+        "deployment": deployment,
+        "action": action["action"],
+        "action_timestamp": action["timestamp"],
+        "previous_replicas": previous,
+        "new_replicas": new,
+        "before": before,
+        "after": after,
+        "time_to_ready": ready,
+        "follow_up": follow_up
+    }
+    if before is None or after is None:
+        result["verdict"] = "no_data"
+        return result
+
+    # If demand had stayed flat, per-pod load would scale with previous/new
+    expected = before["utilization_pct"] * previous / new if new else before["utilization_pct"]
+    change = after["utilization_pct"] - before["utilization_pct"]
+    result.update({
+        "utilization_change_pct": round(change, 1),
+        "expected_utilization_pct": round(expected, 1),
+        "demand_change_pct": (
+            round((after["total_cores"] - before["total_cores"]) / before["total_cores"] * 100, 1)
+            if before["total_cores"] else None
+        ),
+        # 1.0 = the change in per-pod load was what the replica change alone predicts
+        "effectiveness": (
+            round(change / (expected - before["utilization_pct"]), 2) + 0.0
+            if abs(expected - before["utilization_pct"]) >= 0.1 else None
+        )
+    })
+
+    scaled_up = new > previous
+    if follow_up and follow_up["action"] in EXECUTED_ACTIONS:
+        follow_up_up = follow_up["action"] in UP_ACTIONS
+        result["verdict"] = "insufficient" if follow_up_up == scaled_up else "reverted"
+    elif scaled_up:
+        result["verdict"] = "helped" if change < 0 else "no_effect"
+    else:
+        result["verdict"] = "ok" if after["max_utilization_pct"] <= CPU_HIGH_PCT else "overloaded"
+    return result
+
+
+def summarize_impacts(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Aggregate scale_impact audit entries for reports
+
+    Returns:
+        Counts per verdict, follow-up rate, median utilization change and
+        effectiveness per direction, and median/max time-to-ready
+    """
+    summary: Dict[str, Any] = {"analyzed": len(entries), "verdicts": {}}
+    for e in entries:
+        summary["verdicts"][e.get("verdict", "unknown")] = summary["verdicts"].get(e.get("verdict", "unknown"), 0) + 1
+    if not entries:
+        return summary
+
+    summary["follow_up_rate"] = round(sum(1 for e in entries if e.get("follow_up")) / len(entries), 2)
+    for direction, is_up in (("up", True), ("down", False)):
+        group = [e for e in entries if e.get("utilization_change_pct") is not None
+                 and (e["new_replicas"] > e["previous_replicas"]) == is_up]
+        effectiveness = [e["effectiveness"] for e in group if e.get("effectiveness") is not None]
+        summary[f"scale_{direction}"] = {
+            "count": len(group),
+            "median_utilization_change_pct": round(median(e["utilization_change_pct"] for e in group), 1) if group else None,
+            "median_effectiveness": round(median(effectiveness), 2) if effectiveness else None
+        }
+    ready = [e["time_to_ready"]["max_seconds"] for e in entries
+             if e.get("time_to_ready") and e["time_to_ready"].get("max_seconds") is not None]
+    summary["time_to_ready_seconds"] = {
+        "median": round(median(ready), 1) if ready else None,
+        "max": max(ready) if ready else None
+    }
+    return summary
+
+
+# ─── Background job ───────────────────────────────────────────────────────────
+
+class ImpactAnalyzer:
+    """
+    Queue of pending analyses, run on a daemon thread when their after
+    window has passed
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = IMPACT_WINDOW_SECONDS,
+        settle_seconds: float = IMPACT_SETTLE_SECONDS,
+        step_seconds: float = IMPACT_STEP_SECONDS,
+        max_pending: int = IMPACT_MAX_PENDING
+    ):
+        self.enabled = True
+        self.window_seconds = window_seconds
+        self.settle_seconds = settle_seconds
+        self.step_seconds = step_seconds
+        self.max_pending = max_pending
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+
+        self._pending: List[tuple] = []  # (due monotonic time, seq, job)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def schedule(self, cluster: str, k8s_client, prom_client, action: Dict[str, Any]) -> bool:
+        """
+        Queue the analysis of an executed action
+
+        Args:
+            cluster: Cluster name the action ran in
+            k8s_client: That cluster's Kubernetes client
+            prom_client: That cluster's Prometheus client
+            action: The tool's result
+
+        Returns:
+            True if queued (False if disabled, not an executed action, or
+            the queue is full)
+        """
+        if not self.enabled or not action.get("success") or action.get("action") not in EXECUTED_ACTIONS:
+            return False
+        delay = _after_window_offset(self.settle_seconds) + self.window_seconds + self.step_seconds
+        with self._cond:
+            if len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                logger.warning(f"Impact analysis queue full, skipping {action['deployment']}")
+                return False
+            job = {"cluster": cluster, "k8s": k8s_client, "prom": prom_client, "action": action}
+            heapq.heappush(self._pending, (time.monotonic() + delay, next(self._seq), job))
+            self._cond.notify()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="claudescale-impact", daemon=True)
+                self._thread.start()
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending or self._pending[0][0] > time.monotonic():
+                    self._cond.wait(self._pending[0][0] - time.monotonic() if self._pending else None)
+                _, _, job = heapq.heappop(self._pending)
+            self._analyze(job)
+
+    def _analyze(self, job: Dict[str, Any]):
+        action = job["action"]
+        try:
+            impact = analyze_scale_event(
+                job["k8s"], job["prom"], action,
+                window_seconds=self.window_seconds,
+                settle_seconds=self.settle_seconds,
+                step_seconds=self.step_seconds
+            )
+        except Exception as e:
+            self.failed += 1
+            logger.warning(f"Impact analysis failed for {action['namespace']}/{action['deployment']}: {e}")
+            return
+        self.completed += 1
+        audit_log("scale_impact", {"cluster": job["cluster"], **impact})
+
+    def status(self) -> Dict[str, Any]:
+        with self._cond:
+            next_due = self._pending[0][0] - time.monotonic() if self._pending else None
+            return {
+                "enabled": self.enabled,
+                "pending": len(self._pending),
+                "next_due_in_seconds": round(max(0.0, next_due), 1) if next_due is not None else None,
+                "completed": self.completed,
+                "failed": self.failed,
+                "dropped": self.dropped
+            }
+
+
+impact_analyzer = ImpactAnalyzer()
+
+
+def configure_impact_analysis(
+    enabled: bool = True,
+    window_seconds: float = IMPACT_WINDOW_SECONDS,
+    settle_seconds: float = IMPACT_SETTLE_SECONDS
+):
+    """
+    Configure the process-wide analyzer
+
+    Args:
+        enabled: Queue analyses at all
+        window_seconds: Length of the before and after windows
+        settle_seconds: Gap after the action before the after window
+    """
+    impact_analyzer.enabled = enabled
+    impact_analyzer.window_seconds = window_seconds
+    impact_analyzer.settle_seconds = settle_seconds
@@ -0,0 +1,355 @@
+"""
+Scheduled pre-scaling for ClaudeScale
+
+Deployments with a pre-scaling profile (guardrails.PRESCALE_PROFILES /
+PRESCALE_PROFILES_FILE: cron windows with a minimum replica count) get
+their floor applied ahead of each window. A loop on the MCP server's
+event loop checks the active floors every PRESCALE_CHECK_SECONDS and
+scales any deployment that is below its floor up to it through
+scale_deployment, so replica limits, node capacity and HPA-aware mode
+apply as for a tool call; an attempt that is blocked is retried on the
+next check.
+
+Floor raises stay out of the shared cooldown: each one only waits for its
+own deployment's cooldown and only holds that deployment back, so many
+deployments can be raised in the same check, and a raise does not delay
+scaling elsewhere (by the LLM or an alert).
+
+While a window is active the scale-down guard refuses to go below its
+floor. Nothing is scaled down when it closes: the usual scale-down path
+takes over. An HPA's minReplicas raised for a window is the exception, as
+nothing else would ever lower it: its pre-window value is recorded in the
+audit log and restored once the window has closed, through scale_deployment
+and its scale-down guard (left alone if something else moved the floor
+meanwhile).
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from guardrails import active_floor, audit_log, get_recent_audit, prescale_profiles, resolve_replica_limits
+import guardrails
+from tools.impact_analysis import impact_analyzer
+from tools.scaling_tools import scale_deployment
+from utils.rate_limit import PRIORITY_WRITE, request_priority
+
+logger = logging.getLogger("claudescale.prescaling")
+
+PRESCALE_RESOLVE_SECONDS = 300  # Reuse of the listing that finds deployments for "name" profiles
+PRESCALE_RESTORE_LOOKBACK = 500  # Audit entries read at start for HPA floors still to restore
+
+
+class PrescaleScheduler:
+    """
+    Periodically raises deployments to their active scheduled floor
+    """
+
+    def __init__(self, check_seconds: float = 60.0, hpa_aware: bool = True):
+        """
+        Args:
+            check_seconds: Time between checks (0 disables the scheduler)
+            hpa_aware: Passed on to scale_deployment
+        """
+        self.clusters = None
+        self.check_seconds = check_seconds
+        self.hpa_aware = hpa_aware
+        self.checks = 0
+        self.applied = 0
+        self.blocked = 0
+        self.restored = 0
+        self.last_check: Optional[str] = None
+        self.recent: deque = deque(maxlen=20)
+        # (cluster, namespace, deployment) -> HPA floor to restore when the window closes
+        self.raised_hpa_floors: Dict[tuple, Dict[str, Any]] = {}
+        self._resolved: Dict[str, tuple] = {}  # cluster -> (monotonic time, {(namespace, deployment)})
+        self._task: Optional[asyncio.Task] = None
+
+    def _targets(self, cluster) -> List[tuple]:
+        """
+        (namespace, deployment) pairs that have a profile; "name" profiles
+        match in every namespace
+
+        The cluster-wide listing that resolves "name" profiles is only made
+        while one of them has an active floor, and is then reused for
+        PRESCALE_RESOLVE_SECONDS.
+        """
+        keys = prescale_profiles()
+        targets = {tuple(key.split("/", 1)) for key in keys if "/" in key}
+        # "" matches no namespaced profile, so this is the bare profile's floor
+        bare = {key for key in keys if "/" not in key and active_floor(key, "") is not None}
+        if not bare:
+            return sorted(targets)
+
+        resolved = self._resolved.get(cluster.name)
+        if resolved is None or time.monotonic() - resolved[0] >= PRESCALE_RESOLVE_SECONDS:
+            names = {
+                (namespace, d["name"])
+                for namespace, deployments in cluster.k8s.list_all_deployments().items()
+                for d in deployments
+            }
+            resolved = self._resolved[cluster.name] = (time.monotonic(), names)
+        targets.update((namespace, name) for namespace, name in resolved[1] if name in bare)
+        return sorted(targets)
+
+    async def check(self) -> List[Dict[str, Any]]:
+        """
+        Apply every active floor once
+
+        Returns:
+            One outcome per deployment that was below its floor
+        """
+        outcomes = []
+        for name in self.clusters.names():
+            cluster = self.clusters.get(name)
+            try:
+                targets = await asyncio.to_thread(self._targets, cluster)
+            except Exception as e:
+                logger.warning(f"Pre-scaling: cannot list deployments in cluster {name}: {e}")
+                continue
+            for namespace, deployment in targets:
+                floor = active_floor(deployment, namespace)
+                if floor is None:
+                    continue
+                try:
+                    outcome = await self._apply(cluster, namespace, deployment, floor)
+                except Exception as e:
+                    logger.warning(f"Pre-scaling {namespace}/{deployment} failed: {e}")
+                    outcome = {"cluster": name, "namespace": namespace, "deployment": deployment,
+                               "applied": False, "detail": f"{type(e).__name__}: {e}"}
+                if outcome is not None:
+                    outcomes.append(outcome)
+                    self.recent.append(outcome)
+            for key in [k for k in self.raised_hpa_floors if k[0] == name]:
+                _, namespace, deployment = key
+                if active_floor(deployment, namespace) is not None:
+                    continue
+                try:
+                    outcome = await self._restore(cluster, namespace, deployment)
+                except Exception as e:
+                    logger.warning(f"Restoring the HPA floor of {namespace}/{deployment} failed: {e}")
+                    outcome = {"cluster": name, "namespace": namespace, "deployment": deployment,
+                               "applied": False, "restored": False, "detail": f"{type(e).__name__}: {e}"}
+                outcomes.append(outcome)
+                self.recent.append(outcome)
+        self.checks += 1
+        self.last_check = datetime.now().isoformat()
+        return outcomes
+
+    async def _apply(self, cluster, namespace: str, deployment: str, floor: Dict[str, Any]) -> Optional[Dict]:
+        current = await asyncio.to_thread(cluster.k8s.get_deployment, deployment, namespace)
+        if not current or current["replicas"] >= floor["min_replicas"]:
+            return None
+
+        # Stay inside the replica limits; a step limit means several checks
+        limits = resolve_replica_limits(deployment, namespace, current.get("annotations"))
+        target = min(floor["min_replicas"], limits["max_replicas"])
+        if limits["max_step_up"]:
+            target = min(target, current["replicas"] + limits["max_step_up"])
+        if target <= current["replicas"]:
+            return None
+
+        with request_priority(PRIORITY_WRITE):
+            result = await scale_deployment(
+                cluster.k8s,
+                deployment=deployment,
+                replicas=target,
+                namespace=namespace,
+                reason=(
+                    f"Pre-scaling profile '{floor['profile']}': at least {floor['min_replicas']} "
+                    f"replicas from {floor['opens']} until {floor['until']}"
+                ),
+                hpa_aware=self.hpa_aware,
+                shared_cooldown=False
+            )
+        impact_analyzer.schedule(cluster.name, cluster.k8s, cluster.prom, result)
+
+        applied = bool(result.get("success")) and result.get("action") != "no_change"
+        if applied and result.get("action") == "hpa_floor_raised":
+            self._record_hpa_floor(cluster.name, namespace, deployment, floor["profile"], result)
+        if applied:
+            self.applied += 1
+        else:
+            self.blocked += 1
+            logger.info(
+                f"Pre-scaling {namespace}/{deployment} to {target} blocked, retrying next check: "
+                f"{result.get('error')}"
+            )
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "cluster": cluster.name,
+            "namespace": namespace,
+            "deployment": deployment,
+            "profile": floor["profile"],
+            "floor": floor["min_replicas"],
+            "previous_replicas": current["replicas"],
+            "target_replicas": target,
+            "applied": applied,
+            "detail": result.get("error") or result.get("action")
+        }
+
+    def _record_hpa_floor(self, cluster: str, namespace: str, deployment: str, profile: str, result: Dict):
+        """Remember the first pre-window minReplicas of a window, in memory and in the audit log."""
+        record = self.raised_hpa_floors.setdefault((cluster, namespace, deployment), {
+            "min_replicas": result["hpa_before"]["min_replicas"],
+            "profile": profile
+        })
+        record["raised_to"] = result["hpa_after"]["min_replicas"]
+        audit_log("prescale_hpa_floor_raised", {
+            "cluster": cluster,
+            "namespace": namespace,
+            "deployment": deployment,
+            "profile": record["profile"],
+            "pre_window_min_replicas": record["min_replicas"],
+            "raised_to": record["raised_to"]
+        })
+
+    def _forget_hpa_floor(self, key: tuple, restored: bool):
+        record = self.raised_hpa_floors.pop(key)
+        audit_log("prescale_hpa_floor_restored" if restored else "prescale_hpa_floor_released", {
+            "cluster": key[0],
+            "namespace": key[1],
+            "deployment": key[2],
+            "profile": record["profile"],
+            "pre_window_min_replicas": record["min_replicas"]
+        })
+
+    def load_raised_hpa_floors(self):
+        """Pick up HPA floors raised before a restart and not restored yet."""
+        entries = get_recent_audit(
+            lines=PRESCALE_RESTORE_LOOKBACK,
+            events={"prescale_hpa_floor_raised", "prescale_hpa_floor_restored", "prescale_hpa_floor_released"}
+        )
+        for entry in entries:
+            key = (entry.get("cluster"), entry.get("namespace"), entry.get("deployment"))
+            if entry["event"] != "prescale_hpa_floor_raised":
+                self.raised_hpa_floors.pop(key, None)
+                continue
+            record = self.raised_hpa_floors.setdefault(key, {
+                "min_replicas": entry["pre_window_min_replicas"],
+                "profile": entry.get("profile")
+            })
+            record["raised_to"] = entry["raised_to"]
+
+    async def _restore(self, cluster, namespace: str, deployment: str) -> Dict[str, Any]:
+        key = (cluster.name, namespace, deployment)
+        record = self.raised_hpa_floors[key]
+        outcome = {
+            "timestamp": datetime.now().isoformat(),
+            "cluster": cluster.name,
+            "namespace": namespace,
+            "deployment": deployment,
+            "profile": record["profile"],
+            "pre_window_min_replicas": record["min_replicas"]
+        }
+        current, hpa = await asyncio.gather(
+            asyncio.to_thread(cluster.k8s.get_deployment, deployment, namespace),
+            asyncio.to_thread(cluster.k8s.get_hpa_for_deployment, deployment, namespace)
+        )
+        # Gone, already back down, or raised further by someone else: not ours to lower
+        if not current or not hpa or not record["min_replicas"] < hpa["min_replicas"] <= record["raised_to"]:
+            self._forget_hpa_floor(key, restored=False)
+            return {**outcome, "applied": False, "restored": False,
+                    "detail": "HPA floor no longer the one pre-scaling set; left as is"}
+
+        # A step limit means several checks
+        limits = resolve_replica_limits(deployment, namespace, current.get("annotations"))
+        target = max(record["min_replicas"], limits["min_replicas"])
+        if limits["max_step_down"]:
+            target = max(target, hpa["min_replicas"] - limits["max_step_down"])
+        if target >= hpa["min_replicas"]:
+            self._forget_hpa_floor(key, restored=False)
+            return {**outcome, "applied": False, "restored": False,
+                    "detail": f"Replica limits keep the HPA floor at {hpa['min_replicas']}"}
+
+        with request_priority(PRIORITY_WRITE):
+            result = await scale_deployment(
+                cluster.k8s,
+                deployment=deployment,
+                replicas=target,
+                namespace=namespace,
+                reason=(
+                    f"Pre-scaling profile '{record['profile']}' window closed: restoring the HPA's "
+                    f"pre-window minReplicas ({record['min_replicas']})"
+                ),
+                hpa_aware=True,
+                shared_cooldown=False
+            )
+        lowered = bool(result.get("success")) and result.get("action") == "hpa_floor_lowered"
+        restored = lowered and target == record["min_replicas"]
+        if restored:
+            self.restored += 1
+            self._forget_hpa_floor(key, restored=True)
+        elif not lowered:
+            logger.info(
+                f"Restoring the HPA floor of {namespace}/{deployment} to {target} blocked, retrying next "
+                f"check: {result.get('error')}"
+            )
+        return {**outcome, "target_min_replicas": target, "applied": lowered, "restored": restored,
+                "detail": result.get("error") or result.get("action")}
+
+    async def _run(self):
+        while True:
+            try:
+                await self.check()
+            except Exception as e:
+                logger.warning(f"Pre-scaling check failed: {e}")
+            await asyncio.sleep(self.check_seconds)
+
+    def start(self) -> bool:
+        """
+        Start checking on the running event loop
+
+        Returns:
+            False if disabled (no clusters, check_seconds <= 0, or no
+            profiles configured)
+        """
+        if self._task is not None:
+            return True
+        if self.clusters is None or self.check_seconds <= 0:
+            return False
+        if not guardrails.PRESCALE_PROFILES and guardrails.PRESCALE_PROFILES_FILE is None:
+            return False
+        self.load_raised_hpa_floors()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return True
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "check_seconds": self.check_seconds,
+            "profiles": len(prescale_profiles()),
+            "timezone": guardrails.PRESCALE_TIMEZONE,
+            "lead_minutes": guardrails.PRESCALE_LEAD_MINUTES,
+            "checks": self.checks,
+            "last_check": self.last_check,
+            "applied": self.applied,
+            "blocked": self.blocked,
+            "restored": self.restored,
+            "hpa_floors_to_restore": len(self.raised_hpa_floors),
+            "recent": list(self.recent)[-5:]
+        }
+
+
+prescale_scheduler = PrescaleScheduler()
+
+
+def configure_prescaling(clusters, check_seconds: float = 60.0, hpa_aware: bool = True):
+    """
+    Configure the process-wide pre-scaling scheduler (the profiles
+    themselves: guardrails.configure_prescale_profiles)
+
+    Args:
+        clusters: ClusterPool whose deployments are checked
+        check_seconds: Time between checks (0 disables the scheduler;
+            floors still bind the scale-down guard)
+        hpa_aware: Passed on to scale_deployment
+    """
+    prescale_scheduler.clusters = clusters
+    prescale_scheduler.check_seconds = check_seconds
+    prescale_scheduler.hpa_aware = hpa_aware
@@ -2,24 +2,350 @@
 MCP Tools for ClaudeScale
 These tools will be available to Claude for intelligent scaling decisions
 """
-from typing import Dict, Any, Optional
-from datetime import datetime
+import asyncio
+import contextvars
+import functools
+import itertools
+import json
+import logging
+import math
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Optional
+from datetime import datetime, timezone
+from statistics import median
 
 import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from guardrails import (
-    check_cooldown,
-    record_scale_action,
+    reserve_scale_action,
+    release_scale_action,
     save_snapshot,
     get_last_snapshot,
     validate_scaledown,
+    resolve_replica_limits,
+    check_replica_limits,
     audit_log,
     get_recent_audit,
+    history_key,
+    active_floor,
 )
+from utils.cache import TTLCache
+from utils.kubernetes_client import ScaleConflictError
+from utils.metrics_store import metrics_store, metrics_sampler
+from utils.prometheus_client import PrometheusQueryError
+from utils.rate_limit import RateLimitExceeded
+from utils.self_metrics import REPORT_DURATION, register_cache
 
+logger = logging.getLogger("claudescale.tools")
 
-async def get_current_state(k8s_client, namespace: str = "claudescale") -> Dict[str, Any]:
+# ─── Analysis thresholds ──────────────────────────────────────────────────────
+
+CPU_LIMIT_CORES = 0.2    # 200m per pod (demo-app limit)
+CPU_HIGH_PCT = 75        # Above: recommend scale-up
+CPU_VERY_HIGH_PCT = 90   # Above: urgent scale-up
+CPU_LOW_PCT = 30         # Below: consider scaling down
+
+# HPA target CPU utilization ClaudeScale may set (HPA-aware mode)
+HPA_TARGET_CPU_MIN_PCT = 20
+HPA_TARGET_CPU_MAX_PCT = 90
+
+# ─── Pod warm-up ──────────────────────────────────────────────────────────────
+
+WARMUP_SECONDS = 60.0    # Pods ready for less than this are still warming up
+WARMUP_MODE = "exclude"  # "exclude" warming pods, or "weight" them by age
+WARMUP_MODES = ("exclude", "weight")
+
+# ─── Pod load imbalance ───────────────────────────────────────────────────────
+
+IMBALANCE_CV_THRESHOLD = 0.5  # Per-pod CPU coefficient of variation that counts as skew
+IMBALANCE_MIN_PODS = 3        # Fewer counted pods: no imbalance verdict
+IMBALANCE_TOP_K = 3           # Hottest pods listed
+IMBALANCE_MAX_HOT_SHARE = 1 / 3  # Hot pods beyond this share of the fleet are load, not skew
+
+# ─── Scheduling feasibility ───────────────────────────────────────────────────
+
+SCHEDULING_CHECK_MODE = "cap"  # "cap" scale-ups to what fits, "report" only, or "off"
+SCHEDULING_CHECK_MODES = ("cap", "report", "off")
+
+# ─── Short-lived result caches ────────────────────────────────────────────────
+
+METRICS_CACHE_SECONDS = 5.0   # get_metrics results are kept this long
+REPORT_MAX_AGE_SECONDS = 5.0  # Reports reuse state/metrics up to this age
+REPORT_IMPACT_ENTRIES = 50    # scale_impact audit entries summarized per report
+SAMPLER_MIN_FREE_TOKENS = 0.5  # Share of the Prometheus burst the background sampler leaves free
+
+_metrics_cache = TTLCache(ttl_seconds=METRICS_CACHE_SECONDS)
+register_cache("metrics", _metrics_cache)
+
+# Signals summarized from the metrics store over the lookback window
+HISTORY_SIGNALS = ("cpu_utilization_percent", "memory_mb", "pods_counted")
+
+# Report generation latency (ms), most recent last
+_report_latencies_ms: deque = deque(maxlen=200)
+
+# ─── State cursors (get_current_state deltas) ─────────────────────────────────
+
+STATE_CURSOR_MAX = 64          # Cursors remembered; older ones get a full listing again
+STATE_MAX_WAIT_SECONDS = 60.0  # Longest long-poll
+STATE_MAX_WATCHES = 4          # Concurrent long-polls; beyond this a call returns at once
+
+# cursor -> {"scope", "resource_version", "entries": {(namespace, name): fingerprint}}
+_state_cursors: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_cursor_seq = itertools.count(1)
+
+# Watches block a thread for up to STATE_MAX_WAIT_SECONDS, so they get their
+# own pool instead of holding the default executor's workers
+_watch_executor = ThreadPoolExecutor(max_workers=STATE_MAX_WATCHES, thread_name_prefix="claudescale-watch")
+_watches = {"active": 0}  # Long-polls currently waiting (event loop only)
+
+# ─── Scale serialization ──────────────────────────────────────────────────────
+
+SCALE_CONFLICT_RETRIES = 3  # Re-read and retry when the deployment changed under us
+
+# (client, namespace, deployment) -> [lock, calls holding or waiting]
+_scale_locks: Dict[tuple, list] = {}
+
+
+@asynccontextmanager
+async def _deployment_lock(key: tuple):
+    """
+    Serialize scale calls for one deployment; calls for other deployments
+    run in parallel. Entries are dropped once no call holds or awaits them.
+    """
+    entry = _scale_locks.get(key)
+    if entry is None:
+        entry = _scale_locks[key] = [asyncio.Lock(), 0]
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0:
+            del _scale_locks[key]
+
+
+def _summarize_deployments(deployments: List[Dict]) -> Dict[str, Any]:
+    """Aggregate replica totals for a list of deployment dicts."""
+    return {
+        "deployments": deployments,
+        "total_deployments": len(deployments),
+        "total_pods": sum(d["replicas"] for d in deployments),
+        "total_ready_pods": sum(d["ready_replicas"] for d in deployments),
+        "hpa_managed": sum(1 for d in deployments if d.get("hpa"))
+    }
+
+
+def _annotate_deployments(deployments: List[Dict], hpas: Optional[List[Dict]]) -> List[Dict]:
+    """Copy deployment dicts (they may be cached) adding their replica limits, active floor and HPA, if any."""
+    by_target = {h["target_name"]: h for h in hpas or [] if h["target_kind"] == "Deployment"}
+    result = []
+    for d in deployments:
+        entry = {**d, "limits": resolve_replica_limits(d["name"], d["namespace"], d.get("annotations"))}
+        floor = active_floor(d["name"], d["namespace"])
+        if floor:
+            entry["prescale_floor"] = floor
+        hpa = by_target.get(d["name"])
+        if hpa:
+            entry["hpa"] = {
+                "name": hpa["name"],
+                "min_replicas": hpa["min_replicas"],
+                "max_replicas": hpa["max_replicas"],
+                "target_cpu_utilization": hpa["target_cpu_utilization"],
+                "current_cpu_utilization": hpa["current_cpu_utilization"],
+                "desired_replicas": hpa["desired_replicas"]
+            }
+        result.append(entry)
+    return result
+
+
+async def _fetch_hpas(call, *args) -> tuple:
+    """Run an HPA listing; (result, None) or (None, error) so state still renders without HPA access."""
+    try:
+        return await asyncio.to_thread(call, *args), None
+    except Exception as e:
+        logger.warning(f"HPA lookup failed: {e}")
+        return None, f"{type(e).__name__}: {e}"
+
+
+def analyze_cpu_utilization(cpu_utilization_pct: float) -> Dict[str, Any]:
+    """
+    Classify average CPU utilization (% of limit) against the thresholds.
+
+    Shared by get_metrics and the offline policy simulator.
+    """
+    return {
+        "cpu_high": cpu_utilization_pct > CPU_HIGH_PCT,
+        "cpu_very_high": cpu_utilization_pct > CPU_VERY_HIGH_PCT,
+        "recommendation": "scale_up" if cpu_utilization_pct > CPU_HIGH_PCT else "stable"
+    }
+
+
+def analyze_pod_imbalance(samples: List[Dict], nodes: Dict[str, Optional[str]]) -> Dict[str, Any]:
+    """
+    Per-pod CPU distribution: coefficient of variation, Gini index and the
+    hottest pods with the nodes they run on
+
+    A hot spot is skew (CV >= IMBALANCE_CV_THRESHOLD over at least
+    IMBALANCE_MIN_PODS pods) where the pods above the scale-up threshold
+    are a clear minority (at most IMBALANCE_MAX_HOT_SHARE of them) and the
+    median pod is below that threshold. Load is then not spread evenly
+    (balancing, sticky sessions, a noisy node), and new replicas would
+    mostly take the cold pods' share. When half the fleet is saturated,
+    it is just load and the scale-up stands.
+
+    Args:
+        samples: Counted CPU samples ({"pod", "value"} in cores)
+        nodes: Pod name -> node name (empty without a Kubernetes client)
+
+    Returns:
+        Dict with the statistics, top pods and whether this is a hot spot
+    """
+    values = sorted(s["value"] for s in samples)
+    n = len(values)
+    # One pass over the sorted values gives the mean, variance and Gini
+    total = squares = ranked = 0.0
+    for i, v in enumerate(values, 1):
+        total += v
+        squares += v * v
+        ranked += i * v
+    if n == 0 or total <= 0:
+        return {"pods": n, "cv": 0.0, "gini": 0.0, "hot_pods": 0, "median_utilization_percent": 0.0,
+                "top": [], "hot_spot": False}
+
+    mean = total / n
+    cv = math.sqrt(max(squares / n - mean * mean, 0.0)) / mean
+    gini = 2 * ranked / (n * total) - (n + 1) / n
+    hot_cores = CPU_LIMIT_CORES * CPU_HIGH_PCT / 100
+    hot = sum(1 for v in values if v > hot_cores)
+    median_cores = median(values)
+
+    top = []
+    for sample in sorted(samples, key=lambda s: s["value"], reverse=True)[:IMBALANCE_TOP_K]:
+        top.append({
+            "pod": sample["pod"],
+            "node": nodes.get(sample["pod"]),
+            "cores": round(sample["value"], 4),
+            "utilization_percent": round(sample["value"] / CPU_LIMIT_CORES * 100, 1) if CPU_LIMIT_CORES > 0 else 0,
+            "share_percent": round(sample["value"] / total * 100, 1)
+        })
+
+    result = {
+        "pods": n,
+        "cv": round(cv, 3),
+        "gini": round(gini, 3),
+        "max_to_mean": round(values[-1] / mean, 2),
+        "hot_pods": hot,
+        "median_utilization_percent": round(median_cores / CPU_LIMIT_CORES * 100, 1) if CPU_LIMIT_CORES > 0 else 0,
+        "top": top,
+        "hot_spot": (
+            IMBALANCE_CV_THRESHOLD > 0 and n >= IMBALANCE_MIN_PODS
+            and cv >= IMBALANCE_CV_THRESHOLD
+            and 0 < hot <= n * IMBALANCE_MAX_HOT_SHARE
+            and median_cores < hot_cores
+        )
+    }
+    if result["hot_spot"]:
+        hot_nodes = sorted({t["node"] for t in top if t["utilization_percent"] > CPU_HIGH_PCT and t["node"]})
+        result["reason"] = (
+            f"{hot} of {n} pods are above {CPU_HIGH_PCT}% of their CPU limit "
+            f"(CV {cv:.2f}, Gini {gini:.2f}): load is not spread evenly, so more replicas "
+            "would not relieve the hot pods. Check load balancing and session affinity"
+            + (f", and node(s) {', '.join(hot_nodes)}" if hot_nodes else "") + "."
+        )
+    return result
+
+
+def configure_imbalance(cv_threshold: float = 0.5, min_pods: int = 3, top_k: int = 3):
+    """
+    Set when get_metrics reports a per-pod CPU hot spot instead of scale_up
+
+    Args:
+        cv_threshold: Coefficient of variation of per-pod CPU that counts as
+            skew (0 disables the check)
+        min_pods: Fewest counted pods for a verdict
+        top_k: Hottest pods listed
+    """
+    global IMBALANCE_CV_THRESHOLD, IMBALANCE_MIN_PODS, IMBALANCE_TOP_K
+    IMBALANCE_CV_THRESHOLD = cv_threshold
+    IMBALANCE_MIN_PODS = min_pods
+    IMBALANCE_TOP_K = top_k
+
+
+def _fingerprint(entry: Dict[str, Any]) -> int:
+    """
+    Comparable digest of a deployment entry; the HPA's live CPU reading is
+    left out, so it alone does not count as a change
+    """
+    hpa = entry.get("hpa")
+    if hpa:
+        entry = {**entry, "hpa": {k: v for k, v in hpa.items() if k != "current_cpu_utilization"}}
+    return hash(json.dumps(entry, sort_keys=True, default=str))
+
+
+def _issue_cursor(scope: tuple, resource_version: Optional[str], entries: Dict[tuple, int]) -> str:
+    """Remember a listing and return the cursor that refers to it."""
+    cursor = f"{resource_version or 0}-{next(_cursor_seq)}"
+    _state_cursors[cursor] = {"scope": scope, "resource_version": resource_version, "entries": entries}
+    while len(_state_cursors) > STATE_CURSOR_MAX:
+        _state_cursors.popitem(last=False)
+    return cursor
+
+
+def _state_entries(state: Dict[str, Any]) -> List[Dict]:
+    """Flat list of the annotated deployments in a full state response."""
+    if "namespaces" in state:
+        return [d for n in state["namespaces"].values() for d in n["deployments"]]
+    return state["deployments"]
+
+
+async def _list_state(k8s_client, namespace: str, all_namespaces: bool) -> Dict[str, Any]:
+    """Full state of one namespace or of the cluster (no cursor)."""
+    if all_namespaces:
+        grouped, (hpas, hpa_error) = await asyncio.gather(
+            asyncio.to_thread(k8s_client.list_all_deployments),
+            _fetch_hpas(k8s_client.list_all_hpas)
+        )
+        namespaces = {
+            ns: _summarize_deployments(_annotate_deployments(deps, (hpas or {}).get(ns)))
+            for ns, deps in sorted(grouped.items())
+        }
+        result = {
+            "scope": "cluster",
+            "timestamp": datetime.now().isoformat(),
+            "namespaces": namespaces,
+            "total_namespaces": len(namespaces),
+            "total_deployments": sum(n["total_deployments"] for n in namespaces.values()),
+            "total_pods": sum(n["total_pods"] for n in namespaces.values()),
+            "total_ready_pods": sum(n["total_ready_pods"] for n in namespaces.values())
+        }
+    else:
+        deployments, (hpas, hpa_error) = await asyncio.gather(
+            asyncio.to_thread(k8s_client.list_deployments, namespace),
+            _fetch_hpas(k8s_client.list_hpas, namespace)
+        )
+        result = {
+            "namespace": namespace,
+            "timestamp": datetime.now().isoformat(),
+            **_summarize_deployments(_annotate_deployments(deployments, hpas))
+        }
+
+    if hpa_error:
+        result["hpa_error"] = hpa_error
+    return result
+
+
+async def get_current_state(
+    k8s_client,
+    namespace: str = "claudescale",
+    all_namespaces: bool = False,
+    cursor: Optional[str] = None,
+    wait_seconds: float = 0
+) -> Dict[str, Any]:
     """
     Tool 1: Get current state of all deployments
 
@@ -27,32 +353,192 @@ async def get_current_state(k8s_client, namespace: str = "claudescale") -> Dict[
     - How many deployments exist
     - Current replica count for each
     - How many pods are ready
+    - The replica limits that apply to each deployment
+    - Which deployments an HPA manages, with its bounds and target
     - Overall health status
 
+    Every response carries a cursor (the list resourceVersion plus a
+    sequence number). Passing it back returns only the deployments added,
+    changed or removed since that response, with the totals; an unknown
+    or expired cursor gets the full state and "cursor_reset". With
+    wait_seconds, a call that would return no changes instead waits on a
+    Kubernetes watch (one request, no polling) until a deployment changes
+    or the time is up.
+
     Args:
         k8s_client: Kubernetes client instance
         namespace: Kubernetes namespace
+        all_namespaces: List every namespace with one cluster-wide call
+            and group the results per namespace (namespace is ignored)
+        cursor: Cursor from an earlier response, to get only changes
+        wait_seconds: Long-poll up to this long (max 60s) for a change
+            when there is none (needs cursor); with STATE_MAX_WATCHES
+            long-polls already waiting, returns at once with "wait_error"
 
     Returns:
-        Dict with deployment information
+        Dict with deployment information, or the changes since cursor
     """
-    deployments = k8s_client.list_deployments()
+    scope = (id(k8s_client), None if all_namespaces else namespace)
+    result = await _list_state(k8s_client, namespace, all_namespaces)
+    entries = _state_entries(result)
+    fingerprints = {(d["namespace"], d["name"]): _fingerprint(d) for d in entries}
 
-    return {
-        "namespace": namespace,
-        "timestamp": datetime.now().isoformat(),
-        "deployments": deployments,
-        "total_deployments": len(deployments),
-        "total_pods": sum(d["replicas"] for d in deployments),
-        "total_ready_pods": sum(d["ready_replicas"] for d in deployments)
-    }
+    previous = _state_cursors.get(cursor) if cursor else None
+    if previous is None or previous["scope"] != scope:
+        if cursor:
+            result["cursor_reset"] = "Unknown or expired cursor; returning the full state"
+        result["cursor"] = _issue_cursor(
+            scope, k8s_client.list_resource_versions.get(scope[1]), fingerprints
+        )
+        return result
+
+    def changes() -> tuple:
+        before = previous["entries"]
+        added, changed = [], []
+        for d in entries:
+            key = (d["namespace"], d["name"])
+            if key not in before:
+                added.append(d)
+            elif before[key] != fingerprints[key]:
+                changed.append(d)
+        removed = [f"{ns}/{name}" for ns, name in before if (ns, name) not in fingerprints]
+        return added, changed, removed
+
+    added, changed, removed = changes()
+    started = time.monotonic()
+    deadline = started + min(max(wait_seconds, 0), STATE_MAX_WAIT_SECONDS)
+    wait_error = None
+    holding = False
+    if not (added or changed or removed) and time.monotonic() < deadline:
+        if _watches["active"] >= STATE_MAX_WATCHES:
+            wait_error = f"{STATE_MAX_WATCHES} long-polls already waiting; returned without waiting"
+            deadline = started
+        else:
+            _watches["active"] += 1
+            holding = True
+    try:
+        loop = asyncio.get_running_loop()
+        while not (added or changed or removed) and time.monotonic() < deadline:
+            watch_from = k8s_client.list_resource_versions.get(scope[1])
+            if watch_from is None:
+                break
+            try:
+                await loop.run_in_executor(_watch_executor, functools.partial(
+                    contextvars.copy_context().run, k8s_client.wait_for_deployment_change,
+                    scope[1], watch_from, deadline - time.monotonic()
+                ))
+            except Exception as e:
+                logger.warning(f"Deployment watch failed: {e}")
+                wait_error = f"{type(e).__name__}: {e}"
+                break
+            result = await _list_state(k8s_client, namespace, all_namespaces)
+            entries = _state_entries(result)
+            fingerprints = {(d["namespace"], d["name"]): _fingerprint(d) for d in entries}
+            added, changed, removed = changes()
+    finally:
+        if holding:
+            _watches["active"] -= 1
+
+    if not (added or changed or removed):
+        fingerprints = previous["entries"]  # Share the map between unchanged cursors
+
+    delta = {k: v for k, v in result.items() if k not in ("deployments", "namespaces")}
+    delta.update({
+        "since": cursor,
+        "cursor": _issue_cursor(scope, k8s_client.list_resource_versions.get(scope[1]), fingerprints),
+        "changes": len(added) + len(changed) + len(removed),
+        "added": added,
+        "changed": changed,
+        "removed": removed,
+        "unchanged": len(entries) - len(added) - len(changed)
+    })
+    if wait_seconds > 0:
+        delta["waited_seconds"] = round(time.monotonic() - started, 2)
+    if wait_error:
+        delta["wait_error"] = wait_error
+    return delta
+
+
+def configure_warmup(seconds: float = 60.0, mode: str = "exclude"):
+    """
+    Set how get_metrics treats pods that only just became ready
+
+    Args:
+        seconds: Warm-up window after a pod becomes ready (0 disables)
+        mode: "exclude" leaves warming pods out of the averages; "weight"
+            counts them in proportion to how far into the window they are
+    """
+    global WARMUP_SECONDS, WARMUP_MODE
+    if mode not in WARMUP_MODES:
+        raise ValueError(f"Unknown warm-up mode '{mode}' (expected one of {', '.join(WARMUP_MODES)})")
+    WARMUP_SECONDS = seconds
+    WARMUP_MODE = mode
+
+
+async def _fetch_pods(k8s_client, deployment: str, namespace: str) -> tuple:
+    """Run a pod listing; (pods, None) or (None, error) so metrics still work without it."""
+    try:
+        return await asyncio.to_thread(k8s_client.get_pods, deployment, namespace), None
+    except Exception as e:
+        logger.warning(f"Pod readiness lookup failed: {e}")
+        return None, f"{type(e).__name__}: {e}"
+
+
+def _pod_weights(
+    samples: List[Dict],
+    pods: List[Dict],
+    warmup_seconds: float,
+    warmup_mode: str,
+    now: datetime
+) -> Dict[str, tuple]:
+    """
+    Weight (0-1) and state for each pod with a metric sample
+
+    Pods Kubernetes no longer lists (terminated, or another deployment
+    matching the name regex), terminating pods and unready pods get 0.
+    Ready pods inside the warm-up window get 0 ("exclude") or their
+    fraction of the window ("weight").
+    """
+    by_name = {p["name"]: p for p in pods}
+    weights = {}
+    for sample in samples:
+        pod = by_name.get(sample["pod"])
+        if pod is None:
+            weights[sample["pod"]] = (0.0, "unknown")
+        elif pod.get("terminating"):
+            weights[sample["pod"]] = (0.0, "terminating")
+        elif not pod["ready"]:
+            weights[sample["pod"]] = (0.0, "not_ready")
+        else:
+            since = pod.get("ready_since") or pod.get("start_time")
+            age = (now - datetime.fromisoformat(since)).total_seconds() if since else None
+            if age is None or warmup_seconds <= 0 or age >= warmup_seconds:
+                weights[sample["pod"]] = (1.0, "counted")
+            elif warmup_mode == "weight" and age > 0:
+                weights[sample["pod"]] = (age / warmup_seconds, "warming_up")
+            else:
+                weights[sample["pod"]] = (0.0, "warming_up")
+    return weights
+
+
+def _weighted_average(samples: List[Dict], key: str, weights: Dict[str, float]) -> Optional[float]:
+    """Average of samples[key] by pod weight; None when every weight is 0."""
+    total = sum(weights.get(s["pod"], 0.0) for s in samples)
+    if total <= 0:
+        return None
+    return sum(s[key] * weights.get(s["pod"], 0.0) for s in samples) / total
 
 
 async def get_metrics(
     prom_client,
     namespace: str = "claudescale",
     deployment: str = "demo-app",
-    lookback_minutes: int = 5
+    lookback_minutes: int = 5,
+    max_age_seconds: float = 0,
+    k8s_client=None,
+    warmup_seconds: Optional[float] = None,
+    warmup_mode: Optional[str] = None,
+    allow_stale: bool = True
 ) -> Dict[str, Any]:
     """
     Tool 2: Get metrics from Prometheus
@@ -63,30 +549,143 @@ async def get_metrics(
     - Network traffic
     - Trends over time
 
+    With a Kubernetes client, CPU and memory samples are joined with the
+    deployment's pods (readiness, start time, terminating) so a scale-up
+    does not inflate its own utilization: pods that are not ready,
+    terminating, gone, or still inside the warm-up window after becoming
+    ready are left out of (or down-weighted in) the averages. If that
+    would leave nothing, unready/terminating pods are still dropped but
+    warming pods are counted (and "fallback" says so).
+
     Args:
         prom_client: Prometheus client instance
         namespace: Kubernetes namespace
         deployment: Deployment name
         lookback_minutes: How many minutes of history to consider
+        max_age_seconds: Reuse a result fetched up to this many seconds
+            ago (0 = always query Prometheus)
+        k8s_client: Kubernetes client instance for pod readiness
+            (None = average every matching pod)
+        warmup_seconds: Warm-up window (default: WARMUP_SECONDS)
+        warmup_mode: "exclude" or "weight" (default: WARMUP_MODE)
+        allow_stale: While Prometheus is unavailable, return the last
+            stored values marked "stale" instead of raising. Callers that
+            scale without a human in the loop pass False.
 
     Returns:
-        Dict with comprehensive metrics
+        Dict with comprehensive metrics, including how many pods were
+        counted
+    """
+    warmup_seconds = WARMUP_SECONDS if warmup_seconds is None else warmup_seconds
+    warmup_mode = warmup_mode or WARMUP_MODE
+    cache_key = (
+        prom_client.url, namespace, deployment, lookback_minutes,
+        id(k8s_client) if k8s_client is not None else None, warmup_seconds, warmup_mode
+    )
+    if max_age_seconds > 0:
+        cached = _metrics_cache.get(cache_key, max_age_seconds)
+        if cached is not None:
+            return cached
+
+    store_key = (prom_client.url, namespace, deployment)
+    try:
+        result = await _collect_metrics(
+            prom_client, namespace, deployment, lookback_minutes, k8s_client, warmup_seconds, warmup_mode
+        )
+    except (PrometheusQueryError, RateLimitExceeded) as e:
+        if not allow_stale:
+            raise
+        stale = _stale_metrics(store_key, namespace, deployment, lookback_minutes, e)
+        if stale is None:
+            raise
+        logger.warning(f"Prometheus unavailable, serving stored metrics for {namespace}/{deployment}: {e}")
+        return stale
+
+    metrics_sampler.track(
+        store_key, prom_client, namespace, deployment, lookback_minutes, k8s_client, warmup_seconds, warmup_mode
+    )
+    history = _metrics_history(store_key, lookback_minutes)
+    if history:
+        result["history"] = history
+    _metrics_cache.set(cache_key, result)
+
+    return result
+
+
+async def _collect_metrics(
+    prom_client,
+    namespace: str,
+    deployment: str,
+    lookback_minutes: int,
+    k8s_client,
+    warmup_seconds: float,
+    warmup_mode: str
+) -> Dict[str, Any]:
+    """
+    Query Prometheus (and the pods) for get_metrics and record the result
+    in the metrics store; also what the background sampler runs
     """
     pod_filter = f"{deployment}.*"
 
-    cpu_metrics = prom_client.get_cpu_usage(namespace, pod_filter)
-    memory_metrics = prom_client.get_memory_usage(namespace, pod_filter)
-    network_metrics = prom_client.get_network_traffic(namespace, pod_filter)
+    async def no_pods():
+        return None, None
 
-    cpu_values = [p["value"] for p in cpu_metrics["pods"]]
+    # Client calls block on HTTP; run them side by side off the event loop
+    cpu_metrics, memory_metrics, network_metrics, (pods, pods_error) = await asyncio.gather(
+        asyncio.to_thread(prom_client.get_cpu_usage, namespace, pod_filter),
+        asyncio.to_thread(prom_client.get_memory_usage, namespace, pod_filter),
+        asyncio.to_thread(prom_client.get_network_traffic, namespace, pod_filter),
+        _fetch_pods(k8s_client, deployment, namespace) if k8s_client is not None else no_pods()
+    )
+
+    cpu_samples = cpu_metrics["pods"]
     cpu_avg = cpu_metrics["average_cpu"]
+    memory_avg = memory_metrics["average_memory_mb"]
+    counted = cpu_samples
+    readiness = None
+
+    # ── Readiness / warm-up join ──────────────────────────────────────────────
+    if pods is not None:
+        states = _pod_weights(cpu_samples, pods, warmup_seconds, warmup_mode, datetime.now(timezone.utc))
+        weights = {name: w for name, (w, _) in states.items()}
+        fallback = None
+        if cpu_samples and not any(weights.values()):
+            # Everything is warming up: better a warm-up-inflated number than none
+            weights = {name: 1.0 if state in ("counted", "warming_up") else 0.0
+                       for name, (_, state) in states.items()}
+            fallback = "all ready pods are warming up; counted them at full weight"
+
+        weighted_cpu = _weighted_average(cpu_samples, "value", weights)
+        if weighted_cpu is not None:
+            cpu_avg = weighted_cpu
+            counted = [s for s in cpu_samples if weights.get(s["pod"], 0) > 0]
+            weighted_memory = _weighted_average(memory_metrics["pods"], "value_mb", weights)
+            memory_avg = memory_avg if weighted_memory is None else weighted_memory
+        elif cpu_samples:
+            fallback = "no ready pods matched the metric samples; averaged every sample"
+
+        cpu_samples = [{**s, "state": states[s["pod"]][1], "weight": round(weights.get(s["pod"], 0), 3)}
+                       for s in cpu_samples]
+        readiness = {
+            "warmup_seconds": warmup_seconds,
+            "warmup_mode": warmup_mode,
+            "pods_with_samples": len(cpu_samples),
+            "pods_counted": len(counted),
+            **{state: sum(1 for _, st in states.values() if st == state)
+               for state in ("warming_up", "not_ready", "terminating", "unknown")},
+            "fallback": fallback
+        }
+    elif pods_error:
+        readiness = {"error": pods_error}
+
+    cpu_values = [p["value"] for p in counted]
     cpu_max = max(cpu_values) if cpu_values else 0
     cpu_min = min(cpu_values) if cpu_values else 0
 
-    cpu_limit = 0.2  # 200m = 0.2 cores
+    cpu_limit = CPU_LIMIT_CORES
     cpu_utilization_pct = (cpu_avg / cpu_limit) * 100 if cpu_limit > 0 else 0
 
-    return {
+    result = {
         "timestamp": datetime.now().isoformat(),
         "namespace": namespace,
         "deployment": deployment,
@@ -97,22 +696,280 @@ async def get_metrics(
             "min_cores": round(cpu_min, 4),
             "limit_cores": cpu_limit,
             "utilization_percent": round(cpu_utilization_pct, 2),
-            "pods": cpu_metrics["pods"]
+            "pods_counted": len(counted),
+            "pods": cpu_samples
         },
         "memory": {
-            "average_mb": round(memory_metrics["average_memory_mb"], 2),
+            "average_mb": round(memory_avg, 2),
             "pods": memory_metrics["pods"]
         },
         "network": {
             "receive_bps": round(network_metrics["receive_bps"], 2),
             "transmit_bps": round(network_metrics["transmit_bps"], 2)
         },
-        "analysis": {
-            "cpu_high": cpu_utilization_pct > 75,
-            "cpu_very_high": cpu_utilization_pct > 90,
-            "recommendation": "scale_up" if cpu_utilization_pct > 75 else "stable"
+        "analysis": analyze_cpu_utilization(cpu_utilization_pct)
+    }
+    imbalance = analyze_pod_imbalance(counted, {p["name"]: p.get("node") for p in pods or []})
+    result["cpu"]["imbalance"] = imbalance
+    if imbalance["hot_spot"]:
+        # Replicas would not help: ask for a rebalance, not a scale-up
+        result["analysis"].update(imbalance=True, recommendation="rebalance", reason=imbalance["reason"])
+    if readiness is not None:
+        result["readiness"] = readiness
+    metrics_store.record((prom_client.url, namespace, deployment), {
+        "cpu_cores": cpu_avg,
+        "cpu_max_cores": cpu_max,
+        "cpu_min_cores": cpu_min,
+        "cpu_utilization_percent": cpu_utilization_pct,
+        "pods_counted": len(counted),
+        "memory_mb": memory_avg,
+        "receive_bps": network_metrics["receive_bps"],
+        "transmit_bps": network_metrics["transmit_bps"]
+    })
+
+    return result
+
+
+def _metrics_history(key: tuple, lookback_minutes: int) -> Optional[Dict[str, Any]]:
+    """
+    Recent windows from the metrics store: every signal over the lookback,
+    CPU utilization over 15m and 1h as well
+    """
+    lookback = f"{lookback_minutes}m"
+    windows = {lookback: {}}
+    for signal in HISTORY_SIGNALS:
+        summary = metrics_store.window(key, signal, lookback_minutes * 60)
+        if summary is not None:
+            windows[lookback][signal] = summary
+    for label, minutes in (("15m", 15), ("1h", 60)):
+        if minutes > lookback_minutes:
+            summary = metrics_store.window(key, "cpu_utilization_percent", minutes * 60)
+            if summary is not None and summary["buckets"] > 1:
+                windows[label] = {"cpu_utilization_percent": summary}
+    if not windows[lookback]:
+        return None
+    return {"source": "metrics_store", "windows": windows}
+
+
+def _stale_metrics(
+    key: tuple,
+    namespace: str,
+    deployment: str,
+    lookback_minutes: int,
+    error: Exception
+) -> Optional[Dict[str, Any]]:
+    """
+    get_metrics result rebuilt from the newest stored sample, marked stale;
+    None when nothing was stored or it is older than the store allows
+    """
+    latest = metrics_store.latest(key)
+    if "cpu_utilization_percent" not in latest:
+        return None
+    as_of, utilization = latest["cpu_utilization_percent"]
+    age = time.time() - as_of
+    if age > metrics_store.stale_max_seconds:
+        return None
+
+    def last(signal: str) -> float:
+        return latest.get(signal, (as_of, 0.0))[1]
+
+    analysis = analyze_cpu_utilization(utilization)
+    analysis["note"] = (
+        f"Prometheus is unavailable; this is the last value seen {age:.0f}s ago. "
+        "Confirm with fresh metrics before scaling."
+    )
+    result = {
+        "timestamp": datetime.now().isoformat(),
+        "namespace": namespace,
+        "deployment": deployment,
+        "lookback_minutes": lookback_minutes,
+        "stale": True,
+        "stale_reason": f"{type(error).__name__}: {error}",
+        "data_age_seconds": round(age, 1),
+        "as_of": datetime.fromtimestamp(as_of).isoformat(),
+        "cpu": {
+            "average_cores": round(last("cpu_cores"), 4),
+            "max_cores": round(last("cpu_max_cores"), 4),
+            "min_cores": round(last("cpu_min_cores"), 4),
+            "limit_cores": CPU_LIMIT_CORES,
+            "utilization_percent": round(utilization, 2),
+            "pods_counted": int(last("pods_counted")),
+            "pods": []
+        },
+        "memory": {
+            "average_mb": round(last("memory_mb"), 2),
+            "pods": []
+        },
+        "network": {
+            "receive_bps": round(last("receive_bps"), 2),
+            "transmit_bps": round(last("transmit_bps"), 2)
+        },
+        "analysis": analysis
+    }
+    history = _metrics_history(key, lookback_minutes)
+    if history:
+        result["history"] = history
+    return result
+
+
+def _sampler_has_budget(prom_client, *args) -> bool:
+    """
+    Background samples only spend Prometheus budget tool calls are not
+    using: nothing queued and at least SAMPLER_MIN_FREE_TOKENS of the burst
+    left
+    """
+    bucket = getattr(prom_client, "rate_limiter", None)
+    if bucket is None:
+        return True
+    status = bucket.status()
+    if status["rate_per_second"] <= 0:  # Rate limiting disabled
+        return True
+    return not status["queued"] and status["available_tokens"] >= SAMPLER_MIN_FREE_TOKENS * status["burst"]
+
+
+metrics_sampler.collect = _collect_metrics
+metrics_sampler.has_budget = _sampler_has_budget
+
+
+def configure_scheduling_check(mode: str = "cap"):
+    """
+    Set what scale-ups do when the new pods would not fit on the nodes
+
+    Args:
+        mode: "cap" scales only as far as the pods fit (and refuses,
+            without using the cooldown, when none fit); "report" scales as
+            requested and adds the estimate to the result; "off" skips the
+            check. Use "report" with a cluster autoscaler, which only adds
+            nodes once pods are Pending.
+    """
+    global SCHEDULING_CHECK_MODE
+    if mode not in SCHEDULING_CHECK_MODES:
+        raise ValueError(
+            f"Unknown scheduling check mode '{mode}' (expected one of {', '.join(SCHEDULING_CHECK_MODES)})"
+        )
+    SCHEDULING_CHECK_MODE = mode
+
+
+def _tolerates(tolerations: List[Dict], taint: Dict) -> bool:
+    """Whether any toleration matches a NoSchedule/NoExecute taint."""
+    for t in tolerations:
+        if t.get("effect") and t["effect"] != taint["effect"]:
+            continue
+        if t.get("operator") == "Exists" and (not t.get("key") or t["key"] == taint["key"]):
+            return True
+        if t.get("key") == taint["key"] and t.get("value") == taint.get("value"):
+            return True
+    return False
+
+
+def estimate_schedulable(nodes: List[Dict], template: Dict, count: int) -> Dict[str, Any]:
+    """
+    Estimate how many identical new pods the nodes can take
+
+    A node is eligible when it is Ready, not cordoned, matches the pod's
+    nodeSelector and every NoSchedule/NoExecute taint is tolerated. Each
+    eligible node takes as many pods as its free CPU, memory and pod slots
+    allow (allocatable minus what bound pods already request); pods are
+    placed on the node with the most room first. For identical pods this
+    packing is exact with respect to requests; affinity, topology spread
+    and host ports are not modeled.
+
+    Args:
+        nodes: Node dicts from KubernetesClient.get_node_capacity
+        template: Deployment "pod_template" (requests, node_selector,
+            tolerations)
+        count: Pods to place
+
+    Returns:
+        Dict with how many fit, per-node placement, and the resource that
+        ran out first
+    """
+    requests = template.get("requests") or {}
+    cpu = requests.get("cpu_cores") or 0.0
+    memory = requests.get("memory_bytes") or 0.0
+    selector = template.get("node_selector") or {}
+    tolerations = template.get("tolerations") or []
+
+    room: Dict[str, int] = {}
+    bottlenecks: Dict[str, int] = {}
+    for node in nodes:
+        if not node["schedulable"]:
+            continue
+        if any(node["labels"].get(k) != v for k, v in selector.items()):
+            continue
+        if not all(_tolerates(tolerations, taint) for taint in node["taints"]):
+            continue
+
+        free = {
+            key: node["allocatable"][key] - node["requested"][key]
+            for key in ("cpu_cores", "memory_bytes", "pods")
+        }
+        fits = {
+            "cpu": math.floor(free["cpu_cores"] / cpu + 1e-9) if cpu > 0 else math.inf,
+            "memory": math.floor(free["memory_bytes"] / memory) if memory > 0 else math.inf,
+            "pods": free["pods"]
         }
+        limited_by = min(fits, key=fits.get)
+        room[node["name"]] = max(0, int(fits[limited_by]))
+        bottlenecks[limited_by] = bottlenecks.get(limited_by, 0) + 1
+
+    placement: Dict[str, int] = {}
+    remaining = count
+    for name in sorted(room, key=room.get, reverse=True):
+        if remaining <= 0 or room[name] <= 0:
+            break
+        placed = min(room[name], remaining)
+        placement[name] = placed
+        remaining -= placed
+
+    result = {
+        "pods_requested": count,
+        "pods_fit": count - remaining,
+        "eligible_nodes": len(room),
+        "free_slots": sum(room.values()),
+        "placement": placement,
+        "per_pod_requests": {"cpu_cores": round(cpu, 3), "memory_mib": round(memory / 2 ** 20, 1)}
     }
+    if remaining:
+        result["limited_by"] = max(bottlenecks, key=bottlenecks.get) if bottlenecks else "no eligible nodes"
+    if cpu <= 0 and memory <= 0:
+        result["note"] = "The pod template sets no CPU/memory requests; only pod slots were checked."
+    return result
+
+
+async def _check_scheduling(
+    k8s_client,
+    current: Dict,
+    deployment: str,
+    namespace: str,
+    new_pods: int
+) -> Optional[Dict[str, Any]]:
+    """
+    Scheduling estimate for a scale-up by new_pods
+
+    Pods of the deployment that are already Pending without a node are
+    placed first, since the scheduler will bind them before any new one.
+    None when the client has no node view; an "error" entry when the
+    lookup fails, so the scale goes ahead unchecked rather than failing.
+    """
+    template = current.get("pod_template")
+    if template is None:
+        return None
+    try:
+        nodes, pods = await asyncio.gather(
+            asyncio.to_thread(k8s_client.get_node_capacity),
+            asyncio.to_thread(k8s_client.get_pods, deployment, namespace)
+        )
+    except Exception as e:
+        logger.warning(f"Scheduling check for '{deployment}' skipped: {e}")
+        return {"error": f"{type(e).__name__}: {e}"}
+
+    pending = sum(1 for p in pods if p["status"] == "Pending" and not p.get("node"))
+    estimate = estimate_schedulable(nodes, template, pending + new_pods)
+    estimate["pending_pods"] = pending
+    estimate["new_pods_requested"] = new_pods
+    estimate["new_pods_fit"] = max(0, estimate["pods_fit"] - pending)
+    return estimate
 
 
 async def scale_deployment(
@@ -121,19 +978,49 @@ async def scale_deployment(
     replicas: int,
     namespace: str = "claudescale",
     reason: Optional[str] = None,
-    cpu_utilization_pct: Optional[float] = None
+    cpu_utilization_pct: Optional[float] = None,
+    hpa_aware: bool = True,
+    shared_cooldown: bool = True
 ) -> Dict[str, Any]:
     """
     Tool 3: Scale a deployment
 
     Guardrails enforced:
-    - Hard replica limits: min=2, max=5
-    - Cooldown between actions (90s up / 180s down)
-    - Scale-down requires explicit reason + CPU < 40%
-    - Scale-down limited to 1 replica per action
+    - Replica limits: min/max and step sizes, per deployment (default
+      2-5 replicas, unlimited steps up, 1 replica down; see
+      guardrails.resolve_replica_limits)
+    - Cooldown between actions (90s up / 180s down), shared by all
+      deployments and per-deployment adaptive: longer while it flaps
+      up/down, shorter along a steady scale-up ramp (see guardrails.flap_state);
+      "cooldown" in the response says what applies to the next action and
+      why. Scheduled pre-scaling (shared_cooldown=False) only waits for,
+      and holds, its own deployment's cooldown
+    - Scale-down requires explicit reason + CPU < 40%, and cannot go below
+      an active pre-scaling floor (guardrails.active_floor)
+    - Scale-down limited to max_step_down replicas per action
+    - Scale-up checked against node capacity (see estimate_schedulable):
+      capped to the pods that fit, or refused without using the cooldown
+      when none fit (SCHEDULING_CHECK_MODE "report" only warns)
     - State snapshot saved before every action (enables rollback)
     - All actions written to audit log
 
+    Concurrency:
+    - Calls for the same deployment run one at a time (per-deployment lock)
+    - The cooldown is checked and recorded in one step, before the patch
+    - The patch is conditioned on the resourceVersion that was validated;
+      if anything else (e.g. an HPA) changed the deployment meanwhile, the
+      state is re-read and every check runs again
+
+    HPA-aware mode:
+    - If an HPA manages the deployment, patching replicas would only be
+      undone by the HPA on its next sync. Instead the HPA's minReplicas is
+      set to the requested count (raising maxReplicas if needed), so the
+      HPA keeps at least that many replicas and stays in charge above it
+    - The same limits, cooldown and scale-down guard apply to the floor
+    - A scale-down only lowers minReplicas to the requested count; if the
+      HPA is already above its floor on load, the call fails (use
+      tune_hpa for the ceiling or CPU target)
+
     Args:
         k8s_client: Kubernetes client instance
         deployment: Deployment name
@@ -141,11 +1028,60 @@ async def scale_deployment(
         namespace: Kubernetes namespace
         reason: WHY scaling is being performed (mandatory for scale-down)
         cpu_utilization_pct: Current CPU % — used by scale-down guard
+        hpa_aware: Tune an attached HPA instead of patching replicas
+        shared_cooldown: False = only this deployment's own cooldown
+            applies and is used (scheduled pre-scaling); other deployments
+            are not held back
 
     Returns:
         Dict with scaling result
     """
-    current = k8s_client.get_deployment(deployment)
+    async with _deployment_lock((id(k8s_client), namespace, deployment)):
+        conflicts = 0
+        while True:
+            outcome = await _try_scale(
+                k8s_client, deployment, replicas, namespace, reason, cpu_utilization_pct, hpa_aware,
+                shared_cooldown
+            )
+            if outcome is not None:
+                if outcome.get("success") and conflicts:
+                    outcome["conflict_retries"] = conflicts
+                return outcome
+
+            conflicts += 1
+            if conflicts > SCALE_CONFLICT_RETRIES:
+                audit_log("scale_conflict", {
+                    "deployment": deployment,
+                    "namespace": namespace,
+                    "requested_replicas": replicas,
+                    "conflicts": conflicts
+                })
+                return {
+                    "success": False,
+                    "error": f"Deployment '{deployment}' kept changing while scaling "
+                             f"({conflicts} conflicting updates). Check for another "
+                             f"autoscaler acting on it and retry."
+                }
+
+
+async def _try_scale(
+    k8s_client,
+    deployment: str,
+    replicas: int,
+    namespace: str,
+    reason: Optional[str],
+    cpu_utilization_pct: Optional[float],
+    hpa_aware: bool = True,
+    shared_cooldown: bool = True
+) -> Optional[Dict[str, Any]]:
+    """One validated, resourceVersion-conditioned scale attempt; None on conflict."""
+    async def no_hpa():
+        return None
+
+    current, hpa = await asyncio.gather(
+        asyncio.to_thread(k8s_client.get_deployment, deployment, namespace),
+        asyncio.to_thread(k8s_client.get_hpa_for_deployment, deployment, namespace) if hpa_aware else no_hpa()
+    )
 
     if not current:
         return {
@@ -154,23 +1090,91 @@ async def scale_deployment(
         }
 
     current_replicas = current["replicas"]
-    MIN_REPLICAS = 2
-    MAX_REPLICAS = 5
+    limits = resolve_replica_limits(deployment, namespace, current.get("annotations"))
 
-    # ── Hard limits ──────────────────────────────────────────────────────────
-    if replicas < MIN_REPLICAS:
+    # ── Replica limits (bounds, step up) ──────────────────────────────────────
+    bounds = check_replica_limits(limits, current_replicas, replicas)
+    if not bounds["allowed"]:
         return {
             "success": False,
-            "error": f"Cannot scale below minimum of {MIN_REPLICAS} replicas. "
-                     f"ClaudeScale enforces minimum availability."
+            "error": bounds["reason"],
+            "limits": limits
         }
 
-    if replicas > MAX_REPLICAS:
-        return {
-            "success": False,
-            "error": f"Cannot scale above maximum of {MAX_REPLICAS} replicas. "
-                     f"Adjust MAX_REPLICAS in .env to change this limit."
-        }
+    # ── Scheduling feasibility (scale-up only) ────────────────────────────────
+    requested_replicas = replicas
+    scheduling = None
+    if replicas > current_replicas and SCHEDULING_CHECK_MODE != "off":
+        scheduling = await _check_scheduling(
+            k8s_client, current, deployment, namespace, replicas - current_replicas
+        )
+        fit = scheduling.get("new_pods_fit") if scheduling else None
+        if fit is not None and fit < replicas - current_replicas:
+            if SCHEDULING_CHECK_MODE == "report":
+                scheduling["warning"] = (
+                    f"Only {fit} of {replicas - current_replicas} new pods fit on the nodes; "
+                    f"the rest will stay Pending until capacity frees up or nodes are added."
+                )
+            elif fit == 0:
+                audit_log("scale_blocked_capacity", {
+                    "deployment": deployment,
+                    "namespace": namespace,
+                    "requested_replicas": replicas,
+                    "pending_pods": scheduling["pending_pods"],
+                    "limited_by": scheduling.get("limited_by")
+                })
+                return {
+                    "success": False,
+                    "error": f"None of the {replicas - current_replicas} new pods for '{deployment}' "
+                             f"would fit on the nodes (limited by {scheduling.get('limited_by')}). "
+                             f"Free capacity or add nodes first; the cooldown was not used.",
+                    "scheduling": scheduling
+                }
+            else:
+                replicas = current_replicas + fit
+
+    # ── HPA-managed: move the HPA floor instead of fighting it ────────────────
+    if hpa:
+        if replicas < current_replicas and hpa["min_replicas"] <= replicas:
+            # The HPA is above its floor on its own; "lowering" the floor to
+            # the request would raise it instead
+            error = (
+                f"HPA '{hpa['name']}' keeps '{deployment}' at {current_replicas} replicas on load; its "
+                f"minReplicas ({hpa['min_replicas']}) is already at or below {replicas}, so there is no "
+                f"floor to lower. Use tune_hpa to lower maxReplicas or raise the CPU target instead."
+            )
+            audit_log("scale_blocked_guard", {
+                "deployment": deployment,
+                "hpa": hpa["name"],
+                "requested_replicas": replicas,
+                "reason": error
+            })
+            return {
+                "success": False,
+                "error": error,
+                "mode": "hpa",
+                "current_replicas": current_replicas,
+                "hpa": {
+                    "min_replicas": hpa["min_replicas"],
+                    "max_replicas": hpa["max_replicas"],
+                    "target_cpu_utilization": hpa["target_cpu_utilization"]
+                }
+            }
+        outcome = await _apply_hpa_change(
+            k8s_client, deployment, namespace, hpa, current_replicas, limits,
+            min_replicas=replicas,
+            max_replicas=max(hpa["max_replicas"], replicas),
+            target_cpu_utilization=None,
+            reason=reason,
+            cpu_utilization_pct=cpu_utilization_pct,
+            shared_cooldown=shared_cooldown
+        )
+        if outcome is not None and scheduling is not None:
+            outcome["scheduling"] = scheduling
+            if replicas != requested_replicas:
+                outcome["requested_replicas"] = requested_replicas
+                outcome["capped_to_capacity"] = True
+        return outcome
 
     # ── No-op ─────────────────────────────────────────────────────────────────
     if replicas == current_replicas:
@@ -184,8 +1188,8 @@ async def scale_deployment(
 
     action_direction = "up" if replicas > current_replicas else "down"
 
-    # ── Cooldown check ────────────────────────────────────────────────────────
-    cooldown = check_cooldown(action_direction)
+    # ── Cooldown check (reserves the slot if allowed) ─────────────────────────
+    cooldown = reserve_scale_action(action_direction, history_key(deployment, namespace), shared_cooldown)
     if not cooldown["allowed"]:
         audit_log("scale_blocked_cooldown", {
             "deployment": deployment,
@@ -195,7 +1199,8 @@ async def scale_deployment(
         return {
             "success": False,
             "error": cooldown["reason"],
-            "retry_in_seconds": cooldown.get("retry_in_seconds")
+            "retry_in_seconds": cooldown.get("retry_in_seconds"),
+            "cooldown": cooldown["cooldown"]
         }
 
     # ── Scale-down guard ──────────────────────────────────────────────────────
@@ -204,9 +1209,13 @@ async def scale_deployment(
             current_replicas=current_replicas,
             desired_replicas=replicas,
             cpu_utilization_pct=cpu_utilization_pct,
-            reason=reason
+            reason=reason,
+            max_step=limits["max_step_down"],
+            max_cpu_pct=cooldown.get("scaledown_max_cpu_pct"),
+            floor=active_floor(deployment, namespace)
         )
         if not guard["allowed"]:
+            release_scale_action(cooldown)
             audit_log("scale_blocked_guard", {
                 "deployment": deployment,
                 "requested_replicas": replicas,
@@ -221,9 +1230,21 @@ async def scale_deployment(
     state_snapshot = {"deployments": [{"name": deployment, "replicas": current_replicas}]}
     save_snapshot(state_snapshot)
 
-    # ── Execute ───────────────────────────────────────────────────────────────
-    result = k8s_client.scale_deployment(deployment, replicas)
-    record_scale_action(action_direction)
+    # ── Execute (only if nothing changed since the read above) ────────────────
+    try:
+        result = await asyncio.to_thread(
+            k8s_client.scale_deployment,
+            deployment,
+            replicas,
+            namespace,
+            current.get("resource_version")
+        )
+    except ScaleConflictError:
+        release_scale_action(cooldown)
+        return None
+    except Exception:
+        release_scale_action(cooldown)
+        raise
 
     response = {
         "success": True,
@@ -236,8 +1257,14 @@ async def scale_deployment(
         "reason": reason or "No reason provided",
         "timestamp": datetime.now().isoformat(),
         "rollback_info": f"To rollback: scale '{deployment}' back to {current_replicas} replicas",
+        "cooldown": cooldown["cooldown"],
         "result": result
     }
+    if scheduling is not None:
+        response["scheduling"] = scheduling
+        if replicas != requested_replicas:
+            response["requested_replicas"] = requested_replicas
+            response["capped_to_capacity"] = True
 
     # ── Audit log ─────────────────────────────────────────────────────────────
     audit_log("scale_executed", {
@@ -252,10 +1279,487 @@ async def scale_deployment(
     return response
 
 
+async def tune_hpa(
+    k8s_client,
+    deployment: str,
+    namespace: str = "claudescale",
+    min_replicas: Optional[int] = None,
+    max_replicas: Optional[int] = None,
+    target_cpu_utilization: Optional[int] = None,
+    reason: Optional[str] = None,
+    cpu_utilization_pct: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Tool 7: Tune the HPA attached to a deployment
+
+    Changes the bounds and/or CPU target of the HorizontalPodAutoscaler
+    that manages the deployment (autoscaling/v2), leaving the HPA to do
+    the actual scaling.
+
+    Guardrails enforced:
+    - Bounds within the deployment's replica limits, min <= max
+    - CPU target between 20% and 90%
+    - Cooldown, shared with scale_deployment
+    - Changes that reduce capacity (lower min or max, higher target) are a
+      scale-down: they need a reason, and lowering min goes through the
+      scale-down guard (CPU < 40%, 1 replica per action)
+    - Snapshot of the previous HPA spec and audit entry for every change
+    - Serialized with scale_deployment per deployment; conditioned on the
+      HPA's resourceVersion and retried on conflict
+
+    Args:
+        k8s_client: Kubernetes client instance
+        deployment: Deployment the HPA targets
+        namespace: Kubernetes namespace
+        min_replicas: New minReplicas (None = unchanged)
+        max_replicas: New maxReplicas (None = unchanged)
+        target_cpu_utilization: New target CPU % (None = unchanged)
+        reason: WHY the HPA is being changed (mandatory to reduce capacity)
+        cpu_utilization_pct: Current CPU % — used by scale-down guard
+
+    Returns:
+        Dict with the HPA before/after, or an error
+    """
+    if target_cpu_utilization is not None and not (
+        HPA_TARGET_CPU_MIN_PCT <= target_cpu_utilization <= HPA_TARGET_CPU_MAX_PCT
+    ):
+        return {
+            "success": False,
+            "error": f"target_cpu_utilization must be between {HPA_TARGET_CPU_MIN_PCT}% "
+                     f"and {HPA_TARGET_CPU_MAX_PCT}%."
+        }
+
+    async with _deployment_lock((id(k8s_client), namespace, deployment)):
+        conflicts = 0
+        while True:
+            current, hpa = await asyncio.gather(
+                asyncio.to_thread(k8s_client.get_deployment, deployment, namespace),
+                asyncio.to_thread(k8s_client.get_hpa_for_deployment, deployment, namespace)
+            )
+            if not current:
+                return {
+                    "success": False,
+                    "error": f"Deployment '{deployment}' not found in namespace '{namespace}'"
+                }
+            if not hpa:
+                return {
+                    "success": False,
+                    "error": f"Deployment '{deployment}' has no HorizontalPodAutoscaler. "
+                             f"Use scale_deployment instead."
+                }
+
+            limits = resolve_replica_limits(deployment, namespace, current.get("annotations"))
+            for name, value in (("min_replicas", min_replicas), ("max_replicas", max_replicas)):
+                if value is not None and not limits["min_replicas"] <= value <= limits["max_replicas"]:
+                    return {
+                        "success": False,
+                        "error": f"{name}={value} is outside the replica limits for '{deployment}' "
+                                 f"({limits['min_replicas']}-{limits['max_replicas']} replicas).",
+                        "limits": limits
+                    }
+
+            new_min = hpa["min_replicas"] if min_replicas is None else min_replicas
+            new_max = hpa["max_replicas"] if max_replicas is None else max_replicas
+            if new_min > new_max:
+                return {
+                    "success": False,
+                    "error": f"min_replicas ({new_min}) cannot exceed max_replicas ({new_max})."
+                }
+            if min_replicas is not None:
+                bounds = check_replica_limits(limits, max(current["replicas"], hpa["min_replicas"]), new_min)
+                if not bounds["allowed"]:
+                    return {"success": False, "error": bounds["reason"], "limits": limits}
+
+            outcome = await _apply_hpa_change(
+                k8s_client, deployment, namespace, hpa, current["replicas"], limits,
+                min_replicas=new_min,
+                max_replicas=new_max,
+                target_cpu_utilization=target_cpu_utilization,
+                reason=reason,
+                cpu_utilization_pct=cpu_utilization_pct
+            )
+            if outcome is not None:
+                if outcome.get("success") and conflicts:
+                    outcome["conflict_retries"] = conflicts
+                return outcome
+
+            conflicts += 1
+            if conflicts > SCALE_CONFLICT_RETRIES:
+                audit_log("scale_conflict", {
+                    "deployment": deployment,
+                    "namespace": namespace,
+                    "hpa": hpa["name"],
+                    "conflicts": conflicts
+                })
+                return {
+                    "success": False,
+                    "error": f"HPA '{hpa['name']}' kept changing while tuning it "
+                             f"({conflicts} conflicting updates). Retry later."
+                }
+
+
+async def _apply_hpa_change(
+    k8s_client,
+    deployment: str,
+    namespace: str,
+    hpa: Dict,
+    current_replicas: int,
+    limits: Dict[str, Any],
+    min_replicas: int,
+    max_replicas: int,
+    target_cpu_utilization: Optional[int],
+    reason: Optional[str],
+    cpu_utilization_pct: Optional[float],
+    shared_cooldown: bool = True
+) -> Optional[Dict[str, Any]]:
+    """One guarded, resourceVersion-conditioned HPA update; None on conflict."""
+    before = {
+        "min_replicas": hpa["min_replicas"],
+        "max_replicas": hpa["max_replicas"],
+        "target_cpu_utilization": hpa["target_cpu_utilization"]
+    }
+    after = {
+        "min_replicas": min_replicas,
+        "max_replicas": max_replicas,
+        "target_cpu_utilization": (
+            before["target_cpu_utilization"] if target_cpu_utilization is None else target_cpu_utilization
+        )
+    }
+
+    # ── No-op ─────────────────────────────────────────────────────────────────
+    if after == before:
+        return {
+            "success": True,
+            "action": "no_change",
+            "mode": "hpa",
+            "message": f"HPA '{hpa['name']}' already has min={min_replicas}, max={max_replicas}, "
+                       f"target={after['target_cpu_utilization']}%",
+            "current_replicas": current_replicas,
+            "hpa": before
+        }
+
+    # Less capacity = lower floor, lower ceiling or a higher CPU target
+    reduces = (
+        after["min_replicas"] < before["min_replicas"]
+        or after["max_replicas"] < before["max_replicas"]
+        or (before["target_cpu_utilization"] is not None
+            and after["target_cpu_utilization"] > before["target_cpu_utilization"])
+    )
+    action_direction = "down" if reduces else "up"
+
+    # ── Cooldown check (reserves the slot if allowed) ─────────────────────────
+    cooldown = reserve_scale_action(action_direction, history_key(deployment, namespace), shared_cooldown)
+    if not cooldown["allowed"]:
+        audit_log("scale_blocked_cooldown", {
+            "deployment": deployment,
+            "hpa": hpa["name"],
+            "requested_hpa": after,
+            "reason": cooldown["reason"]
+        })
+        return {
+            "success": False,
+            "error": cooldown["reason"],
+            "retry_in_seconds": cooldown.get("retry_in_seconds"),
+            "cooldown": cooldown["cooldown"]
+        }
+
+    # ── Scale-down guard ──────────────────────────────────────────────────────
+    if action_direction == "down":
+        if after["min_replicas"] < before["min_replicas"]:
+            guard = validate_scaledown(
+                current_replicas=before["min_replicas"],
+                desired_replicas=after["min_replicas"],
+                cpu_utilization_pct=cpu_utilization_pct,
+                reason=reason,
+                max_step=limits["max_step_down"],
+                max_cpu_pct=cooldown.get("scaledown_max_cpu_pct"),
+                floor=active_floor(deployment, namespace)
+            )
+        elif not reason or reason.strip() == "" or reason == "No reason provided":
+            guard = {
+                "allowed": False,
+                "reason": "Reducing HPA capacity requires an explicit reason explaining why "
+                          "it is safe right now."
+            }
+        else:
+            guard = {"allowed": True}
+        if not guard["allowed"]:
+            release_scale_action(cooldown)
+            audit_log("scale_blocked_guard", {
+                "deployment": deployment,
+                "hpa": hpa["name"],
+                "requested_hpa": after,
+                "reason": guard["reason"]
+            })
+            return {
+                "success": False,
+                "error": guard["reason"]
+            }
+
+    # ── Snapshot before action (enables rollback) ─────────────────────────────
+    save_snapshot({
+        "deployments": [{"name": deployment, "replicas": current_replicas}],
+        "hpas": [{"name": hpa["name"], "deployment": deployment, **before}]
+    })
+
+    # ── Execute (only if the HPA is unchanged since the read above) ───────────
+    try:
+        updated = await asyncio.to_thread(
+            k8s_client.update_hpa,
+            hpa["name"],
+            namespace,
+            after["min_replicas"],
+            after["max_replicas"],
+            target_cpu_utilization,
+            hpa.get("resource_version")
+        )
+    except ScaleConflictError:
+        release_scale_action(cooldown)
+        return None
+    except Exception:
+        release_scale_action(cooldown)
+        raise
+
+    if after["min_replicas"] != before["min_replicas"]:
+        action = "hpa_floor_raised" if after["min_replicas"] > before["min_replicas"] else "hpa_floor_lowered"
+    else:
+        action = "hpa_tuned"
+
+    response = {
+        "success": True,
+        "action": action,
+        "mode": "hpa",
+        "namespace": namespace,
+        "deployment": deployment,
+        "hpa_name": hpa["name"],
+        "previous_replicas": current_replicas,
+        "new_replicas": max(current_replicas, after["min_replicas"]),
+        "change": max(current_replicas, after["min_replicas"]) - current_replicas,
+        "hpa_before": before,
+        "hpa_after": {
+            "min_replicas": updated["min_replicas"],
+            "max_replicas": updated["max_replicas"],
+            "target_cpu_utilization": updated["target_cpu_utilization"]
+        },
+        "reason": reason or "No reason provided",
+        "timestamp": datetime.now().isoformat(),
+        "rollback_info": (
+            f"To rollback: set HPA '{hpa['name']}' back to min={before['min_replicas']}, "
+            f"max={before['max_replicas']}, target={before['target_cpu_utilization']}%"
+        ),
+        "cooldown": cooldown["cooldown"]
+    }
+    if action == "hpa_floor_lowered":
+        response["note"] = (
+            f"The HPA may now scale down to {after['min_replicas']} replicas; it only does so "
+            f"if CPU stays under its target."
+        )
+
+    # ── Audit log ─────────────────────────────────────────────────────────────
+    audit_log("hpa_tuned", {
+        "deployment": deployment,
+        "namespace": namespace,
+        "hpa": hpa["name"],
+        "before": before,
+        "after": response["hpa_after"],
+        "action": action,
+        "reason": reason or "No reason provided"
+    })
+
+    return response
+
+
+def _render_report(
+    state: Optional[Dict],
+    metrics: List[Dict],
+    audit: List[Dict],
+    scaling_action: Optional[Dict] = None,
+    errors: Optional[Dict[str, str]] = None,
+    impacts: Optional[List[Dict]] = None
+) -> str:
+    """Render the markdown report from already-fetched data."""
+    lines = [
+        "# ClaudeScale Scaling Report",
+        "",
+        f"**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+        ""
+    ]
+
+    if state:
+        lines += [
+            "## Current State",
+            "",
+            f"- **Namespace:** {state['namespace']}",
+            f"- **Total Deployments:** {state['total_deployments']}",
+            f"- **Total Pods:** {state['total_pods']}",
+            f"- **Ready Pods:** {state['total_ready_pods']}",
+            "",
+            "### Deployments"
+        ]
+        for dep in state['deployments']:
+            hpa = dep.get("hpa")
+            managed = (
+                f" (HPA {hpa['min_replicas']}-{hpa['max_replicas']}, target {hpa['target_cpu_utilization']}% CPU)"
+                if hpa else ""
+            )
+            lines.append(f"- **{dep['name']}:** {dep['ready_replicas']}/{dep['replicas']} ready{managed}")
+        lines.append("")
+
+    for m in metrics:
+        heading = "## Metrics Analysis" if len(metrics) == 1 else f"## Metrics Analysis: {m['deployment']}"
+        lines += [
+            heading,
+            "",
+            "### CPU Usage",
+            f"- **Average:** {m['cpu']['average_cores']:.4f} cores ({m['cpu']['utilization_percent']:.1f}% of limit)",
+            f"- **Range:** {m['cpu']['min_cores']:.4f} - {m['cpu']['max_cores']:.4f} cores",
+            f"- **Limit per pod:** {m['cpu']['limit_cores']} cores",
+        ]
+        imbalance = m['cpu'].get("imbalance")
+        if imbalance and imbalance["pods"] > 1:
+            hottest = imbalance["top"][0]
+            lines.append(
+                f"- **Spread across pods:** CV {imbalance['cv']:.2f}, Gini {imbalance['gini']:.2f}; "
+                f"hottest {hottest['pod']} at {hottest['utilization_percent']:.0f}%"
+                + (f" on {hottest['node']}" if hottest['node'] else "")
+            )
+        if m.get("stale"):
+            lines.append(f"- **Stale:** Prometheus unavailable; last stored values from {m['data_age_seconds']:.0f}s ago")
+        readiness = m.get("readiness") or {}
+        if "pods_counted" in readiness:
+            skipped = [
+                f"{readiness[k]} {k.replace('_', ' ')}"
+                for k in ("warming_up", "not_ready", "terminating", "unknown") if readiness[k]
+            ]
+            lines.append(
+                f"- **Pods counted:** {readiness['pods_counted']} of {readiness['pods_with_samples']}"
+                + (f" ({', '.join(skipped)})" if skipped else "")
+            )
+        lines += [
+            "",
+            "### Memory Usage",
+            f"- **Average:** {m['memory']['average_mb']:.2f} MB",
+            "",
+            "### Network",
+            f"- **Receive:** {m['network']['receive_bps']:.2f} bytes/sec",
+            f"- **Transmit:** {m['network']['transmit_bps']:.2f} bytes/sec",
+            ""
+        ]
+
+    if errors:
+        lines += ["## Unavailable Data", ""]
+        lines += [f"- **{source}:** {error}" for source, error in errors.items()]
+        lines.append("")
+
+    if scaling_action:
+        lines += [
+            "## Scaling Action",
+            "",
+            f"**Action:** {scaling_action['action'].replace('_', ' ').title()}",
+            f"**Deployment:** {scaling_action['deployment']}",
+            f"**Previous Replicas:** {scaling_action['previous_replicas']}",
+            f"**New Replicas:** {scaling_action['new_replicas']}",
+            f"**Change:** {scaling_action['change']:+d}",
+            f"**Reason:** {scaling_action['reason']}",
+            f"**Timestamp:** {scaling_action['timestamp']}",
+            f"**Rollback:** {scaling_action.get('rollback_info', 'N/A')}"
+        ]
+
+    if metrics:
+        if lines[-1]:
+            lines.append("")
+        lines += ["## Recommendation", ""]
+        for m in metrics:
+            prefix = "" if len(metrics) == 1 else f"- **{m['deployment']}:** "
+            if m['analysis'].get('imbalance'):
+                text = f"REBALANCE: {m['analysis']['reason']}"
+            elif m['analysis']['cpu_very_high']:
+                text = "URGENT: CPU usage is very high (>90%). Immediate scaling recommended."
+            elif m['analysis']['cpu_high']:
+                text = "ACTION: CPU usage is high (>75%). Scaling up recommended."
+            elif m['cpu']['utilization_percent'] < CPU_LOW_PCT:
+                text = "OPTIMIZE: CPU usage is low (<30%). Consider scaling down to save resources."
+            else:
+                text = "STABLE: System is operating within normal parameters."
+            lines.append(prefix + text)
+
+    # ── Measured impact of past actions ───────────────────────────────────────
+    if impacts:
+        lines += _render_impacts(impacts)
+
+    # ── Recent audit history ──────────────────────────────────────────────────
+    if audit:
+        lines += [
+            "",
+            f"## Recent Audit Log (last {len(audit)} events)",
+            "",
+            "| Timestamp | Event | Deployment | Action | Reason |",
+            "|-----------|-------|------------|--------|--------|"
+        ]
+        for entry in audit:
+            ts = entry.get("timestamp", "")[:19]
+            event = entry.get("event", "")
+            dep = entry.get("deployment", "-")
+            action = entry.get("action", "-")
+            reason = entry.get("reason", "-")[:50]
+            lines.append(f"| {ts} | {event} | {dep} | {action} | {reason} |")
+
+    return "\n".join(lines) + "\n"
+
+
+def _render_impacts(impacts: List[Dict]) -> List[str]:
+    """Report section summarizing scale_impact audit entries."""
+    from tools.impact_analysis import summarize_impacts
+
+    summary = summarize_impacts(impacts)
+    lines = [
+        "",
+        f"## Scaling Impact (last {summary['analyzed']} analyzed actions)",
+        "",
+        "- **Verdicts:** " + ", ".join(f"{v} {n}" for v, n in sorted(summary["verdicts"].items())),
+        f"- **Follow-up action needed:** {summary['follow_up_rate']:.0%} of actions"
+    ]
+    for direction in ("up", "down"):
+        group = summary[f"scale_{direction}"]
+        if group["count"]:
+            effectiveness = group["median_effectiveness"]
+            lines.append(
+                f"- **Scale-{direction}:** median per-pod CPU change "
+                f"{group['median_utilization_change_pct']:+.1f} pts"
+                + (f", effectiveness {effectiveness:.2f}" if effectiveness is not None else "")
+                + f" (n={group['count']})"
+            )
+    if summary["time_to_ready_seconds"]["median"] is not None:
+        lines.append(
+            f"- **New pods ready after:** median {summary['time_to_ready_seconds']['median']:.0f}s, "
+            f"max {summary['time_to_ready_seconds']['max']:.0f}s"
+        )
+    lines += [
+        "",
+        "| Action Time | Deployment | Replicas | CPU Before → After | Expected | Ready (max) | Verdict |",
+        "|-------------|------------|----------|--------------------|----------|-------------|---------|"
+    ]
+    for e in impacts[-5:]:
+        before, after = e.get("before") or {}, e.get("after") or {}
+        ready = (e.get("time_to_ready") or {}).get("max_seconds")
+        cpu = (
+            f"{before['utilization_pct']:.0f}% → {after['utilization_pct']:.0f}%"
+            if before and after else "-"
+        )
+        expected = f"{e['expected_utilization_pct']:.0f}%" if e.get("expected_utilization_pct") is not None else "-"
+        lines.append(
+            f"| {e.get('action_timestamp', '')[:19]} | {e.get('deployment', '-')} | "
+            f"{e.get('previous_replicas')} → {e.get('new_replicas')} | {cpu} | {expected} | "
+            f"{f'{ready:.0f}s' if ready is not None else '-'} | {e.get('verdict', '-')} |"
+        )
+    return lines
+
+
 async def generate_report(
-    state: Dict,
-    metrics: Dict,
-    scaling_action: Optional[Dict] = None
+    state: Optional[Dict],
+    metrics: Any,
+    scaling_action: Optional[Dict] = None,
+    audit: Optional[List[Dict]] = None
 ) -> str:
     """
     Tool 4: Generate markdown report
@@ -265,85 +1769,164 @@ async def generate_report(
     - Explain scaling decisions
     - Document system state
     - Show recent audit history
+    - Summarize the measured impact of recent scaling actions
 
     Args:
-        state: Current state from get_current_state()
-        metrics: Metrics from get_metrics()
+        state: Current state from get_current_state() (or None)
+        metrics: Metrics from get_metrics(), or a list of them for a
+            multi-deployment report (or None)
         scaling_action: Scaling action from scale_deployment() (if any)
+        audit: Recent audit entries (default: last 10 read from the log)
 
     Returns:
         Markdown formatted report
     """
-    report = f"""# ClaudeScale Scaling Report
+    if audit is None:
+        audit = await asyncio.to_thread(get_recent_audit, 10)
+    impacts = await asyncio.to_thread(get_recent_audit, REPORT_IMPACT_ENTRIES, {"scale_impact"})
+    if metrics is None:
+        metrics = []
+    elif isinstance(metrics, dict):
+        metrics = [metrics]
 
-**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+    return _render_report(state, metrics, audit, scaling_action, impacts=impacts)
 
-## Current State
 
-- **Namespace:** {state['namespace']}
-- **Total Deployments:** {state['total_deployments']}
-- **Total Pods:** {state['total_pods']}
-- **Ready Pods:** {state['total_ready_pods']}
+async def build_report(
+    k8s_client,
+    prom_client,
+    namespace: str = "claudescale",
+    deployments: Optional[List[str]] = None,
+    include_state: bool = True,
+    include_metrics: bool = True,
+    max_age_seconds: float = REPORT_MAX_AGE_SECONDS
+) -> str:
+    """
+    Fetch everything a report needs concurrently and render it
 
-### Deployments
-"""
+    State, metrics for every deployment, the audit tail and recent
+    scale_impact entries are fetched in parallel. State and metrics fetched within max_age_seconds (by any
+    tool) are reused instead of re-queried. A failing metrics source is
+    noted in the report instead of failing the whole report.
 
-    for dep in state['deployments']:
-        report += f"- **{dep['name']}:** {dep['ready_replicas']}/{dep['replicas']} ready\n"
+    Args:
+        k8s_client: Kubernetes client instance
+        prom_client: Prometheus client instance
+        namespace: Kubernetes namespace
+        deployments: Deployments to cover (default: ["demo-app"])
+        include_state: Include current state in report
+        include_metrics: Include metrics in report
+        max_age_seconds: Reuse cached metrics up to this age
 
-    report += f"""
-## Metrics Analysis
+    Returns:
+        Markdown formatted report
+    """
+    start = time.perf_counter()
+    deployments = deployments or ["demo-app"]
 
-### CPU Usage
-- **Average:** {metrics['cpu']['average_cores']:.4f} cores ({metrics['cpu']['utilization_percent']:.1f}% of limit)
-- **Range:** {metrics['cpu']['min_cores']:.4f} - {metrics['cpu']['max_cores']:.4f} cores
-- **Limit per pod:** {metrics['cpu']['limit_cores']} cores
+    async def no_data():
+        return None
 
-### Memory Usage
-- **Average:** {metrics['memory']['average_mb']:.2f} MB
+    state_task = _list_state(k8s_client, namespace, False) if include_state else no_data()
+    metric_tasks = [
+        get_metrics(prom_client, namespace, d, max_age_seconds=max_age_seconds, k8s_client=k8s_client)
+        for d in (deployments if include_metrics else [])
+    ]
+    audit_task = asyncio.to_thread(get_recent_audit, 10)
+    impact_task = asyncio.to_thread(get_recent_audit, REPORT_IMPACT_ENTRIES, {"scale_impact"})
 
-### Network
-- **Receive:** {metrics['network']['receive_bps']:.2f} bytes/sec
-- **Transmit:** {metrics['network']['transmit_bps']:.2f} bytes/sec
+    state, audit, impacts, *metric_results = await asyncio.gather(
+        state_task, audit_task, impact_task, *metric_tasks, return_exceptions=True
+    )
 
-"""
+    errors: Dict[str, str] = {}
+    if isinstance(state, Exception):
+        errors["state"] = f"{type(state).__name__}: {state}"
+        state = None
+    if isinstance(audit, Exception):
+        audit = []
+    if isinstance(impacts, Exception):
+        impacts = []
+    metrics = []
+    for name, result in zip(deployments, metric_results):
+        if isinstance(result, Exception):
+            errors[f"metrics/{name}"] = f"{type(result).__name__}: {result}"
+        else:
+            metrics.append(result)
 
-    if scaling_action:
-        report += f"""## Scaling Action
-
-**Action:** {scaling_action['action'].replace('_', ' ').title()}
-**Deployment:** {scaling_action['deployment']}
-**Previous Replicas:** {scaling_action['previous_replicas']}
-**New Replicas:** {scaling_action['new_replicas']}
-**Change:** {scaling_action['change']:+d}
-**Reason:** {scaling_action['reason']}
-**Timestamp:** {scaling_action['timestamp']}
-**Rollback:** {scaling_action.get('rollback_info', 'N/A')}
-"""
+    if state is None and not metrics and not errors:
+        return "# No data available"
 
-    report += "\n## Recommendation\n\n"
+    report = _render_report(state, metrics, audit, errors=errors, impacts=impacts)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    _report_latencies_ms.append(elapsed_ms)
+    REPORT_DURATION.observe(elapsed_ms / 1000)
 
-    if metrics['analysis']['cpu_very_high']:
-        report += "URGENT: CPU usage is very high (>90%). Immediate scaling recommended."
-    elif metrics['analysis']['cpu_high']:
-        report += "ACTION: CPU usage is high (>75%). Scaling up recommended."
-    elif metrics['cpu']['utilization_percent'] < 30:
-        report += "OPTIMIZE: CPU usage is low (<30%). Consider scaling down to save resources."
-    else:
-        report += "STABLE: System is operating within normal parameters."
-
-    # ── Append recent audit history ───────────────────────────────────────────
-    recent = get_recent_audit(10)
-    if recent:
-        report += "\n\n## Recent Audit Log (last 10 events)\n\n"
-        report += "| Timestamp | Event | Deployment | Action | Reason |\n"
-        report += "|-----------|-------|------------|--------|--------|\n"
-        for entry in recent:
-            ts = entry.get("timestamp", "")[:19]
-            event = entry.get("event", "")
-            dep = entry.get("deployment", "-")
-            action = entry.get("action", "-")
-            reason = entry.get("reason", "-")[:50]
-            report += f"| {ts} | {event} | {dep} | {action} | {reason} |\n"
+    return report + f"\n_Report generated in {elapsed_ms:.0f} ms_\n"
+
+
+def get_report_latency_stats() -> Dict[str, Any]:
+    """Summarize recent report generation latency (ms)."""
+    samples = sorted(_report_latencies_ms)
+    if not samples:
+        return {"count": 0}
+    return {
+        "count": len(samples),
+        "last_ms": round(_report_latencies_ms[-1], 1),
+        "p50_ms": round(samples[len(samples) // 2], 1),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 1),
+        "max_ms": round(samples[-1], 1)
+    }
+
+
+async def get_clusters_overview(
+    cluster_pool,
+    namespace: str = "claudescale",
+    deployment: str = "demo-app",
+    include_metrics: bool = True,
+    clusters: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Tool 5: Combined state/metrics view across clusters
+
+    Queries every cluster in parallel, each under its own timeout.
+    Clusters that fail or time out are listed under "errors" and the
+    rest are still returned (partial results).
 
-    return report
+    Args:
+        cluster_pool: ClusterPool instance
+        namespace: Kubernetes namespace, queried in every cluster
+        deployment: Deployment to pull metrics for
+        include_metrics: Also query each cluster's Prometheus
+        clusters: Cluster names to include (default: all)
+
+    Returns:
+        Dict with per-cluster state/metrics and fan-out diagnostics
+    """
+    async def overview(cluster) -> Dict[str, Any]:
+        entry: Dict[str, Any] = {"state": await _list_state(cluster.k8s, namespace, False)}
+        if include_metrics:
+            try:
+                entry["metrics"] = await get_metrics(cluster.prom, namespace, deployment, k8s_client=cluster.k8s)
+            except Exception as e:
+                entry["metrics_error"] = f"{type(e).__name__}: {e}"
+        return entry
+
+    fan_out = await cluster_pool.fan_out(overview, clusters)
+    results = fan_out["results"]
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "namespace": namespace,
+        "deployment": deployment,
+        "clusters": results,
+        "errors": fan_out["errors"],
+        "elapsed_ms": fan_out["elapsed_ms"],
+        "partial": fan_out["partial"],
+        "totals": {
+            "clusters_ok": len(results),
+            "clusters_failed": len(fan_out["errors"]),
+            "total_pods": sum(r["state"]["total_pods"] for r in results.values()),
+            "total_ready_pods": sum(r["state"]["total_ready_pods"] for r in results.values())
+        }
+    }
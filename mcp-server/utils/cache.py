@@ -0,0 +1,60 @@
+"""
+In-process caching utilities for ClaudeScale
+"""
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Thread-safe key/value cache whose entries expire after a fixed TTL
+    """
+
+    def __init__(self, ttl_seconds: float = 5.0):
+        """
+        Initialize cache
+
+        Args:
+            ttl_seconds: How long an entry stays valid (0 disables caching)
+        """
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, max_age_seconds: Optional[float] = None) -> Optional[Any]:
+        """
+        Return the cached value for key, or None if missing/expired
+
+        Args:
+            key: Cache key
+            max_age_seconds: Accept entries up to this age instead of the
+                cache TTL (capped by the TTL)
+        """
+        max_age = self.ttl_seconds if max_age_seconds is None else min(max_age_seconds, self.ttl_seconds)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < max_age:
+                self.hits += 1
+                return entry[1]
+            if entry is not None and time.monotonic() - entry[0] >= self.ttl_seconds:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: Hashable, value: Any):
+        """Store value under key, resetting its TTL."""
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one entry, or every entry when key is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
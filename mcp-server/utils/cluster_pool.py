@@ -0,0 +1,154 @@
+"""
+Multi-cluster client pool for ClaudeScale
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from utils.kubernetes_client import KubernetesClient
+from utils.prometheus_client import PrometheusClient
+
+logger = logging.getLogger("claudescale.clusters")
+
+
+@dataclass
+class Cluster:
+    """
+    Pooled clients for one cluster
+    """
+
+    name: str
+    k8s: KubernetesClient
+    prom: PrometheusClient
+    timeout_seconds: float
+
+
+class ClusterPool:
+    """
+    Holds one Kubernetes/Prometheus client pair per configured cluster
+    and fans tool calls out across them
+    """
+
+    def __init__(self, clusters: List[Cluster]):
+        """
+        Initialize pool
+
+        Args:
+            clusters: Cluster entries; the first one is the default
+        """
+        if not clusters:
+            raise ValueError("ClusterPool needs at least one cluster")
+        self._clusters: Dict[str, Cluster] = {c.name: c for c in clusters}
+        self.default = clusters[0].name
+
+    @classmethod
+    def from_settings(cls, settings) -> "ClusterPool":
+        """
+        Build the pool from Settings.CLUSTERS, or a single "default"
+        cluster from the legacy single-cluster settings when it is empty
+        """
+        if not settings.CLUSTERS:
+            prom_url = settings.PROMETHEUS_URL if settings.KUBERNETES_IN_CLUSTER else settings.PROMETHEUS_LOCAL_URL
+            return cls([Cluster(
+                name="default",
+                k8s=KubernetesClient(
+                    namespace=settings.KUBERNETES_NAMESPACE,
+                    in_cluster=settings.KUBERNETES_IN_CLUSTER,
+                    cache_ttl_seconds=settings.STATE_CACHE_TTL_SECONDS,
+                    config_file=settings.KUBECONFIG_PATH
+                ),
+                prom=PrometheusClient(url=prom_url),
+                timeout_seconds=settings.CLUSTER_TIMEOUT_SECONDS
+            )])
+
+        return cls([
+            Cluster(
+                name=c.name,
+                k8s=KubernetesClient(
+                    namespace=c.namespace or settings.KUBERNETES_NAMESPACE,
+                    in_cluster=c.in_cluster,
+                    cache_ttl_seconds=settings.STATE_CACHE_TTL_SECONDS,
+                    context=c.context,
+                    config_file=settings.KUBECONFIG_PATH
+                ),
+                prom=PrometheusClient(url=c.prometheus_url),
+                timeout_seconds=c.timeout_seconds or settings.CLUSTER_TIMEOUT_SECONDS
+            )
+            for c in settings.CLUSTERS
+        ])
+
+    def names(self) -> List[str]:
+        """Return configured cluster names, default first."""
+        return list(self._clusters)
+
+    def get(self, name: Optional[str] = None) -> Cluster:
+        """
+        Look up a cluster by name
+
+        Args:
+            name: Cluster name (default: the first configured cluster)
+
+        Returns:
+            Cluster entry
+
+        Raises:
+            ValueError: If the cluster is not configured
+        """
+        cluster = self._clusters.get(name or self.default)
+        if cluster is None:
+            raise ValueError(
+                f"Unknown cluster '{name}'. Configured clusters: {', '.join(self._clusters)}"
+            )
+        return cluster
+
+    async def fan_out(
+        self,
+        call: Callable[[Cluster], Awaitable[Any]],
+        names: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Run call(cluster) on several clusters concurrently
+
+        Each cluster gets its own timeout; a slow or failing cluster is
+        reported under "errors" without holding back the others.
+
+        Args:
+            call: Coroutine function taking a Cluster
+            names: Clusters to query (default: all)
+
+        Returns:
+            {"results": {name: result}, "errors": {name: message},
+             "elapsed_ms": {name: ms}, "partial": bool}
+        """
+        targets = [self.get(n) for n in (names or self.names())]
+
+        async def run(cluster: Cluster):
+            start = time.monotonic()
+            try:
+                result = await asyncio.wait_for(call(cluster), timeout=cluster.timeout_seconds)
+                error = None
+            except asyncio.TimeoutError:
+                result, error = None, f"Timed out after {cluster.timeout_seconds}s"
+            except Exception as e:
+                logger.warning(f"Cluster {cluster.name} failed: {e}")
+                result, error = None, f"{type(e).__name__}: {e}"
+            return cluster.name, result, error, round((time.monotonic() - start) * 1000, 1)
+
+        results: Dict[str, Any] = {}
+        errors: Dict[str, str] = {}
+        elapsed: Dict[str, float] = {}
+        for name, result, error, elapsed_ms in await asyncio.gather(*(run(c) for c in targets)):
+            elapsed[name] = elapsed_ms
+            if error is None:
+                results[name] = result
+            else:
+                errors[name] = error
+
+        return {
+            "results": results,
+            "errors": errors,
+            "elapsed_ms": elapsed,
+            "partial": bool(errors)
+        }
@@ -0,0 +1,106 @@
+"""
+Cron expressions for ClaudeScale schedules
+
+Standard five fields: minute hour day-of-month month day-of-week, each
+"*", a number, a range "a-b", a list "a,b" or a step "*/n" / "a-b/n".
+Months and weekdays also take names (jan, mon). Sunday is 0 or 7. As in
+cron, when both day fields are restricted a day matches either one.
+"""
+from datetime import date, datetime, timedelta
+from typing import Optional, Set
+
+_FIELDS = (
+    ("minute", 0, 59, {}),
+    ("hour", 0, 23, {}),
+    ("day of month", 1, 31, {}),
+    ("month", 1, 12, {n: i for i, n in enumerate(
+        ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), 1)}),
+    ("day of week", 0, 7, {n: i for i, n in enumerate(("sun", "mon", "tue", "wed", "thu", "fri", "sat"))}),
+)
+
+
+def _parse_field(text: str, name: str, low: int, high: int, names: dict) -> Set[int]:
+    def value(token: str) -> int:
+        number = names.get(token.lower()) if token.lower() in names else int(token)
+        if not low <= number <= high:
+            raise ValueError(f"{name} {token} out of range {low}-{high}")
+        return number
+
+    values: Set[int] = set()
+    for part in text.split(","):
+        span, _, step = part.partition("/")
+        if span == "*":
+            start, end = low, high
+        elif "-" in span:
+            start, end = (value(t) for t in span.split("-", 1))
+        else:
+            start = end = value(span)
+            if step:
+                end = high
+        stride = int(step) if step else 1
+        if stride < 1 or start > end:
+            raise ValueError(f"Invalid {name} field '{part}'")
+        values.update(range(start, end + 1, stride))
+    return values
+
+
+class CronExpression:
+    """
+    A parsed five-field cron expression
+    """
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression '{expression}' needs 5 fields, got {len(fields)}")
+        try:
+            parsed = [_parse_field(text, *spec) for text, spec in zip(fields, _FIELDS)]
+        except ValueError as e:
+            raise ValueError(f"Invalid cron expression '{expression}': {e}") from None
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {d % 7 for d in weekdays}
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+        self._hours_desc = sorted(self.hours, reverse=True)
+        self._minutes_desc = sorted(self.minutes, reverse=True)
+
+    def _day_matches(self, d: date) -> bool:
+        if d.month not in self.months:
+            return False
+        day = d.day in self.days
+        weekday = (d.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def matches(self, t: datetime) -> bool:
+        """Whether the minute containing t is a firing time."""
+        return t.minute in self.minutes and t.hour in self.hours and self._day_matches(t.date())
+
+    def last_fire(self, t: datetime, within_minutes: int) -> Optional[datetime]:
+        """
+        Latest firing minute at or before t, looking back at most within_minutes
+
+        Works a day at a time: on the latest matching day, the latest
+        matching hour and minute not after t.
+        """
+        t = t.replace(second=0, microsecond=0)
+        earliest = t - timedelta(minutes=within_minutes)
+        d = t.date()
+        while d >= earliest.date():
+            if self._day_matches(d):
+                today = d == t.date()
+                for hour in self._hours_desc:
+                    if today and hour > t.hour:
+                        continue
+                    minute = next((m for m in self._minutes_desc
+                                   if not (today and hour == t.hour and m > t.minute)), None)
+                    if minute is not None:
+                        fire = t.replace(year=d.year, month=d.month, day=d.day, hour=hour, minute=minute)
+                        return fire if fire >= earliest else None
+            d -= timedelta(days=1)
+        return None
+
+    def __repr__(self) -> str:
+        return f"CronExpression({self.expression!r})"
@@ -1,50 +1,191 @@
 """
 Kubernetes client utilities for ClaudeScale
+
+The kubernetes package is imported and the kubeconfig is loaded on first
+API use, not at import/construction time: the import alone costs a few
+hundred milliseconds, and an unreachable cluster should fail the tool call
+that needs it rather than server startup.
 """
-from kubernetes import client, config
-from kubernetes.client.rest import ApiException
+import json
+import math
+import threading
+from contextlib import contextmanager
 from typing import Dict, List, Optional
 
+from utils.cache import TTLCache
+from utils.rate_limit import downstream_bucket
+from utils.self_metrics import register_cache, time_downstream
+
+
+SCALING_ANNOTATION_PREFIX = "claudescale.io/"  # Only these annotations are passed on
+
+_QUANTITY_SUFFIXES = {
+    "Ki": 2 ** 10, "Mi": 2 ** 20, "Gi": 2 ** 30, "Ti": 2 ** 40, "Pi": 2 ** 50, "Ei": 2 ** 60,
+    "n": 1e-9, "u": 1e-6, "m": 1e-3, "k": 1e3, "M": 1e6, "G": 1e9, "T": 1e12, "P": 1e15, "E": 1e18,
+}
+
+
+def parse_quantity(value) -> float:
+    """Kubernetes resource quantity ("250m", "1.5", "128Mi", "1e3") as a plain number."""
+    if value is None:
+        return 0.0
+    text = str(value).strip()
+    for suffix in _QUANTITY_SUFFIXES:  # Two-letter suffixes are listed first
+        if text.endswith(suffix):
+            return float(text[:-len(suffix)]) * _QUANTITY_SUFFIXES[suffix]
+    return float(text)
+
+
+class ScaleConflictError(Exception):
+    """Raised when a conditioned scale update loses to a concurrent change."""
+
 
 class KubernetesClient:
     """
     Wrapper around Kubernetes Python client
     """
 
-    def __init__(self, namespace: str = "claudescale", in_cluster: bool = False):
+    def __init__(
+        self,
+        namespace: str = "claudescale",
+        in_cluster: bool = False,
+        cache_ttl_seconds: float = 5.0,
+        context: Optional[str] = None,
+        config_file: Optional[str] = None
+    ):
         """
         Initialize Kubernetes client
 
+        Each instance owns its own ApiClient, so several clients built from
+        different kubeconfig contexts can live side by side in one process.
+        The ApiClient is created lazily on first API call.
+
         Args:
-            namespace: Kubernetes namespace to operate in
+            namespace: Default Kubernetes namespace, used when a call
+                does not specify one
             in_cluster: Whether running inside a Kubernetes cluster
+            cache_ttl_seconds: How long deployment listings are reused
+            context: kubeconfig context to use (default: current context)
+            config_file: kubeconfig path (default: ~/.kube/config / $KUBECONFIG)
         """
         self.namespace = namespace
+        self.context = context
+        self.in_cluster = in_cluster
+        self.config_file = config_file
+
+        self._api_client = None
+        self._apis: Dict[str, object] = {}
+        self._init_lock = threading.Lock()
+
+        # Deployment listings keyed by namespace
+        self.deployment_cache = TTLCache(ttl_seconds=cache_ttl_seconds)
+        register_cache("deployments", self.deployment_cache)
+        # List resourceVersion of the last listing, per namespace (None = all)
+        self.list_resource_versions: Dict[Optional[str], str] = {}
+
+        # Pod listings keyed by (namespace, deployment)
+        self.pod_cache = TTLCache(ttl_seconds=cache_ttl_seconds)
+        register_cache("pods", self.pod_cache)
+
+        # Node capacity view (allocatable and requested per node), key "nodes"
+        self.node_cache = TTLCache(ttl_seconds=cache_ttl_seconds)
+        register_cache("nodes", self.node_cache)
 
-        if in_cluster:
-            config.load_incluster_config()
-        else:
-            config.load_kube_config()
+        # HorizontalPodAutoscaler summaries keyed by namespace
+        self.hpa_cache = TTLCache(ttl_seconds=cache_ttl_seconds)
+        register_cache("hpas", self.hpa_cache)
 
-        self.apps_v1 = client.AppsV1Api()
-        self.core_v1 = client.CoreV1Api()
-        self.autoscaling_v1 = client.AutoscalingV1Api()
+        # Kubernetes API request budget for this cluster
+        self.rate_limiter = downstream_bucket("kubernetes")
 
-    def get_deployment(self, name: str) -> Optional[Dict]:
+    def _api(self, name: str):
+        """
+        Return the named kubernetes.client API object, loading the
+        kubeconfig and building the shared ApiClient on first use
+        """
+        api = self._apis.get(name)
+        if api is not None:
+            return api
+
+        with self._init_lock:
+            if self._api_client is None:
+                from kubernetes import client, config
+
+                if self.in_cluster:
+                    config.load_incluster_config()
+                    self._api_client = client.ApiClient()
+                else:
+                    self._api_client = config.new_client_from_config(
+                        config_file=self.config_file,
+                        context=self.context
+                    )
+
+            if name not in self._apis:
+                from kubernetes import client
+                self._apis[name] = getattr(client, name)(self._api_client)
+            return self._apis[name]
+
+    @property
+    def apps_v1(self):
+        """AppsV1Api bound to this client's cluster."""
+        return self._api("AppsV1Api")
+
+    @property
+    def core_v1(self):
+        """CoreV1Api bound to this client's cluster."""
+        return self._api("CoreV1Api")
+
+    @property
+    def autoscaling_v2(self):
+        """AutoscalingV2Api bound to this client's cluster."""
+        return self._api("AutoscalingV2Api")
+
+    @contextmanager
+    def _request(self, operation: str):
+        """Rate limit, time and trace one Kubernetes API request."""
+        self.rate_limiter.acquire()
+        with time_downstream("kubernetes", operation):
+            yield
+
+    def _ns(self, namespace: Optional[str]) -> str:
+        """Resolve the namespace for a call, falling back to the default."""
+        return namespace or self.namespace
+
+    @staticmethod
+    def _deployment_summary(dep) -> Dict:
+        """Condense a V1Deployment into the listing dict used by the tools."""
+        return {
+            "name": dep.metadata.name,
+            "namespace": dep.metadata.namespace,
+            "replicas": dep.spec.replicas,
+            "ready_replicas": dep.status.ready_replicas or 0,
+            "available_replicas": dep.status.available_replicas or 0,
+            "resource_version": dep.metadata.resource_version,
+            "annotations": {
+                k: v for k, v in (dep.metadata.annotations or {}).items()
+                if k.startswith(SCALING_ANNOTATION_PREFIX)
+            }
+        }
+
+    def get_deployment(self, name: str, namespace: Optional[str] = None) -> Optional[Dict]:
         """
         Get deployment information
 
         Args:
             name: Deployment name
+            namespace: Kubernetes namespace (default: client namespace)
 
         Returns:
             Deployment info dict or None if not found
         """
+        from kubernetes.client.rest import ApiException
+
         try:
-            deployment = self.apps_v1.read_namespaced_deployment(
-                name=name,
-                namespace=self.namespace
-            )
+            with self._request("read_namespaced_deployment"):
+                deployment = self.apps_v1.read_namespaced_deployment(
+                    name=name,
+                    namespace=self._ns(namespace)
+                )
 
             return {
                 "name": deployment.metadata.name,
@@ -53,8 +194,14 @@ class KubernetesClient:
                 "ready_replicas": deployment.status.ready_replicas or 0,
                 "available_replicas": deployment.status.available_replicas or 0,
                 "updated_replicas": deployment.status.updated_replicas or 0,
+                "resource_version": deployment.metadata.resource_version,
                 "labels": deployment.metadata.labels,
+                "annotations": {
+                    k: v for k, v in (deployment.metadata.annotations or {}).items()
+                    if k.startswith(SCALING_ANNOTATION_PREFIX)
+                },
                 "selector": deployment.spec.selector.match_labels,
+                "pod_template": self._pod_template_summary(deployment.spec.template.spec),
                 "creation_timestamp": deployment.metadata.creation_timestamp.isoformat()
             }
         except ApiException as e:
@@ -62,78 +209,482 @@ class KubernetesClient:
                 return None
             raise
 
-    def list_deployments(self) -> List[Dict]:
+    def list_deployments(self, namespace: Optional[str] = None) -> List[Dict]:
         """
         List all deployments in namespace
 
+        Results are served from the deployment cache while fresh.
+
+        Args:
+            namespace: Kubernetes namespace (default: client namespace)
+
         Returns:
             List of deployment info dicts
         """
-        deployments = self.apps_v1.list_namespaced_deployment(
-            namespace=self.namespace
-        )
+        ns = self._ns(namespace)
+        cached = self.deployment_cache.get(ns)
+        if cached is not None:
+            return cached
 
-        result = []
-        for dep in deployments.items:
-            result.append({
-                "name": dep.metadata.name,
-                "replicas": dep.spec.replicas,
-                "ready_replicas": dep.status.ready_replicas or 0,
-                "available_replicas": dep.status.available_replicas or 0
-            })
+        with self._request("list_namespaced_deployment"):
+            deployments = self.apps_v1.list_namespaced_deployment(namespace=ns)
+
+        result = [self._deployment_summary(dep) for dep in deployments.items]
+        self.deployment_cache.set(ns, result)
+        self.list_resource_versions[ns] = deployments.metadata.resource_version
 
         return result
 
-    def scale_deployment(self, name: str, replicas: int) -> Dict:
+    def list_all_deployments(self) -> Dict[str, List[Dict]]:
+        """
+        List deployments across every namespace with a single API call
+
+        The per-namespace groups also populate the deployment cache, so
+        follow-up list_deployments() calls for any of them are free.
+
+        Returns:
+            Dict mapping namespace -> list of deployment info dicts
+        """
+        with self._request("list_deployment_for_all_namespaces"):
+            deployments = self.apps_v1.list_deployment_for_all_namespaces()
+
+        grouped: Dict[str, List[Dict]] = {}
+        for dep in deployments.items:
+            summary = self._deployment_summary(dep)
+            grouped.setdefault(summary["namespace"], []).append(summary)
+
+        for ns, items in grouped.items():
+            self.deployment_cache.set(ns, items)
+            self.list_resource_versions[ns] = deployments.metadata.resource_version
+        self.list_resource_versions[None] = deployments.metadata.resource_version
+
+        return grouped
+
+    def wait_for_deployment_change(
+        self,
+        namespace: Optional[str],
+        resource_version: str,
+        timeout_seconds: float
+    ) -> bool:
+        """
+        Block until a deployment changes after resource_version, or timeout
+
+        One watch request (no polling): the API server holds it open and
+        sends the first change after resource_version. The deployment
+        cache for the namespace is dropped when something changed.
+
+        Args:
+            namespace: Namespace to watch (None = all namespaces)
+            resource_version: List resourceVersion to watch from
+            timeout_seconds: Longest time to wait
+
+        Returns:
+            True if a deployment was added, changed or deleted (or the
+            resourceVersion is too old to watch from and the caller should
+            re-list); False on timeout
+        """
+        from kubernetes.watch.watch import iter_resp_lines
+
+        kwargs = {
+            "watch": True,
+            "resource_version": resource_version,
+            "timeout_seconds": max(1, math.ceil(timeout_seconds)),
+            "_preload_content": False,
+            "_request_timeout": timeout_seconds + 5
+        }
+        changed = False
+        with self._request("watch_deployment"):
+            if namespace is None:
+                response = self.apps_v1.list_deployment_for_all_namespaces(**kwargs)
+            else:
+                response = self.apps_v1.list_namespaced_deployment(namespace=namespace, **kwargs)
+            try:
+                for line in iter_resp_lines(response):
+                    if line and json.loads(line).get("type") in ("ADDED", "MODIFIED", "DELETED", "ERROR"):
+                        changed = True
+                        break
+            finally:
+                response.close()
+                response.release_conn()
+
+        if changed:
+            self.deployment_cache.invalidate(namespace)  # None drops every namespace
+        return changed
+
+    def scale_deployment(
+        self,
+        name: str,
+        replicas: int,
+        namespace: Optional[str] = None,
+        resource_version: Optional[str] = None
+    ) -> Dict:
         """
         Scale a deployment to specified number of replicas
 
         Args:
             name: Deployment name
             replicas: Desired number of replicas
+            namespace: Kubernetes namespace (default: client namespace)
+            resource_version: Only apply if the deployment is still at this
+                resourceVersion (as returned by get_deployment); the API
+                server rejects the patch if anything changed it since
 
         Returns:
             Updated deployment info
+
+        Raises:
+            ScaleConflictError: If resource_version is stale
         """
+        from kubernetes.client.rest import ApiException
+
+        ns = self._ns(namespace)
         body = {"spec": {"replicas": replicas}}
+        if resource_version is not None:
+            body["metadata"] = {"resourceVersion": resource_version}
 
-        self.apps_v1.patch_namespaced_deployment_scale(
-            name=name,
-            namespace=self.namespace,
-            body=body
-        )
+        try:
+            with self._request("patch_namespaced_deployment_scale"):
+                self.apps_v1.patch_namespaced_deployment_scale(
+                    name=name,
+                    namespace=ns,
+                    body=body
+                )
+        except ApiException as e:
+            if e.status == 409:
+                raise ScaleConflictError(
+                    f"Deployment '{name}' changed since resourceVersion {resource_version}"
+                ) from e
+            raise
+        finally:
+            self.deployment_cache.invalidate(ns)
+            self.pod_cache.invalidate((ns, name))
+            self.node_cache.invalidate("nodes")
 
-        return self.get_deployment(name)
+        return self.get_deployment(name, ns)
+
+    @staticmethod
+    def _pod_summary(pod) -> Dict:
+        """Condense a V1Pod into the dict used by the tools (times as ISO 8601 UTC)."""
+        statuses = pod.status.container_statuses or []
+        ready_condition = next(
+            (c for c in pod.status.conditions or [] if c.type == "Ready"), None
+        )
+        return {
+            "name": pod.metadata.name,
+            "status": pod.status.phase,
+            "ready": all(c.ready for c in statuses) if statuses else False,
+            "restarts": sum(c.restart_count for c in statuses),
+            "node": pod.spec.node_name,
+            "ip": pod.status.pod_ip,
+            "start_time": pod.status.start_time.isoformat() if pod.status.start_time else None,
+            "ready_since": (
+                ready_condition.last_transition_time.isoformat()
+                if ready_condition is not None and ready_condition.status == "True"
+                and ready_condition.last_transition_time else None
+            ),
+            "terminating": pod.metadata.deletion_timestamp is not None
+        }
 
-    def get_pods(self, deployment_name: str) -> List[Dict]:
+    def get_pods(self, deployment_name: str, namespace: Optional[str] = None) -> List[Dict]:
         """
         Get pods for a deployment
 
+        Results are served from the pod cache while fresh.
+
         Args:
             deployment_name: Deployment name
+            namespace: Kubernetes namespace (default: client namespace)
 
         Returns:
-            List of pod info dicts
+            List of pod info dicts, with readiness, start time and
+            whether the pod is terminating
         """
-        deployment = self.get_deployment(deployment_name)
+        ns = self._ns(namespace)
+        cached = self.pod_cache.get((ns, deployment_name))
+        if cached is not None:
+            return cached
+
+        deployment = self.get_deployment(deployment_name, ns)
         if not deployment:
             return []
 
         label_selector = ",".join([f"{k}={v}" for k, v in deployment["selector"].items()])
-        pods = self.core_v1.list_namespaced_pod(
-            namespace=self.namespace,
-            label_selector=label_selector
-        )
+        with self._request("list_namespaced_pod"):
+            pods = self.core_v1.list_namespaced_pod(
+                namespace=ns,
+                label_selector=label_selector
+            )
 
-        result = []
+        result = [self._pod_summary(pod) for pod in pods.items]
+        self.pod_cache.set((ns, deployment_name), result)
+
+        return result
+
+    # ─── Node capacity ────────────────────────────────────────────────────
+
+    @staticmethod
+    def _pod_requests(spec) -> Dict[str, float]:
+        """
+        CPU (cores) and memory (bytes) the scheduler reserves for one pod
+
+        Containers without a request fall back to their limit, as the API
+        server defaults them. Init containers run one at a time before the
+        app containers, so the larger of the two totals counts, plus any
+        pod overhead.
+        """
+        def amount(container, resource: str) -> float:
+            res = container.resources
+            value = ((res.requests if res else None) or {}).get(resource)
+            if value is None:
+                value = ((res.limits if res else None) or {}).get(resource)
+            return parse_quantity(value)
+
+        cpu = sum(amount(c, "cpu") for c in spec.containers or [])
+        memory = sum(amount(c, "memory") for c in spec.containers or [])
+        for init in spec.init_containers or []:
+            cpu = max(cpu, amount(init, "cpu"))
+            memory = max(memory, amount(init, "memory"))
+
+        overhead = spec.overhead or {}
+        return {
+            "cpu_cores": cpu + parse_quantity(overhead.get("cpu")),
+            "memory_bytes": memory + parse_quantity(overhead.get("memory"))
+        }
+
+    @classmethod
+    def _pod_template_summary(cls, spec) -> Dict:
+        """What the scheduler needs from a deployment's pod template."""
+        return {
+            "requests": cls._pod_requests(spec),
+            "node_selector": spec.node_selector or {},
+            "tolerations": [
+                {"key": t.key, "operator": t.operator or "Equal", "value": t.value, "effect": t.effect}
+                for t in spec.tolerations or []
+            ]
+        }
+
+    def get_node_capacity(self) -> List[Dict]:
+        """
+        Allocatable and already-requested resources for every node
+
+        One node listing plus one listing of all running/pending pods
+        (summing their requests onto the node they are bound to). The
+        result is served from the node cache while fresh and dropped after
+        every scale, so back-to-back scaling decisions share one view.
+
+        Returns:
+            List of node dicts: name, schedulable (Ready and not cordoned),
+            labels, NoSchedule/NoExecute taints, and "allocatable" /
+            "requested" with cpu_cores, memory_bytes and pods
+        """
+        cached = self.node_cache.get("nodes")
+        if cached is not None:
+            return cached
+
+        with self._request("list_node"):
+            nodes = self.core_v1.list_node()
+        with self._request("list_pod_for_all_namespaces"):
+            pods = self.core_v1.list_pod_for_all_namespaces(
+                field_selector="status.phase!=Succeeded,status.phase!=Failed"
+            )
+
+        requested: Dict[str, Dict[str, float]] = {}
         for pod in pods.items:
+            if not pod.spec.node_name:
+                continue
+            usage = requested.setdefault(pod.spec.node_name, {"cpu_cores": 0.0, "memory_bytes": 0.0, "pods": 0})
+            pod_requests = self._pod_requests(pod.spec)
+            usage["cpu_cores"] += pod_requests["cpu_cores"]
+            usage["memory_bytes"] += pod_requests["memory_bytes"]
+            usage["pods"] += 1
+
+        result = []
+        for node in nodes.items:
+            allocatable = node.status.allocatable or {}
+            ready = any(
+                c.type == "Ready" and c.status == "True" for c in node.status.conditions or []
+            )
             result.append({
-                "name": pod.metadata.name,
-                "status": pod.status.phase,
-                "ready": all(c.ready for c in pod.status.container_statuses) if pod.status.container_statuses else False,
-                "restarts": sum(c.restart_count for c in pod.status.container_statuses) if pod.status.container_statuses else 0,
-                "node": pod.spec.node_name,
-                "ip": pod.status.pod_ip
+                "name": node.metadata.name,
+                "schedulable": ready and not node.spec.unschedulable,
+                "labels": node.metadata.labels or {},
+                "taints": [
+                    {"key": t.key, "value": t.value, "effect": t.effect}
+                    for t in node.spec.taints or []
+                    if t.effect in ("NoSchedule", "NoExecute")
+                ],
+                "allocatable": {
+                    "cpu_cores": parse_quantity(allocatable.get("cpu")),
+                    "memory_bytes": parse_quantity(allocatable.get("memory")),
+                    "pods": int(parse_quantity(allocatable.get("pods")))
+                },
+                "requested": requested.get(node.metadata.name, {"cpu_cores": 0.0, "memory_bytes": 0.0, "pods": 0})
             })
 
+        self.node_cache.set("nodes", result)
+        return result
+
+    # ─── HorizontalPodAutoscalers (autoscaling/v2) ────────────────────────
+
+    @staticmethod
+    def _hpa_summary(hpa) -> Dict:
+        """Condense a V2HorizontalPodAutoscaler into the dict used by the tools."""
+        target_cpu = None
+        for metric in hpa.spec.metrics or []:
+            if metric.type == "Resource" and metric.resource.name == "cpu":
+                target_cpu = metric.resource.target.average_utilization
+
+        status = hpa.status  # Not set until the HPA controller has seen it
+        current_cpu = None
+        for metric in (status.current_metrics if status else None) or []:
+            if metric.type == "Resource" and metric.resource and metric.resource.name == "cpu":
+                current_cpu = metric.resource.current.average_utilization
+
+        return {
+            "name": hpa.metadata.name,
+            "namespace": hpa.metadata.namespace,
+            "target_kind": hpa.spec.scale_target_ref.kind,
+            "target_name": hpa.spec.scale_target_ref.name,
+            "min_replicas": hpa.spec.min_replicas or 1,
+            "max_replicas": hpa.spec.max_replicas,
+            "target_cpu_utilization": target_cpu,
+            "current_cpu_utilization": current_cpu,
+            "current_replicas": status.current_replicas if status else None,
+            "desired_replicas": status.desired_replicas if status else None,
+            "last_scale_time": status.last_scale_time.isoformat() if status and status.last_scale_time else None,
+            "conditions": {
+                c.type: {"status": c.status, "reason": c.reason, "message": c.message}
+                for c in (status.conditions if status else None) or []
+            },
+            "resource_version": hpa.metadata.resource_version
+        }
+
+    def list_hpas(self, namespace: Optional[str] = None) -> List[Dict]:
+        """
+        List HorizontalPodAutoscalers in a namespace
+
+        Results are served from the HPA cache while fresh.
+
+        Args:
+            namespace: Kubernetes namespace (default: client namespace)
+
+        Returns:
+            List of HPA summary dicts
+        """
+        ns = self._ns(namespace)
+        cached = self.hpa_cache.get(ns)
+        if cached is not None:
+            return cached
+
+        with self._request("list_namespaced_horizontal_pod_autoscaler"):
+            hpas = self.autoscaling_v2.list_namespaced_horizontal_pod_autoscaler(namespace=ns)
+
+        result = [self._hpa_summary(hpa) for hpa in hpas.items]
+        self.hpa_cache.set(ns, result)
         return result
+
+    def list_all_hpas(self) -> Dict[str, List[Dict]]:
+        """
+        List HPAs across every namespace with a single API call
+
+        Returns:
+            Dict mapping namespace -> list of HPA summary dicts
+        """
+        with self._request("list_horizontal_pod_autoscaler_for_all_namespaces"):
+            hpas = self.autoscaling_v2.list_horizontal_pod_autoscaler_for_all_namespaces()
+
+        grouped: Dict[str, List[Dict]] = {}
+        for hpa in hpas.items:
+            summary = self._hpa_summary(hpa)
+            grouped.setdefault(summary["namespace"], []).append(summary)
+
+        for ns, items in grouped.items():
+            self.hpa_cache.set(ns, items)
+        return grouped
+
+    def get_hpa_for_deployment(self, deployment_name: str, namespace: Optional[str] = None) -> Optional[Dict]:
+        """
+        Find the HPA whose scaleTargetRef is the given deployment
+
+        Args:
+            deployment_name: Deployment name
+            namespace: Kubernetes namespace (default: client namespace)
+
+        Returns:
+            HPA summary dict, or None if the deployment has no HPA
+        """
+        for hpa in self.list_hpas(namespace):
+            if hpa["target_kind"] == "Deployment" and hpa["target_name"] == deployment_name:
+                return hpa
+        return None
+
+    def update_hpa(
+        self,
+        name: str,
+        namespace: Optional[str] = None,
+        min_replicas: Optional[int] = None,
+        max_replicas: Optional[int] = None,
+        target_cpu_utilization: Optional[int] = None,
+        resource_version: Optional[str] = None
+    ) -> Dict:
+        """
+        Change an HPA's bounds and/or CPU target
+
+        The HPA is read, changed and written back as a whole (replace), with
+        the resourceVersion as a precondition so a concurrent edit is not
+        silently overwritten.
+
+        Args:
+            name: HPA name
+            namespace: Kubernetes namespace (default: client namespace)
+            min_replicas: New minReplicas (None = unchanged)
+            max_replicas: New maxReplicas (None = unchanged)
+            target_cpu_utilization: New CPU averageUtilization target
+                (None = unchanged)
+            resource_version: Expected resourceVersion (default: the one
+                just read)
+
+        Returns:
+            Updated HPA summary dict
+
+        Raises:
+            ScaleConflictError: If the HPA changed since resource_version
+            ValueError: If a CPU target is given but the HPA has no CPU
+                utilization metric
+        """
+        from kubernetes.client.rest import ApiException
+
+        ns = self._ns(namespace)
+        try:
+            with self._request("read_namespaced_horizontal_pod_autoscaler"):
+                hpa = self.autoscaling_v2.read_namespaced_horizontal_pod_autoscaler(name=name, namespace=ns)
+
+            if resource_version is not None and hpa.metadata.resource_version != resource_version:
+                raise ScaleConflictError(f"HPA '{name}' changed since resourceVersion {resource_version}")
+
+            if min_replicas is not None:
+                hpa.spec.min_replicas = min_replicas
+            if max_replicas is not None:
+                hpa.spec.max_replicas = max_replicas
+            if target_cpu_utilization is not None:
+                cpu = [m for m in hpa.spec.metrics or []
+                       if m.type == "Resource" and m.resource.name == "cpu"
+                       and m.resource.target.type == "Utilization"]
+                if not cpu:
+                    raise ValueError(f"HPA '{name}' has no CPU utilization metric to retarget")
+                cpu[0].resource.target.average_utilization = target_cpu_utilization
+
+            with self._request("replace_namespaced_horizontal_pod_autoscaler"):
+                updated = self.autoscaling_v2.replace_namespaced_horizontal_pod_autoscaler(
+                    name=name,
+                    namespace=ns,
+                    body=hpa
+                )
+        except ApiException as e:
+            if e.status == 409:
+                raise ScaleConflictError(f"HPA '{name}' was modified concurrently") from e
+            raise
+        finally:
+            self.hpa_cache.invalidate(ns)
+
+        return self._hpa_summary(updated)
@@ -0,0 +1,296 @@
+"""
+In-process rolling metrics store for ClaudeScale
+
+Keeps a short history of the values get_metrics computes, per deployment
+and signal, so recent windows can be answered without another Prometheus
+query, and get_metrics can still answer (marked stale) while Prometheus
+is slow or restarting.
+
+Every series has three tiers of bucket means fed from the same samples:
+15s buckets for the last hour, 1m for 6 hours and 5m for 24 hours. A tier
+is a pair of preallocated array('d') rings, so a series takes a fixed
+~14 KB however long it lives, and the number of series is capped (the
+least recently written is dropped first).
+
+Samples come from get_metrics results and, for deployments queried in
+the last few minutes, from a background sampler that repeats the query
+every 15s while the Prometheus client has budget to spare.
+"""
+import asyncio
+import logging
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("claudescale.metrics_store")
+
+# (bucket seconds, buckets kept): 1h at 15s, 6h at 1m, 24h at 5m
+TIERS = ((15, 240), (60, 360), (300, 288))
+
+
+class _Tier:
+    """Ring of bucket means at one resolution, plus the bucket being filled."""
+
+    __slots__ = ("step", "capacity", "times", "values", "start", "size", "open_time", "open_sum", "open_count")
+
+    def __init__(self, step: int, capacity: int):
+        self.step = step
+        self.capacity = capacity
+        self.times = array("d", bytes(8 * capacity))
+        self.values = array("d", bytes(8 * capacity))
+        self.start = 0  # Index of the oldest closed bucket
+        self.size = 0
+        self.open_time: Optional[float] = None
+        self.open_sum = 0.0
+        self.open_count = 0
+
+    def add(self, t: float, value: float):
+        bucket = t - t % self.step
+        if self.open_time is not None and bucket == self.open_time:
+            self.open_sum += value
+            self.open_count += 1
+        elif self.open_time is None or bucket > self.open_time:
+            self._close()
+            self.open_time, self.open_sum, self.open_count = bucket, value, 1
+        # Older than the open bucket: out of order, dropped
+
+    def _close(self):
+        if self.open_time is None:
+            return
+        i = (self.start + self.size) % self.capacity
+        if self.size == self.capacity:
+            self.start = (self.start + 1) % self.capacity
+        else:
+            self.size += 1
+        self.times[i] = self.open_time
+        self.values[i] = self.open_sum / self.open_count
+
+    def points(self, since: float) -> List[Tuple[float, float]]:
+        """(bucket start, mean) for buckets starting at or after since, oldest first."""
+        result = []
+        for n in range(self.size):
+            i = (self.start + n) % self.capacity
+            if self.times[i] >= since:
+                result.append((self.times[i], self.values[i]))
+        if self.open_time is not None and self.open_time >= since:
+            result.append((self.open_time, self.open_sum / self.open_count))
+        return result
+
+
+class _Series:
+    __slots__ = ("tiers", "last_time", "last_value")
+
+    def __init__(self):
+        self.tiers = [_Tier(step, capacity) for step, capacity in TIERS]
+        self.last_time = 0.0
+        self.last_value = 0.0
+
+    def add(self, t: float, value: float):
+        for tier in self.tiers:
+            tier.add(t, value)
+        if t >= self.last_time:
+            self.last_time, self.last_value = t, value
+
+
+class MetricsStore:
+    """
+    Fixed-memory history of per-deployment signals
+    """
+
+    def __init__(self, max_series: int = 1400, stale_max_seconds: float = 900.0):
+        """
+        Args:
+            max_series: Most (deployment, signal) series kept
+            stale_max_seconds: Oldest data get_metrics may fall back to
+        """
+        self.max_series = max_series
+        self.stale_max_seconds = stale_max_seconds
+        self.evicted = 0
+        self._series: "OrderedDict[tuple, _Series]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, key: tuple, values: Dict[str, float], t: Optional[float] = None):
+        """
+        Add one sample per signal
+
+        Args:
+            key: Target, e.g. (prometheus url, namespace, deployment)
+            values: signal name -> value (None values are skipped)
+            t: Unix time of the sample (default: now)
+        """
+        t = time.time() if t is None else t
+        with self._lock:
+            for signal, value in values.items():
+                if value is None:
+                    continue
+                series = self._series.get((key, signal))
+                if series is None:
+                    series = self._series[(key, signal)] = _Series()
+                else:
+                    self._series.move_to_end((key, signal))
+                series.add(t, float(value))
+            while len(self._series) > self.max_series:
+                self._series.popitem(last=False)
+                self.evicted += 1
+
+    def window(self, key: tuple, signal: str, seconds: float, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Summary of one signal over the last `seconds`, from the finest tier
+        that covers the whole window
+
+        Returns:
+            avg/min/max of the bucket means, the latest raw value and its
+            age, bucket count and resolution; None if there are no samples
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            series = self._series.get((key, signal))
+            if series is None:
+                return None
+            tier = next((t for t in series.tiers if t.step * t.capacity >= seconds), series.tiers[-1])
+            points = tier.points(now - seconds - tier.step)
+            last_time, last_value = series.last_time, series.last_value
+        points = [(t, v) for t, v in points if t + tier.step > now - seconds]
+        if not points:
+            return None
+        values = [v for _, v in points]
+        return {
+            "avg": round(sum(values) / len(values), 4),
+            "min": round(min(values), 4),
+            "max": round(max(values), 4),
+            "last": round(last_value, 4),
+            "last_age_seconds": round(now - last_time, 1),
+            "buckets": len(values),
+            "resolution_seconds": tier.step
+        }
+
+    def latest(self, key: tuple) -> Dict[str, Tuple[float, float]]:
+        """signal -> (unix time, value) of the newest sample, for every signal of a target."""
+        with self._lock:
+            return {
+                signal: (s.last_time, s.last_value)
+                for (k, signal), s in self._series.items() if k == key
+            }
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            series = len(self._series)
+        per_series = sum(2 * 8 * capacity for _, capacity in TIERS)
+        return {
+            "series": series,
+            "max_series": self.max_series,
+            "evicted": self.evicted,
+            "memory_kb": round(series * per_series / 1024, 1),
+            "tiers": [f"{step}s x {capacity}" for step, capacity in TIERS]
+        }
+
+
+class MetricsSampler:
+    """
+    Re-collects metrics for recently queried deployments on a daemon thread
+    """
+
+    def __init__(self, interval_seconds: float = 15.0, idle_seconds: float = 300.0, max_targets: int = 20):
+        """
+        Args:
+            interval_seconds: Time between samples (0 disables the sampler)
+            idle_seconds: Stop sampling a deployment nobody queried for this long
+            max_targets: Most deployments sampled (the most recently queried)
+        """
+        self.interval_seconds = interval_seconds
+        self.idle_seconds = idle_seconds
+        self.max_targets = max_targets
+        self.collect: Optional[Callable[..., Awaitable[Any]]] = None
+        # Whether collect(*args) may run now; False skips the target this round
+        self.has_budget: Optional[Callable[..., bool]] = None
+        self.samples = 0
+        self.failures = 0
+        self.skipped = 0
+        self._targets: "OrderedDict[tuple, tuple]" = OrderedDict()  # key -> (last queried, args)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def track(self, key: tuple, *args):
+        """Keep sampling key (collect(*args)) while it is being queried."""
+        if self.interval_seconds <= 0 or self.collect is None:
+            return
+        with self._lock:
+            self._targets[key] = (time.monotonic(), args)
+            self._targets.move_to_end(key)
+            while len(self._targets) > self.max_targets:
+                self._targets.popitem(last=False)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="claudescale-sampler", daemon=True)
+                self._thread.start()
+
+    def _due(self) -> List[tuple]:
+        cutoff = time.monotonic() - self.idle_seconds
+        with self._lock:
+            for key in [k for k, (seen, _) in self._targets.items() if seen < cutoff]:
+                del self._targets[key]
+            return [args for _, args in self._targets.values()]
+
+    async def _sample(self, targets: List[tuple]):
+        results = await asyncio.gather(*(self.collect(*args) for args in targets), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                self.failures += 1
+                logger.debug(f"Metrics sample failed: {result}")
+            else:
+                self.samples += 1
+
+    def _round(self):
+        """Sample every due target whose downstream has budget to spare."""
+        targets = self._due()
+        if self.has_budget is not None:
+            ready = [args for args in targets if self.has_budget(*args)]
+            self.skipped += len(targets) - len(ready)
+            targets = ready
+        if targets:
+            asyncio.run(self._sample(targets))
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval_seconds)
+            self._round()
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            targets = len(self._targets)
+        return {
+            "interval_seconds": self.interval_seconds,
+            "targets": targets,
+            "samples": self.samples,
+            "failures": self.failures,
+            "skipped": self.skipped
+        }
+
+
+metrics_store = MetricsStore()
+metrics_sampler = MetricsSampler()
+
+
+def configure_metrics_store(
+    max_series: int = 1400,
+    stale_max_seconds: float = 900.0,
+    sampler_interval_seconds: float = 15.0,
+    sampler_idle_seconds: float = 300.0
+):
+    """
+    Configure the process-wide store and sampler
+
+    Args:
+        max_series: Most (deployment, signal) series kept (~14 KB each)
+        stale_max_seconds: Oldest data get_metrics may fall back to when
+            Prometheus is unavailable
+        sampler_interval_seconds: Background sampling period (0 = only
+            record get_metrics results)
+        sampler_idle_seconds: Stop sampling a deployment after this long
+            without a get_metrics call
+    """
+    metrics_store.max_series = max_series
+    metrics_store.stale_max_seconds = stale_max_seconds
+    metrics_sampler.interval_seconds = sampler_interval_seconds
+    metrics_sampler.idle_seconds = sampler_idle_seconds
@@ -1,25 +1,123 @@
 """
 Prometheus client utilities for ClaudeScale
+
+Talks to the Prometheus HTTP API (/api/v1/query, /api/v1/query_range)
+directly with the standard library. Range-query samples are decoded
+straight into float arrays, one series at a time.
 """
-from prometheus_api_client import PrometheusConnect
-from typing import Dict, List
+import json
+import ssl
+import urllib.error
+import urllib.parse
+import urllib.request
+from array import array
+from typing import Any, Dict, List, Union
 from datetime import datetime
 
+from utils.rate_limit import downstream_bucket
+from utils.self_metrics import time_downstream
+
+
+class PrometheusQueryError(Exception):
+    """Raised when Prometheus is unreachable or rejects a query."""
+
+
+# Rate window of every CPU query, so live metrics, impact analysis and
+# replays measure the same thing
+CPU_RATE_WINDOW = "5m"
+CPU_RATE_WINDOW_SECONDS = 300
+
+
+def cpu_usage_query(namespace: str, pod_filter: str) -> str:
+    """PromQL for per-pod CPU cores (instant or range query)."""
+    return (
+        f'rate(container_cpu_usage_seconds_total{{'
+        f'namespace="{namespace}", pod=~"{pod_filter}", cpu="total"}}[{CPU_RATE_WINDOW}])'
+    )
+
+
+def _decode_series(obj: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    json object_hook: turn a range-query series' [[ts, "v"], ...] list into
+    two float arrays as soon as that series is parsed, so only one series'
+    worth of Python lists is alive at a time
+    """
+    if "values" in obj and "metric" in obj:
+        timestamps = array("d")
+        values = array("d")
+        for ts, v in obj["values"]:
+            timestamps.append(ts)
+            values.append(float(v))
+        obj["timestamps"] = timestamps
+        obj["values"] = values
+    return obj
+
+
+_decoder = json.JSONDecoder(object_hook=_decode_series)
+
 
 class PrometheusClient:
     """
-    Wrapper around Prometheus API client
+    Minimal Prometheus HTTP API client
     """
 
-    def __init__(self, url: str = "http://localhost:9090"):
+    def __init__(self, url: str = "http://localhost:9090", timeout_seconds: float = 10.0):
         """
         Initialize Prometheus client
 
         Args:
             url: Prometheus server URL
+            timeout_seconds: HTTP timeout per request
+        """
+        self.url = url.rstrip("/")
+        self.timeout_seconds = timeout_seconds
+        # Same as PrometheusConnect(disable_ssl=True): no certificate checks
+        self._ssl_context = ssl._create_unverified_context() if self.url.startswith("https") else None
+        # Query budget for this Prometheus
+        self.rate_limiter = downstream_bucket("prometheus")
+
+    def _get(self, path: str, params: Dict[str, Any]) -> Any:
         """
-        self.url = url
-        self.client = PrometheusConnect(url=url, disable_ssl=True)
+        GET an API endpoint and return its "data" field
+
+        Raises:
+            PrometheusQueryError: On HTTP/connection errors, a body that is
+                not a Prometheus JSON response, or status != success
+            RateLimitExceeded: If the query budget is exhausted
+        """
+        self.rate_limiter.acquire()
+        request_url = f"{self.url}{path}?{urllib.parse.urlencode(params)}"
+        try:
+            with time_downstream("prometheus", path), urllib.request.urlopen(
+                request_url,
+                timeout=self.timeout_seconds,
+                context=self._ssl_context
+            ) as resp:
+                body = resp.read()
+        except urllib.error.HTTPError as e:
+            # Prometheus returns a JSON error body for 400/422/503
+            try:
+                detail = json.loads(e.read()).get("error", e.reason)
+            except Exception:
+                detail = e.reason
+            raise PrometheusQueryError(f"HTTP {e.code} from {path}: {detail}") from e
+        except (urllib.error.URLError, OSError) as e:
+            raise PrometheusQueryError(f"Prometheus unreachable at {self.url}: {e}") from e
+
+        try:
+            payload = _decoder.decode(body.decode("utf-8"))
+        except (ValueError, TypeError) as e:
+            # Not JSON (e.g. a proxy's HTML error page) or malformed series values
+            raise PrometheusQueryError(f"Invalid response from {path}: {e}") from e
+        if not isinstance(payload, dict):
+            raise PrometheusQueryError(f"Invalid response from {path}: expected a JSON object")
+        if payload.get("status") != "success":
+            raise PrometheusQueryError(
+                f"Query failed ({payload.get('errorType', 'unknown')}): {payload.get('error', '')}"
+            )
+        if "data" not in payload:
+            raise PrometheusQueryError(f"Invalid response from {path}: no data")
+        return payload["data"]
 
     def query(self, query: str) -> List[Dict]:
         """
@@ -31,7 +129,37 @@ class PrometheusClient:
         Returns:
             List of metric results
         """
-        return self.client.custom_query(query=query)
+        return self._get("/api/v1/query", {"query": query})["result"]
+
+    def query_range(
+        self,
+        query: str,
+        start: Union[datetime, float],
+        end: Union[datetime, float],
+        step: Union[str, float] = "15s"
+    ) -> List[Dict]:
+        """
+        Execute a PromQL range query
+
+        Args:
+            query: PromQL query string
+            start: Range start (datetime or unix seconds)
+            end: Range end (datetime or unix seconds)
+            step: Resolution step ("15s" or seconds)
+
+        Returns:
+            List of {"metric": labels, "timestamps": array('d'),
+            "values": array('d')} per series
+        """
+        def ts(t: Union[datetime, float]) -> float:
+            return t.timestamp() if isinstance(t, datetime) else float(t)
+
+        return self._get("/api/v1/query_range", {
+            "query": query,
+            "start": ts(start),
+            "end": ts(end),
+            "step": step
+        })["result"]
 
     def get_cpu_usage(self, namespace: str, pod_filter: str = "demo-app.*") -> Dict:
         """
@@ -44,12 +172,9 @@ class PrometheusClient:
         Returns:
             Dict with CPU metrics
         """
-        query = (
-            f'rate(container_cpu_usage_seconds_total{{'
-            f'namespace="{namespace}", pod=~"{pod_filter}", cpu="total"}}[5m])'
-        )
+        query = cpu_usage_query(namespace, pod_filter)
 
-        result = self.client.custom_query(query=query)
+        result = self.query(query)
 
         metrics = []
         for item in result:
@@ -84,7 +209,7 @@ class PrometheusClient:
             f'namespace="{namespace}", pod=~"{pod_filter}"}}'
         )
 
-        result = self.client.custom_query(query=query)
+        result = self.query(query)
 
         metrics = []
         for item in result:
@@ -124,8 +249,8 @@ class PrometheusClient:
             f'namespace="{namespace}", pod=~"{pod_filter}"}}[5m])'
         )
 
-        rx_result = self.client.custom_query(query=rx_query)
-        tx_result = self.client.custom_query(query=tx_query)
+        rx_result = self.query(rx_query)
+        tx_result = self.query(tx_query)
 
         return {
             "receive_bps": sum(float(item["value"][1]) for item in rx_result) if rx_result else 0,
@@ -0,0 +1,342 @@
+"""
+Admission control for ClaudeScale
+
+Token buckets limit how fast tools are called (one bucket per tool) and how
+fast the server calls Kubernetes and Prometheus (one bucket per client,
+i.e. per cluster). A request that finds the bucket empty waits in a bounded
+queue; when the queue is full or the expected wait exceeds the limit it is
+shed immediately with RateLimitExceeded, which carries a retry-after.
+
+Requests are either reads or writes. Writes (scaling) queue ahead of reads
+and are not subject to the queue-length limit, so a flood of metric
+queries cannot starve a scaling action. The priority of the current call
+is carried in a context variable, so downstream calls made on behalf of a
+write tool (including from worker threads) inherit it.
+"""
+import asyncio
+import contextvars
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from utils.self_metrics import RATE_LIMIT_WAIT, RATE_LIMITED
+
+PRIORITY_WRITE = 0
+PRIORITY_READ = 1
+_PRIORITY_NAMES = {PRIORITY_WRITE: "write", PRIORITY_READ: "read"}
+
+_priority: contextvars.ContextVar = contextvars.ContextVar("claudescale_priority", default=PRIORITY_READ)
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a request is shed by a rate limiter."""
+
+    def __init__(self, limit: str, retry_after_seconds: float, reason: str):
+        self.limit = limit
+        self.retry_after_seconds = retry_after_seconds
+        super().__init__(
+            f"Rate limit '{limit}' exceeded ({reason}). "
+            f"Retry after {retry_after_seconds:.1f}s."
+        )
+
+
+@contextmanager
+def request_priority(priority: int):
+    """Run the enclosed block (and the downstream calls it makes) at a priority."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "deadline")
+
+    def __init__(self, priority: int, seq: int, deadline: float):
+        self.priority = priority
+        self.seq = seq
+        self.deadline = deadline
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket with a bounded, priority-ordered wait queue
+
+    Usable from threads (acquire) and from the event loop (acquire_async);
+    both kinds of waiters share one queue.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: int,
+        max_queue: int = 50,
+        max_wait_seconds: float = 2.0
+    ):
+        """
+        Initialize bucket
+
+        Args:
+            name: Limit name used in errors and metrics
+            rate: Sustained requests per second (<= 0 disables the limit)
+            burst: Bucket size, i.e. requests allowed back to back
+            max_queue: Reads allowed to wait before new reads are shed
+            max_wait_seconds: Longest a request may wait for a token
+        """
+        self.name = name
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self.admitted = 0
+        self.shed = 0
+
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _shed(self, priority: int, retry_after: float, reason: str):
+        self.shed += 1
+        RATE_LIMITED.inc(self.name, _PRIORITY_NAMES[priority])
+        raise RateLimitExceeded(self.name, retry_after, reason)
+
+    def _enter(self, priority: int) -> Optional[_Waiter]:
+        """Take a token now (None) or join the queue; shed if the queue is too long."""
+        now = time.monotonic()
+        with self._cond:
+            self._refill(now)
+            if not self._waiters and self._tokens >= 1:
+                self._tokens -= 1
+                self.admitted += 1
+                return None
+
+            ahead = sum(1 for w in self._waiters if w.priority <= priority)
+            expected_wait = (ahead + 1 - self._tokens) / self.rate
+            if priority != PRIORITY_WRITE and len(self._waiters) >= self.max_queue:
+                self._shed(priority, expected_wait, f"{len(self._waiters)} requests already queued")
+            if expected_wait > self.max_wait_seconds:
+                self._shed(priority, expected_wait, f"{self.rate:g} requests/s")
+
+            waiter = _Waiter(priority, next(self._seq), now + self.max_wait_seconds)
+            self._waiters.append(waiter)
+            self._waiters.sort(key=lambda w: (w.priority, w.seq))
+            return waiter
+
+    def _poll(self, waiter: _Waiter) -> Optional[float]:
+        """Grant the token (None) or return how long to sleep before polling again."""
+        now = time.monotonic()
+        with self._cond:
+            self._refill(now)
+            if self._waiters[0] is waiter and self._tokens >= 1:
+                self._tokens -= 1
+                self.admitted += 1
+                self._waiters.pop(0)
+                self._cond.notify_all()
+                return None
+            if now >= waiter.deadline:
+                # Pushed back by writes that arrived after it
+                self._waiters.remove(waiter)
+                self._cond.notify_all()
+                self._shed(waiter.priority, 1 / self.rate, f"waited {self.max_wait_seconds:g}s")
+            position = self._waiters.index(waiter)
+            return min(max(0.001, (position + 1 - self._tokens) / self.rate), waiter.deadline - now)
+
+    def _abandon(self, waiter: Optional[_Waiter]):
+        """Leave the queue without a token, so the waiters behind move up."""
+        with self._cond:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+                self._cond.notify_all()
+
+    def acquire(self, priority: Optional[int] = None) -> float:
+        """
+        Take a token, blocking the calling thread while queued
+
+        Args:
+            priority: PRIORITY_WRITE or PRIORITY_READ (default: the
+                current request's priority)
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            RateLimitExceeded: If the request was shed
+        """
+        if self.rate <= 0:
+            return 0.0
+        priority = _priority.get() if priority is None else priority
+        start = time.monotonic()
+        waiter = self._enter(priority)
+        try:
+            while waiter is not None:
+                sleep = self._poll(waiter)
+                if sleep is None:
+                    break
+                with self._cond:
+                    self._cond.wait(sleep)
+        except BaseException:
+            self._abandon(waiter)
+            raise
+        waited = time.monotonic() - start
+        RATE_LIMIT_WAIT.observe(waited, self.name)
+        return waited
+
+    async def acquire_async(self, priority: Optional[int] = None) -> float:
+        """Take a token without blocking the event loop (see acquire)."""
+        if self.rate <= 0:
+            return 0.0
+        priority = _priority.get() if priority is None else priority
+        start = time.monotonic()
+        waiter = self._enter(priority)
+        try:
+            while waiter is not None:
+                sleep = self._poll(waiter)
+                if sleep is None:
+                    break
+                await asyncio.sleep(sleep)
+        except BaseException:
+            # Cancelled (e.g. the client cancelled the request) or shed
+            self._abandon(waiter)
+            raise
+        waited = time.monotonic() - start
+        RATE_LIMIT_WAIT.observe(waited, self.name)
+        return waited
+
+    def status(self) -> Dict[str, Any]:
+        with self._cond:
+            self._refill(time.monotonic())
+            return {
+                "rate_per_second": self.rate,
+                "burst": self.burst,
+                "available_tokens": round(self._tokens, 2),
+                "queued": len(self._waiters),
+                "admitted": self.admitted,
+                "shed": self.shed
+            }
+
+
+# ─── Process-wide limits ──────────────────────────────────────────────────────
+
+class _Limits:
+    def __init__(self):
+        self.enabled = True
+        self.tool_rate = 10.0
+        self.tool_burst = 20
+        self.tool_overrides: Dict[str, float] = {}
+        self.downstream: Dict[str, tuple] = {"kubernetes": (20.0, 40), "prometheus": (50.0, 100)}
+        self.max_queue = 50
+        self.max_wait_seconds = 2.0
+        self.tools: Dict[str, TokenBucket] = {}
+        self.clients: List[TokenBucket] = []
+        self.lock = threading.Lock()
+
+    def apply(self, bucket: TokenBucket, rate: float, burst: int):
+        bucket.rate = rate if self.enabled else 0.0
+        bucket.burst = max(1, burst)
+        bucket.max_queue = self.max_queue
+        bucket.max_wait_seconds = self.max_wait_seconds
+
+
+_limits = _Limits()
+
+
+def configure_rate_limits(
+    enabled: bool = True,
+    tool_qps: float = 10.0,
+    tool_burst: int = 20,
+    tool_overrides: Optional[Dict[str, float]] = None,
+    kubernetes_qps: float = 20.0,
+    kubernetes_burst: int = 40,
+    prometheus_qps: float = 50.0,
+    prometheus_burst: int = 100,
+    max_queue: int = 50,
+    max_wait_seconds: float = 2.0
+):
+    """
+    Configure process-wide limits; existing buckets pick up the new values
+
+    Args:
+        enabled: Apply limits at all
+        tool_qps: Calls per second per tool
+        tool_burst: Back-to-back calls allowed per tool
+        tool_overrides: tool name -> calls per second (burst = 2x rate)
+        kubernetes_qps: Kubernetes API requests per second per cluster
+        kubernetes_burst: Kubernetes API burst per cluster
+        prometheus_qps: Prometheus queries per second per cluster
+        prometheus_burst: Prometheus query burst per cluster
+        max_queue: Reads allowed to wait per bucket before shedding
+        max_wait_seconds: Longest a request may wait for a token
+    """
+    with _limits.lock:
+        _limits.enabled = enabled
+        _limits.tool_rate = tool_qps
+        _limits.tool_burst = tool_burst
+        _limits.tool_overrides = dict(tool_overrides or {})
+        _limits.downstream = {
+            "kubernetes": (kubernetes_qps, kubernetes_burst),
+            "prometheus": (prometheus_qps, prometheus_burst)
+        }
+        _limits.max_queue = max_queue
+        _limits.max_wait_seconds = max_wait_seconds
+        for name, bucket in _limits.tools.items():
+            _limits.apply(bucket, *_tool_limits(name))
+        for bucket in _limits.clients:
+            _limits.apply(bucket, *_limits.downstream[bucket.name])
+
+
+def _tool_limits(name: str) -> tuple:
+    rate = _limits.tool_overrides.get(name)
+    if rate is None:
+        return _limits.tool_rate, _limits.tool_burst
+    return rate, max(1, int(rate * 2))
+
+
+def tool_bucket(name: str) -> TokenBucket:
+    """Bucket limiting calls to one tool (created on first use)."""
+    bucket = _limits.tools.get(name)
+    if bucket is None:
+        with _limits.lock:
+            bucket = _limits.tools.get(name)
+            if bucket is None:
+                bucket = TokenBucket(name, 0.0, 1)
+                _limits.apply(bucket, *_tool_limits(name))
+                _limits.tools[name] = bucket
+    return bucket
+
+
+def downstream_bucket(downstream: str) -> TokenBucket:
+    """
+    New bucket for one Kubernetes/Prometheus client
+
+    Each client (one per cluster) owns its bucket, so a busy cluster does
+    not use up another cluster's budget.
+    """
+    if downstream not in _limits.downstream:
+        raise ValueError(f"Unknown downstream '{downstream}'")
+    with _limits.lock:
+        bucket = TokenBucket(downstream, 0.0, 1)
+        _limits.apply(bucket, *_limits.downstream[downstream])
+        _limits.clients.append(bucket)
+    return bucket
+
+
+def rate_limit_status() -> Dict[str, Any]:
+    """Current limits, queue depth and admitted/shed counts per bucket."""
+    downstream: Dict[str, List[Dict[str, Any]]] = {}
+    for bucket in _limits.clients:
+        downstream.setdefault(bucket.name, []).append(bucket.status())
+    return {
+        "enabled": _limits.enabled,
+        "tools": {name: b.status() for name, b in sorted(_limits.tools.items())},
+        "downstream": downstream
+    }
@@ -0,0 +1,281 @@
+"""
+Self-instrumentation for ClaudeScale
+
+Counters and histograms about the MCP server itself (tool latency,
+downstream Kubernetes/Prometheus latency, cache hit rates, guardrail
+blocks, audit writes), rendered in the Prometheus text exposition format
+and served on /metrics from a background thread.
+"""
+import functools
+import inspect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.tracing import span
+
+logger = logging.getLogger("claudescale.metrics")
+
+# Latency buckets (seconds): tool calls span sub-ms cache hits to multi-second API waits
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """
+    Monotonic counter with labels
+    """
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = labels
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0):
+        """Increment the series for the given label values."""
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for values, v in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, values)} {v}")
+        return lines
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram with labels
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labels: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = labels
+        self.buckets = buckets
+        # label values -> [bucket counts..., sum, count]
+        self._series: Dict[LabelValues, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        """Record one observation (seconds) for the given label values."""
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for values, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    labels = _format_labels(self.label_names, values, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{labels} {count}")
+                labels = _format_labels(self.label_names, values, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {series[-1]}")
+                plain = _format_labels(self.label_names, values)
+                lines.append(f"{self.name}_sum{plain} {series[-2]}")
+                lines.append(f"{self.name}_count{plain} {series[-1]}")
+        return lines
+
+
+# ─── Metrics ──────────────────────────────────────────────────────────────────
+
+TOOL_DURATION = Histogram(
+    "claudescale_tool_duration_seconds",
+    "Latency of MCP tool calls.",
+    ("tool",)
+)
+TOOL_ERRORS = Counter(
+    "claudescale_tool_errors_total",
+    "MCP tool calls that raised an exception.",
+    ("tool",)
+)
+DOWNSTREAM_DURATION = Histogram(
+    "claudescale_downstream_duration_seconds",
+    "Latency of calls to Kubernetes and Prometheus.",
+    ("downstream", "operation")
+)
+DOWNSTREAM_ERRORS = Counter(
+    "claudescale_downstream_errors_total",
+    "Calls to Kubernetes and Prometheus that raised an exception.",
+    ("downstream", "operation")
+)
+GUARDRAIL_BLOCKS = Counter(
+    "claudescale_guardrail_blocks_total",
+    "Scaling requests rejected by a guardrail.",
+    ("guardrail",)
+)
+AUDIT_EVENTS = Counter(
+    "claudescale_audit_events_total",
+    "Audit log entries written, by event type.",
+    ("event",)
+)
+AUDIT_WRITE_DURATION = Histogram(
+    "claudescale_audit_write_duration_seconds",
+    "Time spent appending one audit log entry.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5)
+)
+REPORT_DURATION = Histogram(
+    "claudescale_report_duration_seconds",
+    "End-to-end report generation time (fetch + render)."
+)
+RATE_LIMITED = Counter(
+    "claudescale_rate_limited_total",
+    "Requests shed by admission control, by limit and priority.",
+    ("limit", "priority")
+)
+RATE_LIMIT_WAIT = Histogram(
+    "claudescale_rate_limit_wait_seconds",
+    "Time admitted requests spent queued for a rate limit token.",
+    ("limit",),
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0)
+)
+ALERTS_RECEIVED = Counter(
+    "claudescale_alerts_received_total",
+    "Alerts received on the webhook, by outcome (new, repeated, resolved, ignored).",
+    ("status",)
+)
+
+_METRICS = [
+    TOOL_DURATION, TOOL_ERRORS, DOWNSTREAM_DURATION, DOWNSTREAM_ERRORS,
+    GUARDRAIL_BLOCKS, AUDIT_EVENTS, AUDIT_WRITE_DURATION, REPORT_DURATION,
+    RATE_LIMITED, RATE_LIMIT_WAIT, ALERTS_RECEIVED
+]
+
+# name -> caches; several clients can share a cache name (one per cluster)
+_caches: Dict[str, list] = {}
+_caches_lock = threading.Lock()
+
+
+def register_cache(name: str, cache):
+    """Expose a TTLCache's hit/miss counts under the given cache name."""
+    with _caches_lock:
+        _caches.setdefault(name, []).append(cache)
+
+
+def _render_caches() -> List[str]:
+    name = "claudescale_cache_requests_total"
+    lines = [f"# HELP {name} Cache lookups, by cache and result.", f"# TYPE {name} counter"]
+    with _caches_lock:
+        for cache_name, caches in sorted(_caches.items()):
+            lines.append(f'{name}{{cache="{cache_name}",result="hit"}} {float(sum(c.hits for c in caches))}')
+            lines.append(f'{name}{{cache="{cache_name}",result="miss"}} {float(sum(c.misses for c in caches))}')
+    return lines
+
+
+def render() -> str:
+    """Render every metric in the Prometheus text exposition format."""
+    lines: List[str] = []
+    for metric in _METRICS:
+        lines += metric.render()
+    lines += _render_caches()
+    return "\n".join(lines) + "\n"
+
+
+# ─── Timing helpers ───────────────────────────────────────────────────────────
+
+@contextmanager
+def time_downstream(downstream: str, operation: str):
+    """
+    Time a Kubernetes/Prometheus call, counting it as an error if it
+    raises, and record it as a span when tracing is on
+    """
+    start = time.perf_counter()
+    try:
+        with span(f"{downstream}.{operation}", downstream=downstream, operation=operation):
+            yield
+    except Exception:
+        DOWNSTREAM_ERRORS.inc(downstream, operation)
+        raise
+    finally:
+        DOWNSTREAM_DURATION.observe(time.perf_counter() - start, downstream, operation)
+
+
+def timed_tool(func: Callable) -> Callable:
+    """
+    Decorator for async MCP tool functions: records latency and errors
+    under tool=<function name> and opens the root span of the call's
+    trace. Keeps the signature for FastMCP.
+    """
+    if not inspect.iscoroutinefunction(func):
+        raise TypeError("timed_tool expects an async function")
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            with span(func.__name__, tool=func.__name__):
+                return await func(*args, **kwargs)
+        except Exception:
+            TOOL_ERRORS.inc(func.__name__)
+            raise
+        finally:
+            TOOL_DURATION.observe(time.perf_counter() - start, func.__name__)
+    return wrapper
+
+
+# ─── /metrics endpoint ────────────────────────────────────────────────────────
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass  # stdout belongs to the MCP stdio transport
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> Optional[ThreadingHTTPServer]:
+    """
+    Serve /metrics on a daemon thread
+
+    Args:
+        port: TCP port (0 disables the endpoint)
+        host: Bind address
+
+    Returns:
+        The running server, or None if disabled or the port is unavailable
+    """
+    if not port:
+        return None
+    try:
+        httpd = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        logger.warning(f"Metrics endpoint disabled, cannot bind {host}:{port}: {e}")
+        return None
+    threading.Thread(target=httpd.serve_forever, name="claudescale-metrics", daemon=True).start()
+    return httpd
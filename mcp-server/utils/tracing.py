@@ -0,0 +1,280 @@
+"""
+Optional hot-path tracing for ClaudeScale
+
+Spans are recorded around every tool call and every Kubernetes/Prometheus
+call (see utils.self_metrics) plus the guardrail steps. Finished traces
+are kept in memory for claudescale_debug_traces and exported as OTLP/JSON
+(the OpenTelemetry protocol's JSON encoding), either appended to a local
+file or POSTed to an OTLP/HTTP collector. Exports run on one background
+thread behind a bounded queue; when it is full, traces are dropped
+(and counted) rather than held up on the request path.
+
+Disabled by default; when disabled, span() costs one attribute lookup.
+"""
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("claudescale.tracing")
+
+
+class _Trace:
+    """Spans of one sampled root call, filled in from any thread."""
+
+    def __init__(self):
+        self.trace_id = os.urandom(16).hex()
+        self.spans: List[Dict[str, Any]] = []
+        self.lock = threading.Lock()
+
+
+class _Tracer:
+    def __init__(self):
+        self.enabled = False
+        self.sample_rate = 1.0
+        self.exporter = "none"  # "none" | "file" | "otlp"
+        self.file_path = Path("/tmp/claudescale-traces.jsonl")
+        self.otlp_endpoint = "http://localhost:4318/v1/traces"
+        self.recent: deque = deque(maxlen=100)
+        self.queue: queue.Queue = queue.Queue(maxsize=256)
+        self.worker: Optional[threading.Thread] = None
+        self.worker_lock = threading.Lock()
+        self.dropped = 0
+
+
+_tracer = _Tracer()
+
+# (trace, span_id) of the innermost open span, _UNSAMPLED inside a root call
+# that was not sampled, None outside any trace
+_UNSAMPLED = object()
+_current: contextvars.ContextVar = contextvars.ContextVar("claudescale_span", default=None)
+
+
+def configure_tracing(
+    enabled: bool,
+    sample_rate: float = 1.0,
+    exporter: str = "none",
+    file_path: Optional[str] = None,
+    otlp_endpoint: Optional[str] = None,
+    keep_last: int = 100,
+    queue_size: int = 256
+):
+    """
+    Configure the process-wide tracer
+
+    Args:
+        enabled: Record spans at all
+        sample_rate: Fraction of root calls (tool calls) to trace, 0.0-1.0
+        exporter: "none" (memory only), "file" (OTLP/JSON lines) or "otlp"
+            (POST to an OTLP/HTTP endpoint)
+        file_path: Output file for the "file" exporter
+        otlp_endpoint: URL for the "otlp" exporter
+        keep_last: Traces kept in memory for the debug tool
+        queue_size: Traces waiting for export before new ones are dropped
+    """
+    if exporter not in ("none", "file", "otlp"):
+        raise ValueError(f"Unknown trace exporter '{exporter}'")
+    _tracer.enabled = enabled
+    _tracer.sample_rate = max(0.0, min(1.0, sample_rate))
+    _tracer.exporter = exporter
+    if file_path:
+        _tracer.file_path = Path(file_path)
+    if otlp_endpoint:
+        _tracer.otlp_endpoint = otlp_endpoint
+    _tracer.recent = deque(_tracer.recent, maxlen=keep_last)
+    if queue_size != _tracer.queue.maxsize:
+        with _tracer.worker_lock:
+            _tracer.queue = queue.Queue(maxsize=max(1, queue_size))
+            _tracer.worker = None
+
+
+@contextmanager
+def span(name: str, **attributes: Any):
+    """
+    Record a span around the enclosed block
+
+    Outside a trace this starts a new root span (subject to sampling);
+    inside one it becomes a child of the current span. Spans inside a
+    root call that was not sampled are not recorded either, so a trace is
+    always a whole call. Exceptions mark the span as errored and propagate.
+    """
+    if not _tracer.enabled:
+        yield
+        return
+
+    parent = _current.get()
+    if parent is _UNSAMPLED:
+        yield
+        return
+    if parent is None:
+        if random.random() >= _tracer.sample_rate:
+            token = _current.set(_UNSAMPLED)
+            try:
+                yield
+            finally:
+                _current.reset(token)
+            return
+        trace, parent_id = _Trace(), ""
+    else:
+        trace, parent_id = parent
+
+    span_id = os.urandom(8).hex()
+    token = _current.set((trace, span_id))
+    start = time.time_ns()
+    error: Optional[str] = None
+    try:
+        yield
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current.reset(token)
+        record = {
+            "traceId": trace.trace_id,
+            "spanId": span_id,
+            "parentSpanId": parent_id,
+            "name": name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(start),
+            "endTimeUnixNano": str(time.time_ns()),
+            "attributes": [
+                {"key": k, "value": {"stringValue": str(v)}} for k, v in attributes.items()
+            ],
+            "status": {"code": 2, "message": error} if error else {"code": 1},
+        }
+        with trace.lock:
+            trace.spans.append(record)
+        if not parent_id:
+            _finish(trace)
+
+
+def _finish(trace: _Trace):
+    """Store a completed trace and hand it to the exporter."""
+    _tracer.recent.append(trace)
+    if _tracer.exporter == "none":
+        return
+
+    payload = {
+        "resourceSpans": [{
+            "resource": {"attributes": [
+                {"key": "service.name", "value": {"stringValue": "claudescale-mcp"}}
+            ]},
+            "scopeSpans": [{
+                "scope": {"name": "claudescale"},
+                "spans": list(trace.spans)
+            }]
+        }]
+    }
+
+    # Serializing and writing happen on the worker: a slow disk or
+    # collector must not slow tool calls
+    _ensure_worker()
+    try:
+        _tracer.queue.put_nowait((_tracer.exporter, payload))
+    except queue.Full:
+        _tracer.dropped += 1
+
+
+def _ensure_worker():
+    with _tracer.worker_lock:
+        if _tracer.worker is None or not _tracer.worker.is_alive():
+            _tracer.worker = threading.Thread(
+                target=_export_loop, args=(_tracer.queue,), name="claudescale-trace-export", daemon=True
+            )
+            _tracer.worker.start()
+
+
+def _export_loop(pending: queue.Queue):
+    while True:
+        exporter, payload = pending.get()
+        try:
+            if exporter == "file":
+                _write_file(payload)
+            else:
+                _post_otlp(payload)
+        finally:
+            pending.task_done()
+
+
+def _write_file(payload: Dict[str, Any]):
+    try:
+        with _tracer.file_path.open("a") as f:
+            f.write(json.dumps(payload) + "\n")
+    except Exception as e:
+        logger.warning(f"Could not write trace file: {e}")
+
+
+def _post_otlp(payload: Dict[str, Any]):
+    request = urllib.request.Request(
+        _tracer.otlp_endpoint,
+        data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST"
+    )
+    try:
+        urllib.request.urlopen(request, timeout=5).close()
+    except Exception as e:
+        logger.warning(f"Could not export trace to {_tracer.otlp_endpoint}: {e}")
+
+
+def flush_exports():
+    """Block until every queued trace has been exported (tests, shutdown)."""
+    _tracer.queue.join()
+
+
+def recent_traces(last_n: int = 10) -> List[Dict[str, Any]]:
+    """
+    Timing breakdown of the last N traced calls, newest first
+
+    Returns:
+        List of {"trace_id", "name", "duration_ms", "status", "spans"} where
+        spans are ordered by start time with depth, offset and duration
+    """
+    result = []
+    for trace in list(_tracer.recent)[-last_n:][::-1]:
+        with trace.lock:
+            spans = sorted(trace.spans, key=lambda s: int(s["startTimeUnixNano"]))
+        root = next((s for s in spans if not s["parentSpanId"]), spans[0])
+        root_start = int(root["startTimeUnixNano"])
+        depth = {root["spanId"]: 0}
+        breakdown = []
+        for s in spans:
+            d = depth.get(s["parentSpanId"], -1) + 1 if s["parentSpanId"] else 0
+            depth[s["spanId"]] = d
+            breakdown.append({
+                "name": s["name"],
+                "depth": d,
+                "offset_ms": round((int(s["startTimeUnixNano"]) - root_start) / 1e6, 2),
+                "duration_ms": round((int(s["endTimeUnixNano"]) - int(s["startTimeUnixNano"])) / 1e6, 2),
+                "error": s["status"].get("message"),
+                "attributes": {a["key"]: a["value"]["stringValue"] for a in s["attributes"]}
+            })
+        result.append({
+            "trace_id": trace.trace_id,
+            "name": root["name"],
+            "duration_ms": round((int(root["endTimeUnixNano"]) - root_start) / 1e6, 2),
+            "status": "error" if root["status"]["code"] == 2 else "ok",
+            "spans": breakdown
+        })
+    return result
+
+
+def tracing_status() -> Dict[str, Any]:
+    """Current tracer configuration."""
+    return {
+        "enabled": _tracer.enabled,
+        "sample_rate": _tracer.sample_rate,
+        "exporter": _tracer.exporter,
+        "buffered_traces": len(_tracer.recent),
+        "export_queue": _tracer.queue.qsize(),
+        "dropped_traces": _tracer.dropped
+    }
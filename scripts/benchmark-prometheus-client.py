@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Prometheus client benchmark: native client vs prometheus_api_client
+
+Serves canned /api/v1/query and /api/v1/query_range responses from a
+local HTTP server, then, in a fresh interpreter per client, measures:
+- import time of the client module
+- RSS after import
+- latency of instant and range queries
+- peak RSS after the range queries
+
+The prometheus_api_client column is skipped when the package is not
+installed (it is no longer a ClaudeScale dependency).
+
+Usage:
+    python3 scripts/benchmark-prometheus-client.py
+    python3 scripts/benchmark-prometheus-client.py --series 200 --points 2000 --iterations 10
+"""
+import sys
+import os
+import json
+import argparse
+import subprocess
+import threading
+import importlib.util
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "mcp-server")
+
+QUERY = 'rate(container_cpu_usage_seconds_total{namespace="claudescale", pod=~"demo-app.*"}[5m])'
+
+CLIENT_SNIPPETS = {
+    "native": {
+        "import": "import sys; sys.path.insert(0, {server_dir!r}); from utils.prometheus_client import PrometheusClient",
+        "setup": "c = PrometheusClient(url={url!r})",
+        "instant": "c.query({query!r})",
+        "range": "c.query_range({query!r}, start=0, end=3600, step='15s')",
+    },
+    "prometheus_api_client": {
+        "import": "from prometheus_api_client import PrometheusConnect",
+        "setup": "c = PrometheusConnect(url={url!r}, disable_ssl=True)",
+        "instant": "c.custom_query(query={query!r})",
+        "range": (
+            "c.custom_query_range(query={query!r}, "
+            "start_time=datetime.fromtimestamp(0), end_time=datetime.fromtimestamp(3600), step='15s')"
+        ),
+    },
+}
+
+RUNNER = """
+import time, json, resource
+from datetime import datetime
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def rss_mb():
+    # Current RSS from /proc where available (Linux), else the peak
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / 1024 / 1024
+    except OSError:
+        return peak_rss_mb()
+
+rss_start = rss_mb()
+t0 = time.perf_counter()
+{import_line}
+import_s = time.perf_counter() - t0
+rss_import = rss_mb()
+
+{setup_line}
+
+t0 = time.perf_counter()
+for _ in range({iterations}):
+    {instant_line}
+instant_s = (time.perf_counter() - t0) / {iterations}
+
+t0 = time.perf_counter()
+for _ in range({iterations}):
+    result = {range_line}
+range_s = (time.perf_counter() - t0) / {iterations}
+
+print(json.dumps({{
+    "import_ms": import_s * 1000,
+    "rss_import_mb": rss_import,
+    "import_rss_delta_mb": rss_import - rss_start,
+    "instant_ms": instant_s * 1000,
+    "range_ms": range_s * 1000,
+    "rss_peak_mb": peak_rss_mb(),
+}}))
+"""
+
+
+def build_payloads(series: int, points: int) -> dict:
+    """Pre-render vector and matrix responses."""
+    vector = {
+        "status": "success",
+        "data": {
+            "resultType": "vector",
+            "result": [
+                {"metric": {"pod": f"demo-app-{i}", "namespace": "claudescale"},
+                 "value": [3600.0, f"{0.05 + i * 1e-4:.6f}"]}
+                for i in range(series)
+            ]
+        }
+    }
+    matrix = {
+        "status": "success",
+        "data": {
+            "resultType": "matrix",
+            "result": [
+                {"metric": {"pod": f"demo-app-{i}", "namespace": "claudescale"},
+                 "values": [[float(t * 15), f"{0.05 + (t % 97) * 1e-3:.6f}"] for t in range(points)]}
+                for i in range(series)
+            ]
+        }
+    }
+    return {
+        "/api/v1/query": json.dumps(vector).encode(),
+        "/api/v1/query_range": json.dumps(matrix).encode(),
+    }
+
+
+def start_fake_prometheus(payloads: dict) -> ThreadingHTTPServer:
+    """Serve the canned payloads on an ephemeral localhost port."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = payloads.get(self.path.split("?")[0])
+            if body is None:
+                self.send_response(404)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_POST = do_GET  # PrometheusConnect may POST long queries
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+def run_client(name: str, url: str, iterations: int) -> dict:
+    """Benchmark one client in a fresh interpreter."""
+    s = CLIENT_SNIPPETS[name]
+    fmt = {"server_dir": SERVER_DIR, "url": url, "query": QUERY}
+    code = RUNNER.format(
+        import_line=s["import"].format(**fmt),
+        setup_line=s["setup"].format(**fmt),
+        instant_line=s["instant"].format(**fmt),
+        range_line=s["range"].format(**fmt),
+        iterations=iterations
+    )
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, timeout=600)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{name}: {proc.stderr.strip().splitlines()[-1]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main(series: int, points: int, iterations: int):
+    print("ClaudeScale - Prometheus Client Benchmark")
+    print("=" * 60)
+
+    payloads = build_payloads(series, points)
+    httpd = start_fake_prometheus(payloads)
+    url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    print(f"Range response: {series} series x {points} points "
+          f"({len(payloads['/api/v1/query_range']) / 1024 / 1024:.1f} MB JSON)")
+    print(f"Iterations per query: {iterations}\n")
+
+    clients = ["native"]
+    if importlib.util.find_spec("prometheus_api_client"):
+        clients.append("prometheus_api_client")
+    else:
+        print("prometheus_api_client not installed: comparison column skipped\n")
+
+    results = {name: run_client(name, url, iterations) for name in clients}
+    httpd.shutdown()
+
+    rows = [
+        ("import time (ms)", "import_ms"),
+        ("RSS after import (MB)", "rss_import_mb"),
+        ("RSS added by import (MB)", "import_rss_delta_mb"),
+        ("instant query (ms)", "instant_ms"),
+        ("range query (ms)", "range_ms"),
+        ("peak RSS (MB)", "rss_peak_mb"),
+    ]
+    print(f"{'':<28}" + "".join(f"{name:>24}" for name in clients))
+    for label, key in rows:
+        print(f"{label:<28}" + "".join(f"{results[name][key]:>24.1f}" for name in clients))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--series", type=int, default=100, help="Series per response")
+    parser.add_argument("--points", type=int, default=240, help="Samples per range series")
+    parser.add_argument("--iterations", type=int, default=5, help="Queries per measurement")
+    args = parser.parse_args()
+
+    main(series=args.series, points=args.points, iterations=args.iterations)
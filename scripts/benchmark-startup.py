@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the ClaudeScale MCP server
+
+Measures, in fresh interpreter processes:
+1. Import time of server.py (what Claude Desktop waits for on every session)
+2. Time-to-first-tool-response: process start -> first tool call answered
+   over the in-memory MCP transport
+
+The first tool call is the one that pays for importing the kubernetes
+package and loading the kubeconfig. If no cluster is reachable the call
+returns an error, which still counts as a response: startup itself must
+not fail.
+
+Usage:
+    python3 scripts/benchmark-startup.py
+    python3 scripts/benchmark-startup.py --runs 10 --top 15
+    python3 scripts/benchmark-startup.py --tool claudescale_get_metrics
+"""
+import sys
+import os
+import json
+import argparse
+import statistics
+import subprocess
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "mcp-server")
+
+IMPORT_SNIPPET = """
+import sys, time, json
+t0 = time.perf_counter()
+sys.path.insert(0, {server_dir!r})
+import server
+print(json.dumps({{"import_s": time.perf_counter() - t0}}))
+"""
+
+FIRST_CALL_SNIPPET = """
+import sys, time, json, asyncio
+t0 = time.perf_counter()
+sys.path.insert(0, {server_dir!r})
+import server
+from fastmcp import Client
+t_import = time.perf_counter() - t0
+
+async def first_call():
+    async with Client(server.mcp) as c:
+        t1 = time.perf_counter()
+        result = await c.call_tool({tool!r}, {{}}, raise_on_error=False)
+        return time.perf_counter() - t1, result.is_error
+
+call_s, is_error = asyncio.run(first_call())
+print(json.dumps({{
+    "import_s": t_import,
+    "first_call_s": call_s,
+    "total_s": time.perf_counter() - t0,
+    "tool_error": is_error,
+}}))
+"""
+
+
+def run_snippet(snippet: str) -> dict:
+    """Run a snippet in a fresh interpreter and parse its JSON output."""
+    proc = subprocess.run(
+        [sys.executable, "-c", snippet],
+        cwd=SERVER_DIR,
+        capture_output=True,
+        text=True,
+        timeout=120
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr else "failed")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def heaviest_imports(top: int) -> list:
+    """Return server.py's direct imports ranked by cumulative time (microseconds)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c",
+         f"import sys; sys.path.insert(0, {SERVER_DIR!r}); import server"],
+        cwd=SERVER_DIR,
+        capture_output=True,
+        text=True,
+        timeout=120
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nesting is shown as two spaces per level; keep what server.py
+        # imports directly (depth 1)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def summarize(label: str, samples: list):
+    """Print median/min/max for a list of seconds."""
+    ms = [s * 1000 for s in samples]
+    print(f"{label:<28} median {statistics.median(ms):8.1f} ms   "
+          f"min {min(ms):8.1f} ms   max {max(ms):8.1f} ms")
+
+
+def main(runs: int, top: int, tool: str):
+    print("ClaudeScale MCP Server - Startup Benchmark")
+    print("=" * 60)
+
+    imports = [run_snippet(IMPORT_SNIPPET.format(server_dir=SERVER_DIR))["import_s"] for _ in range(runs)]
+
+    first_calls = []
+    tool_error = False
+    for _ in range(runs):
+        r = run_snippet(FIRST_CALL_SNIPPET.format(server_dir=SERVER_DIR, tool=tool))
+        first_calls.append(r)
+        tool_error = tool_error or r["tool_error"]
+
+    print(f"\nRuns: {runs}   Tool: {tool}\n")
+    summarize("import server", imports)
+    summarize("first tool call", [r["first_call_s"] for r in first_calls])
+    summarize("process start -> response", [r["total_s"] for r in first_calls])
+    if tool_error:
+        print("\nNote: the tool returned an error (no reachable cluster?). "
+              "Timings still measure time to a response.")
+
+    print(f"\nHeaviest imports made by server.py (top {top}):")
+    for cumulative_us, name in heaviest_imports(top):
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    for heavy in ("kubernetes", "prometheus_api_client", "pandas"):
+        probe = subprocess.run(
+            [sys.executable, "-c",
+             f"import sys; sys.path.insert(0, {SERVER_DIR!r}); import server; "
+             f"print({heavy!r} in sys.modules)"],
+            cwd=SERVER_DIR, capture_output=True, text=True, timeout=120
+        )
+        loaded = probe.stdout.strip().splitlines()[-1] if probe.stdout.strip() else "?"
+        print(f"  {heavy} imported at startup: {loaded}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per measurement")
+    parser.add_argument("--top", type=int, default=10, help="Heaviest imports to list")
+    parser.add_argument("--tool", default="claudescale_get_current_state", help="Tool for the first call")
+    args = parser.parse_args()
+
+    main(runs=args.runs, top=args.top, tool=args.tool)
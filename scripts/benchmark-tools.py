@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Tool-layer load benchmark against fake Kubernetes and Prometheus servers
+
+Starts mcp-server/simulation/fake_servers.py in a child process (so its
+request handling does not share this process' GIL), points the MCP server
+at it through a generated kubeconfig and PROMETHEUS_LOCAL_URL, and drives
+every tool over the in-memory MCP transport at each concurrency level.
+
+Reported per tool and concurrency: throughput, p50/p99/max latency, errors,
+and RSS after the run. Results can be saved and compared against a saved
+baseline; the script exits 1 when a tool regresses beyond --tolerance.
+
+Usage:
+    python3 scripts/benchmark-tools.py
+    python3 scripts/benchmark-tools.py --deployments 1000 --pods 10000 --concurrency 1,16,64
+    python3 scripts/benchmark-tools.py --k8s-latency-ms 5 --prom-latency-ms 10 --requests 500
+    python3 scripts/benchmark-tools.py --tools get_metrics,scale_deployment --save baseline.json
+    python3 scripts/benchmark-tools.py --compare baseline.json --tolerance 25
+"""
+import sys
+import os
+import json
+import time
+import asyncio
+import argparse
+import itertools
+import subprocess
+import tempfile
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER_DIR = os.path.join(REPO_DIR, "mcp-server")
+
+
+def start_fake_servers(args) -> tuple:
+    """Launch the fake API servers and return (process, urls)."""
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(SERVER_DIR, "simulation", "fake_servers.py"),
+         "--deployments", str(args.deployments),
+         "--pods", str(args.pods),
+         "--namespaces", str(args.namespaces),
+         "--k8s-latency-ms", str(args.k8s_latency_ms),
+         "--prom-latency-ms", str(args.prom_latency_ms),
+         "--jitter-ms", str(args.jitter_ms)],
+        stdout=subprocess.PIPE,
+        text=True
+    )
+    line = proc.stdout.readline()
+    if not line:
+        proc.kill()
+        raise RuntimeError("Fake servers failed to start")
+    return proc, json.loads(line)
+
+
+def rss_mb() -> tuple:
+    """(current, peak) resident set size in MB."""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    try:
+        with open("/proc/self/statm") as f:
+            current = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except OSError:
+        current = peak
+    return current, peak
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))]
+
+
+def first_namespace_deployments(args) -> list:
+    """Deployments the fake cluster puts in its first namespace (dealt round-robin)."""
+    return ["demo-app"] + [f"app-{i:04d}" for i in range(args.namespaces, args.deployments, args.namespaces)]
+
+
+def tool_workloads(args):
+    """
+    Argument generators per benchmark name: (tool, call index -> arguments)
+
+    Per-deployment tools rotate over the deployments of the first namespace
+    so that caches see a realistic mix instead of one hot key.
+    """
+    first_ns = first_namespace_deployments(args)
+
+    def dep(i):
+        return first_ns[i % len(first_ns)]
+
+    return {
+        "get_current_state": ("claudescale_get_current_state", lambda i: {}),
+        "get_current_state_all": ("claudescale_get_current_state", lambda i: {"all_namespaces": True}),
+        "get_metrics": ("claudescale_get_metrics", lambda i: {"deployment": dep(i)}),
+        "scale_deployment": ("claudescale_scale_deployment", lambda i: {
+            "deployment": dep(i),
+            "replicas": 4 - (i // len(first_ns)) % 2,  # 3 -> 4 -> 3 ...
+            "reason": "benchmark"
+        }),
+        "generate_report": ("claudescale_generate_report", lambda i: {"deployment": dep(i)}),
+        "clusters_overview": ("claudescale_clusters_overview", lambda i: {"deployment": dep(i)}),
+        "debug_traces": ("claudescale_debug_traces", lambda i: {}),
+    }
+
+
+async def run_load(client, tool: str, make_args, requests: int, concurrency: int) -> dict:
+    """Issue `requests` calls with `concurrency` in flight; return latency stats."""
+    latencies = []
+    errors = 0
+    counter = itertools.count()
+
+    async def worker():
+        nonlocal errors
+        while True:
+            i = next(counter)
+            if i >= requests:
+                return
+            start = time.perf_counter()
+            result = await client.call_tool(tool, make_args(i), raise_on_error=False)
+            latencies.append(time.perf_counter() - start)
+            if result.is_error or (isinstance(result.data, dict) and result.data.get("success") is False):
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    current, peak = rss_mb()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(requests / wall, 1) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        "rss_mb": round(current, 1),
+        "peak_rss_mb": round(peak, 1)
+    }
+
+
+async def benchmark(args, urls: dict) -> list:
+    kubeconfig = os.path.join(tempfile.mkdtemp(prefix="claudescale-bench-"), "kubeconfig")
+    from simulation.fake_servers import write_kubeconfig
+    write_kubeconfig(kubeconfig, urls["kubernetes"])
+
+    os.environ.update({
+        "KUBECONFIG_PATH": kubeconfig,
+        "KUBERNETES_IN_CLUSTER": "false",
+        "KUBERNETES_NAMESPACE": "claudescale",
+        "PROMETHEUS_LOCAL_URL": urls["prometheus"],
+        "CLUSTERS": "[]",
+        "TRACING_ENABLED": "false",
+        "RATE_LIMIT_ENABLED": "true" if args.rate_limits else "false",
+    })
+    os.chdir(os.path.dirname(kubeconfig))  # Keep a developer .env from overriding the above
+
+    import server
+    import guardrails
+    from fastmcp import Client
+
+    # Exercise the full write path on every scale call: no cooldown, and
+    # audit/snapshot files in the scratch directory
+    guardrails.AUDIT_LOG_PATH = guardrails.Path(os.path.dirname(kubeconfig)) / "audit.log"
+    guardrails.SNAPSHOT_PATH = guardrails.Path(os.path.dirname(kubeconfig)) / "snapshot.json"
+    guardrails.COOLDOWN_SECONDS = 0
+    guardrails.SCALEDOWN_COOLDOWN_SECONDS = 0
+
+    workloads = tool_workloads(args)
+    selected = args.tools.split(",") if args.tools else list(workloads)
+    unknown = set(selected) - set(workloads)
+    if unknown:
+        raise SystemExit(f"Unknown tool(s): {', '.join(sorted(unknown))}. Choose from: {', '.join(workloads)}")
+
+    results = []
+    async with Client(server.mcp) as client:
+        for name in selected:
+            tool, make_args = workloads[name]
+            if name == "scale_deployment":
+                # Start every target at 3 replicas so each call is a legal +/-1 step
+                k8s = server.clusters.get().k8s
+                for i in range(len(first_namespace_deployments(args))):
+                    await asyncio.to_thread(k8s.scale_deployment, make_args(i)["deployment"], 3)
+            # Warm-up: client construction, kubeconfig load, connection pools
+            await run_load(client, tool, make_args, min(args.requests, 5), 1)
+            for concurrency in args.concurrency:
+                stats = await run_load(client, tool, make_args, args.requests, concurrency)
+                results.append({"tool": name, "concurrency": concurrency, **stats})
+                print_row(results[-1])
+    return results
+
+
+def print_row(r: dict):
+    print(f"{r['tool']:<24} {r['concurrency']:>5} {r['requests']:>6} {r['errors']:>6} "
+          f"{r['throughput_rps']:>9.1f} {r['p50_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['max_ms']:>9.2f} "
+          f"{r['rss_mb']:>8.1f}", flush=True)
+
+
+def compare(args, results: list, baseline_path: str, tolerance_pct: float) -> list:
+    """Return human-readable regressions of results against a saved baseline."""
+    with open(baseline_path) as f:
+        saved = json.load(f)
+    baseline = {(r["tool"], r["concurrency"]): r for r in saved["results"]}
+
+    shape = ("deployments", "pods", "namespaces", "k8s_latency_ms", "prom_latency_ms", "jitter_ms", "requests",
+             "rate_limits")
+    differs = [k for k in shape if saved.get("config", {}).get(k) != getattr(args, k)]
+    if differs:
+        print(f"Warning: baseline was run with different {', '.join(differs)}; numbers are not comparable")
+
+    regressions = []
+    for r in results:
+        base = baseline.get((r["tool"], r["concurrency"]))
+        if not base:
+            continue
+        limit = 1 + tolerance_pct / 100
+        if base["p99_ms"] and r["p99_ms"] > base["p99_ms"] * limit:
+            regressions.append(f"{r['tool']} c={r['concurrency']}: p99 {base['p99_ms']} -> {r['p99_ms']} ms")
+        if r["throughput_rps"] * limit < base["throughput_rps"]:
+            regressions.append(
+                f"{r['tool']} c={r['concurrency']}: throughput {base['throughput_rps']} -> {r['throughput_rps']} req/s"
+            )
+        if base["rss_mb"] and r["rss_mb"] > base["rss_mb"] * limit:
+            regressions.append(f"{r['tool']} c={r['concurrency']}: RSS {base['rss_mb']} -> {r['rss_mb']} MB")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--deployments", type=int, default=100, help="Deployments in the fake cluster")
+    parser.add_argument("--pods", type=int, default=1000, help="Total pods in the fake cluster")
+    parser.add_argument("--namespaces", type=int, default=4, help="Namespaces the deployments spread over")
+    parser.add_argument("--k8s-latency-ms", type=float, default=2.0, help="Fake Kubernetes API delay per request")
+    parser.add_argument("--prom-latency-ms", type=float, default=2.0, help="Fake Prometheus delay per request")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Extra random delay per request")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated in-flight call counts")
+    parser.add_argument("--requests", type=int, default=200, help="Calls per tool and concurrency level")
+    parser.add_argument("--tools", default=None, help="Comma-separated subset of benchmarks (default: all)")
+    parser.add_argument("--rate-limits", action="store_true",
+                        help="Keep admission control on (default: off, to measure raw capacity)")
+    parser.add_argument("--save", default=None, help="Write results as JSON to this path")
+    parser.add_argument("--compare", default=None, help="Baseline JSON from --save to compare against")
+    parser.add_argument("--tolerance", type=float, default=25.0, help="Allowed regression in percent")
+    args = parser.parse_args()
+    args.concurrency = [int(c) for c in args.concurrency.split(",") if c]
+
+    sys.path.insert(0, SERVER_DIR)
+
+    print("ClaudeScale MCP Server - Tool Load Benchmark")
+    print("=" * 60)
+    print(f"Fake cluster: {args.deployments} deployments, {args.pods} pods, {args.namespaces} namespaces")
+    print(f"Latency: kubernetes {args.k8s_latency_ms} ms, prometheus {args.prom_latency_ms} ms, "
+          f"jitter {args.jitter_ms} ms")
+    print("")
+    print(f"{'tool':<24} {'conc':>5} {'reqs':>6} {'errors':>6} {'req/s':>9} {'p50 ms':>9} "
+          f"{'p99 ms':>9} {'max ms':>9} {'RSS MB':>8}")
+    print("-" * 93)
+
+    fake, urls = start_fake_servers(args)
+    try:
+        results = asyncio.run(benchmark(args, urls))
+    finally:
+        fake.kill()
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"config": {k: v for k, v in vars(args).items() if k not in ("save", "compare")},
+                       "results": results}, f, indent=2)
+        print(f"\nResults saved to {args.save}")
+
+    if args.compare:
+        regressions = compare(args, results, args.compare, args.tolerance)
+        print("")
+        if regressions:
+            print(f"Regressions beyond {args.tolerance}%:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance}% against {args.compare}")
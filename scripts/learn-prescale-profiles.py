@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Learn pre-scaling floor profiles from CPU history
+
+Sizes a replica floor for every (weekday, hour) from a quantile of the
+recorded demand (Prometheus range query, CSV or synthetic), and prints
+the hours that need more than the baseline as cron windows, ready for
+PRESCALE_PROFILES or PRESCALE_PROFILES_FILE. Review them before use: the
+floors are only as good as the history they came from.
+
+Usage:
+    python3 scripts/learn-prescale-profiles.py                                  # 7 synthetic days
+    python3 scripts/learn-prescale-profiles.py --prometheus http://localhost:9090 --days 28 --step 300
+    python3 scripts/learn-prescale-profiles.py --csv demand.csv --timezone Europe/Madrid --quantile 0.95
+    python3 scripts/learn-prescale-profiles.py --prometheus http://localhost:9090 --json > profiles.json
+"""
+import sys
+import os
+import json
+import argparse
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "mcp-server"))
+
+from simulation.replay import load_csv, load_from_prometheus, synthetic_series  # noqa: E402
+from simulation.profiles import hourly_floors, learn_profile, summarize  # noqa: E402
+
+
+def load_series(args):
+    if args.csv:
+        return load_csv(args.csv, step_seconds=args.step)
+    if args.prometheus:
+        from utils.prometheus_client import PrometheusClient
+        end = datetime.now()
+        return load_from_prometheus(
+            PrometheusClient(url=args.prometheus),
+            args.namespace, args.deployment,
+            start=end - timedelta(days=args.days), end=end,
+            step_seconds=args.step
+        )
+    return synthetic_series(days=args.synthetic_days, step_seconds=args.step, seed=args.seed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--csv", help="Recorded demand CSV")
+    source.add_argument("--prometheus", help="Prometheus URL to pull demand from")
+    source.add_argument("--synthetic-days", type=float, default=7, help="Synthetic series length (default)")
+    parser.add_argument("--namespace", default="claudescale")
+    parser.add_argument("--deployment", default="demo-app")
+    parser.add_argument("--days", type=float, default=14, help="Days of history (--prometheus)")
+    parser.add_argument("--step", type=float, default=60, help="Sample spacing in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic series seed")
+    parser.add_argument("--timezone", default="UTC", help="Zone the windows are written in (PRESCALE_TIMEZONE)")
+    parser.add_argument("--target-pct", type=float, default=60, help="Per-pod CPU %% the floors are sized for")
+    parser.add_argument("--quantile", type=float, default=0.9, help="Demand quantile per hour to cover")
+    parser.add_argument("--baseline", type=int, default=2, help="Hours needing no more replicas get no window")
+    parser.add_argument("--max-replicas", type=int, default=0, help="Cap on any floor (0 = none)")
+    parser.add_argument("--json", action="store_true", help="Print only the profile JSON")
+    args = parser.parse_args()
+
+    series = load_series(args)
+    windows = learn_profile(
+        series, tz=args.timezone, target_pct=args.target_pct, quantile=args.quantile,
+        baseline_replicas=args.baseline, max_replicas=args.max_replicas
+    )
+    profile = {f"{args.namespace}/{args.deployment}": windows}
+
+    if args.json:
+        print(json.dumps(profile, indent=2))
+        sys.exit(0)
+
+    print("=" * 60)
+    print(f"Pre-scaling profile for {args.namespace}/{args.deployment}")
+    print("=" * 60)
+    print(f"History: {len(series.cores)} samples, {series.step_seconds:g}s step, "
+          f"{series.duration_days:.1f} days from {series.start:%Y-%m-%d %H:%M}")
+    print(f"Floors: p{args.quantile * 100:g} demand at {args.target_pct:g}% per pod, {args.timezone}")
+    print("")
+
+    floors = hourly_floors(series, args.timezone, args.target_pct, args.quantile)
+    print("      " + "".join(f"{h:>3}" for h in range(24)))
+    for day, row in zip(("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"), floors):
+        print(f"{day:>5} " + "".join(f"{v:>3}" for v in row))
+    print("")
+
+    if not windows:
+        print(f"No hour needs more than {args.baseline} replicas; no windows.")
+        sys.exit(0)
+    for w in windows:
+        print(f"  {w['schedule']:<22} {w['duration_minutes']:>4} min  min_replicas={w['min_replicas']}")
+    totals = summarize(windows)
+    print(f"\n{len(windows)} window(s), {totals['window_hours_per_week']:g} h/week, "
+          f"{totals['floor_pod_hours_per_week']:g} floor pod-hours/week")
+    print("")
+    print("PRESCALE_PROFILES='" + json.dumps(profile) + "'")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Local OTLP/HTTP stand-in for ClaudeScale traces
+
+Accepts OTLP/JSON POSTs on /v1/traces (what the MCP server sends with
+TRACE_EXPORTER=otlp) and prints one line per span, indented by nesting.
+Use it instead of a full OpenTelemetry collector during development.
+
+Usage:
+    python3 scripts/otlp-receiver.py                      # listen on :4318
+    python3 scripts/otlp-receiver.py --port 4318 --out /tmp/otlp-traces.jsonl
+
+Then start the server with:
+    TRACING_ENABLED=true TRACE_EXPORTER=otlp python3 mcp-server/server.py
+"""
+import json
+import argparse
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+
+def print_trace(payload: dict):
+    """Print every span of an OTLP/JSON payload as an indented tree."""
+    for resource_spans in payload.get("resourceSpans", []):
+        for scope_spans in resource_spans.get("scopeSpans", []):
+            spans = sorted(scope_spans.get("spans", []), key=lambda s: int(s["startTimeUnixNano"]))
+            depth = {}
+            for s in spans:
+                d = depth.get(s["parentSpanId"], -1) + 1 if s["parentSpanId"] else 0
+                depth[s["spanId"]] = d
+                ms = (int(s["endTimeUnixNano"]) - int(s["startTimeUnixNano"])) / 1e6
+                status = " ERROR" if s.get("status", {}).get("code") == 2 else ""
+                print(f"{s['traceId'][:8]} {'  ' * d}{s['name']:<50} {ms:9.2f} ms{status}")
+    print("")
+
+
+def make_handler(out_path):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != "/v1/traces":
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            payload = json.loads(body)
+            print_trace(payload)
+            if out_path:
+                with open(out_path, "a") as f:
+                    f.write(json.dumps(payload) + "\n")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=4318, help="Listen port (OTLP/HTTP default 4318)")
+    parser.add_argument("--out", default=None, help="Also append received payloads to this file")
+    args = parser.parse_args()
+
+    print(f"OTLP stand-in listening on http://localhost:{args.port}/v1/traces")
+    HTTPServer(("127.0.0.1", args.port), make_handler(args.out)).serve_forever()
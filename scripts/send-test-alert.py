@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Local Alertmanager stand-in: POST webhook payloads to the ClaudeScale server
+
+Sends the same JSON Alertmanager's webhook receiver sends (version 4), so
+the alert webhook can be exercised without Prometheus rules or an
+Alertmanager. Re-sending an alert with the same labels is deduplicated by
+the server; --resolve clears it.
+
+Usage:
+    python3 scripts/send-test-alert.py                                  # DemoAppHighCPU firing
+    python3 scripts/send-test-alert.py --deployment demo-app --severity critical --repeat 3
+    python3 scripts/send-test-alert.py --resolve
+    python3 scripts/send-test-alert.py --url http://localhost:9095/alerts --token s3cret
+
+Then look at the alerts with the claudescale_pending_alerts tool (or the
+server's audit log for alert_evaluated entries with ALERT_ACTION=evaluate).
+"""
+import sys
+import json
+import time
+import hashlib
+import argparse
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+
+
+def build_payload(args) -> dict:
+    labels = {
+        "alertname": args.alertname,
+        "namespace": args.namespace,
+        "deployment": args.deployment,
+        "severity": args.severity
+    }
+    if args.cluster:
+        labels["cluster"] = args.cluster
+    status = "resolved" if args.resolve else "firing"
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    alert = {
+        "status": status,
+        "labels": labels,
+        "annotations": {"summary": args.summary or f"CPU on {args.deployment} above threshold"},
+        "startsAt": now,
+        "endsAt": now if args.resolve else "0001-01-01T00:00:00Z",
+        "generatorURL": "http://localhost:9090/graph",
+        "fingerprint": hashlib.sha1(json.dumps(labels, sort_keys=True).encode()).hexdigest()[:16]
+    }
+    return {
+        "version": "4",
+        "groupKey": f'{{}}:{{alertname="{args.alertname}"}}',
+        "truncatedAlerts": 0,
+        "status": status,
+        "receiver": "claudescale",
+        "groupLabels": {"alertname": args.alertname},
+        "commonLabels": labels,
+        "commonAnnotations": alert["annotations"],
+        "externalURL": "http://localhost:9093",
+        "alerts": [alert]
+    }
+
+
+def post(url: str, payload: dict, token: str = None) -> tuple:
+    request = urllib.request.Request(url, data=json.dumps(payload).encode(), method="POST")
+    request.add_header("Content-Type", "application/json")
+    if token:
+        request.add_header("Authorization", f"Bearer {token}")
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.loads(response.read() or b"{}")
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b"{}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:9095/alerts", help="ClaudeScale alert webhook URL")
+    parser.add_argument("--token", help="Bearer token (ALERT_WEBHOOK_TOKEN)")
+    parser.add_argument("--alertname", default="DemoAppHighCPU")
+    parser.add_argument("--namespace", default="claudescale")
+    parser.add_argument("--deployment", default="demo-app")
+    parser.add_argument("--cluster", help="Cluster label (default: the server's first cluster)")
+    parser.add_argument("--severity", default="warning")
+    parser.add_argument("--summary", help="Alert summary annotation")
+    parser.add_argument("--resolve", action="store_true", help="Send the alert as resolved")
+    parser.add_argument("--repeat", type=int, default=1, help="Send the payload this many times")
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between repeats")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"Alertmanager stand-in -> {args.url}")
+    print("=" * 60)
+
+    payload = build_payload(args)
+    for i in range(args.repeat):
+        try:
+            status, body = post(args.url, payload, args.token)
+        except urllib.error.URLError as e:
+            print(f"Cannot reach {args.url}: {e.reason}")
+            sys.exit(1)
+        print(f"[{i + 1}/{args.repeat}] {payload['status']} {args.alertname} "
+              f"({args.namespace}/{args.deployment}) -> HTTP {status} {json.dumps(body)}")
+        if status != 200:
+            sys.exit(1)
+        if i + 1 < args.repeat:
+            time.sleep(args.interval)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Offline policy replay: evaluate threshold and guardrail changes without a cluster
+
+Feeds a recorded (CSV or Prometheus) or synthetic CPU demand series through
+the get_metrics thresholds and the real guardrails, with a fake clock and a
+fake Kubernetes client, and prints one row per parameter combination:
+scaling actions, blocked attempts, SLO violation time and pod-minutes.
+
+Comma-separated values sweep a parameter; every combination is replayed.
+
+Usage:
+    python3 scripts/simulate-policy.py                                   # 7 synthetic days
+    python3 scripts/simulate-policy.py --synthetic-days 28 --cooldown 30,90,180
+    python3 scripts/simulate-policy.py --csv demand.csv --scaledown-max-cpu 30,40,50
+    python3 scripts/simulate-policy.py --adaptive-cooldown 1,0 --flap-max-multiplier 2,4
+    python3 scripts/simulate-policy.py --prometheus http://localhost:9090 --days 14 --step 60
+    python3 scripts/simulate-policy.py --max-replicas 8 --json > results.json
+
+CSV columns: timestamp, and cpu_cores or avg_cpu_cores + replicas.
+"""
+import sys
+import os
+import json
+import argparse
+import itertools
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "mcp-server"))
+
+from simulation.replay import (  # noqa: E402
+    ThresholdPolicy, load_csv, load_from_prometheus, simulate, synthetic_series
+)
+
+
+def floats(value: str):
+    return [float(v) for v in value.split(",") if v]
+
+
+def ints(value: str):
+    return [int(v) for v in value.split(",") if v]
+
+
+def load_series(args):
+    if args.csv:
+        return load_csv(args.csv, step_seconds=args.step)
+    if args.prometheus:
+        from utils.prometheus_client import PrometheusClient
+        end = datetime.now()
+        return load_from_prometheus(
+            PrometheusClient(url=args.prometheus),
+            args.namespace, args.deployment,
+            start=end - timedelta(days=args.days), end=end,
+            step_seconds=args.step
+        )
+    return synthetic_series(days=args.synthetic_days, step_seconds=args.step, seed=args.seed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--csv", help="Recorded demand CSV")
+    source.add_argument("--prometheus", help="Prometheus URL to pull demand from")
+    source.add_argument("--synthetic-days", type=float, default=7, help="Synthetic series length (default)")
+    parser.add_argument("--namespace", default="claudescale", help="Namespace (--prometheus)")
+    parser.add_argument("--deployment", default="demo-app", help="Deployment (--prometheus)")
+    parser.add_argument("--days", type=float, default=7, help="Days of history (--prometheus)")
+    parser.add_argument("--step", type=float, default=15, help="Sample spacing in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic series seed")
+
+    parser.add_argument("--cooldown", type=floats, default=[90], help="COOLDOWN_SECONDS values")
+    parser.add_argument("--scaledown-cooldown", type=floats, default=[180], help="SCALEDOWN_COOLDOWN_SECONDS values")
+    parser.add_argument("--scaledown-max-cpu", type=floats, default=[40], help="SCALEDOWN_MAX_CPU_PCT values")
+    parser.add_argument("--adaptive-cooldown", type=ints, default=[1], help="ADAPTIVE_COOLDOWN values (1/0)")
+    parser.add_argument("--flap-max-multiplier", type=floats, default=[4], help="FLAP_MAX_MULTIPLIER values")
+    parser.add_argument("--up-pct", type=floats, default=[75], help="Scale-up threshold values")
+    parser.add_argument("--down-pct", type=floats, default=[30], help="Scale-down threshold values")
+    parser.add_argument("--max-replicas", type=ints, default=[5],
+                        help="Max replicas values (policy and the MAX_REPLICAS guardrail)")
+    parser.add_argument("--initial-replicas", type=int, default=2)
+    parser.add_argument("--slo-pct", type=float, default=90, help="Per-pod CPU counted as an SLO violation")
+    parser.add_argument("--json", action="store_true", help="Print full results as JSON")
+    args = parser.parse_args()
+
+    series = load_series(args)
+
+    results = []
+    for cooldown, sd_cooldown, sd_cpu, adaptive, flap_max, up, down, max_r in itertools.product(
+        args.cooldown, args.scaledown_cooldown, args.scaledown_max_cpu,
+        args.adaptive_cooldown, args.flap_max_multiplier,
+        args.up_pct, args.down_pct, args.max_replicas
+    ):
+        results.append(simulate(
+            series,
+            ThresholdPolicy(scale_up_pct=up, scale_down_pct=down, max_replicas=max_r),
+            initial_replicas=args.initial_replicas,
+            slo_pct=args.slo_pct,
+            guardrail_overrides={
+                "COOLDOWN_SECONDS": cooldown,
+                "SCALEDOWN_COOLDOWN_SECONDS": sd_cooldown,
+                "SCALEDOWN_MAX_CPU_PCT": sd_cpu,
+                "ADAPTIVE_COOLDOWN": bool(adaptive),
+                "FLAP_MAX_MULTIPLIER": flap_max,
+                "MAX_REPLICAS": max_r,
+            }
+        ))
+
+    if args.json:
+        print(json.dumps(results, indent=2, default=str))
+        sys.exit(0)
+
+    print("=" * 60)
+    print("ClaudeScale policy replay")
+    print("=" * 60)
+    print(f"Series: {len(series.cores)} samples, {series.step_seconds:g}s step, "
+          f"{series.duration_days:.1f} days from {series.start:%Y-%m-%d %H:%M}")
+    print("")
+
+    header = (f"{'cool':>5} {'sd_cool':>7} {'sd_cpu':>6} {'adapt':>5} {'up%':>4} {'down%':>5} {'max':>3} | "
+              f"{'up':>4} {'down':>4} {'blk_cd':>6} {'blk_gd':>6} {'blk_ot':>6} | "
+              f"{'avg_rep':>7} {'pod_min':>9} {'vs_oracle':>9} {'slo_min':>8} {'episodes':>8} {'time_s':>6}")
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        o, p, a = r["guardrail_overrides"], r["policy"], r["actions"]
+        overhead = r["pod_minutes"] / r["oracle_pod_minutes"] if r["oracle_pod_minutes"] else 0
+        adapt = f"x{o['FLAP_MAX_MULTIPLIER']:g}" if o["ADAPTIVE_COOLDOWN"] else "off"
+        print(f"{o['COOLDOWN_SECONDS']:>5g} {o['SCALEDOWN_COOLDOWN_SECONDS']:>7g} {o['SCALEDOWN_MAX_CPU_PCT']:>6g} "
+              f"{adapt:>5} "
+              f"{p['scale_up_pct']:>4g} {p['scale_down_pct']:>5g} {p['max_replicas']:>3} | "
+              f"{a['scale_up']:>4} {a['scale_down']:>4} {a['blocked_cooldown']:>6} "
+              f"{a['blocked_guard']:>6} {a['blocked_other']:>6} | "
+              f"{r['replicas']['average']:>7.2f} {r['pod_minutes']:>9.0f} {overhead:>8.2f}x "
+              f"{r['slo']['violation_minutes']:>8.1f} {r['slo']['episodes']:>8} {r['elapsed_seconds']:>6.2f}")
+
+    print("")
+    print("vs_oracle: pod-minutes relative to the fewest replicas that keep every step")
+    print("under the scale-up threshold; slo_min: minutes with per-pod CPU above --slo-pct;")
+    print("adapt: adaptive cooldown off, or its largest flapping multiplier.")
@@ -18,7 +18,7 @@ source venv/bin/activate 2>/dev/null || {
 
 # Check Python dependencies
 echo "Checking dependencies..."
-python3 -c "import fastmcp, kubernetes, prometheus_api_client" 2>/dev/null
+python3 -c "import fastmcp, kubernetes" 2>/dev/null
 if [ $? -ne 0 ]; then
     echo "Missing dependencies. Installing..."
     pip install -r requirements-mcp.txt